@@ -1,23 +1,59 @@
 # ai_agent/agent/a2a_agent.py
 from __future__ import annotations
 
-from typing import Optional, Union, AsyncGenerator, AsyncIterator
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Set, Tuple, Union, AsyncGenerator
 from uuid import uuid4
-import traceback
+import asyncio
+import copy
 
 import httpx
 from a2a.client import A2AClient
 from a2a.types import (
     SendStreamingMessageRequest,
     SendMessageRequest,
+    SendMessageResponse,
+    GetTaskRequest,
+    CancelTaskRequest,
+    TaskQueryParams,
+    TaskIdParams,
+    MessageSendConfiguration,
     MessageSendParams,
+    PushNotificationConfig,
     Message,
+    Task,
     Role,
     Part, TextPart
 )
 from agno.agent.agent import Agent
 from agno.run.response import RunResponse, RunStatus
 
+from agno_a2a_ext.agent.a2a.balancer import Endpoint, LoadBalancer
+from agno_a2a_ext.agent.a2a.card_cache import AgentCardCache, get_card_cache, is_card_error
+from agno_a2a_ext.agent.a2a.client_pool import get_client_registry
+from agno_a2a_ext.agent.a2a.concurrency import AdaptiveConcurrencyLimiter, get_concurrency_limiter
+from agno_a2a_ext.agent.a2a.deadline import (
+    DEADLINE_METADATA_KEY,
+    bounded_timeout,
+    check_deadline,
+    deadline_metadata,
+    remaining,
+    resolve_deadline,
+)
+from agno_a2a_ext.agent.a2a.errors import A2AAgentError, A2ARemoteError, A2AStreamTimeoutError, DeadlineExceededError
+from agno_a2a_ext.agent.a2a.local_transport import get_local_app, get_local_client
+from agno_a2a_ext.agent.a2a.notifications import NotificationReceiver, SubmittedTask
+from agno_a2a_ext.agent.a2a.resilience import CircuitBreaker, RetryPolicy, get_circuit_breaker, is_transient_error
+from agno_a2a_ext.agent.a2a.response_cache import ResponseCache
+from agno_a2a_ext.agent.a2a.singleflight import SingleFlight, get_single_flight, request_key
+from agno_a2a_ext.agent.a2a.streaming import STREAM_MODES, ContentBuffer, StreamState, parts_text
+from agno_a2a_ext.observability.metrics import track_client_call
+from agno_a2a_ext.observability.tracing import get_tracer, propagation_headers
+
+tracer = get_tracer(__name__)
+
+# 远程服务没有返回可提取的文本时的回复内容
+EMPTY_RESPONSE_CONTENT = "远程服务返回空响应"
+
 
 class A2AAgent(Agent):
     """
@@ -28,349 +64,899 @@ class A2AAgent(Agent):
 
     def __init__(
             self,
-            base_url: str,
+            base_url: Union[str, List[str]],
             name: str,
             role: Optional[str] = None,
             timeout: float = 60.0,
+            connect_timeout: Optional[float] = None,
+            first_token_timeout: Optional[float] = None,
+            chunk_timeout: Optional[float] = None,
+            limits: Optional[httpx.Limits] = None,
+            http2: bool = False,
+            wire_format: str = "json",
+            card_cache: Optional[AgentCardCache] = None,
+            stream_mode: str = "delta",
+            concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+            balancer: Optional[LoadBalancer] = None,
+            session_affinity: bool = False,
+            retry_policy: Optional[RetryPolicy] = None,
+            coalesce: bool = False,
+            cache_scope: Optional[str] = None,
+            single_flight: Optional[SingleFlight] = None,
+            response_cache: Optional[ResponseCache] = None,
+            cache_ttl: Optional[float] = None,
+            long_running: bool = False,
+            notification_receiver: Optional[NotificationReceiver] = None,
+            task_timeout: Optional[float] = None,
+            poll_interval: float = 2.0,
+            max_poll_interval: float = 30.0,
+            in_process: Optional[bool] = None,
             **kwargs
     ):
         """
         初始化A2AAgent
         
         Args:
-            base_url: 远程A2A服务的基础URL
+            base_url: 远程A2A服务的基础URL，或同一服务多个副本的URL列表（按调用负载均衡）
             name: 代理名称
             role: 代理角色（可选）
-            timeout: 请求超时时间（秒）
+            timeout: 请求超时时间（秒），同时受调用方截止时间（剩余预算）约束
+            connect_timeout: 建立连接的超时时间（秒），默认与timeout相同
+            first_token_timeout: 流式请求等待首个数据块的超时时间（秒），None表示只受截止时间约束
+            chunk_timeout: 流式请求相邻数据块之间的最长间隔（秒），None表示只受截止时间约束
+            limits: 共享连接池的连接数与保活限制（仅在首次为该base_url创建连接池时生效）
+            http2: 是否启用HTTP/2（仅在首次为该base_url创建连接池时生效）
+            wire_format: 非流式响应的编码，"msgpack"时请求对方以msgpack返回（需要安装msgpack，
+                对方不支持时照常使用JSON；仅在首次为该base_url创建连接池时生效）
+            card_cache: AgentCard缓存（可选），默认使用进程级共享缓存
+            stream_mode: 流式输出模式，"delta"只输出新增文本，"accumulated"输出截至目前的完整文本
+            concurrency_limiter: 并发限制器（可选），默认每个副本使用其base_url的进程级共享限制器
+            balancer: 副本负载均衡器（可选），默认根据base_url列表创建
+            session_affinity: 是否按session_id一致性哈希选择副本，同一会话的后续请求落在已加载该会话的副本上
+            retry_policy: 重试策略（可选），默认最多尝试3次并受重试预算约束
+            coalesce: 是否合并相同的进行中请求（同一远程服务、规范化后相同的消息、相同的作用域和相同的调用方式），
+                不同会话的相同请求也会合并，只适用于结果不依赖会话状态的请求。只有发起者的请求会发送给远程服务，
+                等待者的消息不会记录到它们各自的远程会话中；需要按用户或租户隔离时使用cache_scope
+            cache_scope: 默认的请求合并与响应缓存作用域（例如租户ID），不同作用域的请求互不共享结果
+            single_flight: 请求合并组（可选），默认使用进程级共享的合并组
+            response_cache: 响应缓存（可选），只适用于对相同输入结果确定的远程服务，默认不缓存
+            cache_ttl: 本代理写入缓存的有效期（秒），默认使用缓存的ttl
+            long_running: 非流式请求是否以提交后通知的方式执行：提交任务后立即断开连接，
+                通过推送通知（配置了notification_receiver时）或轮询tasks/get获取结果
+            notification_receiver: 本地推送通知接收器（可选），可被多个A2AAgent共享
+            task_timeout: 等待长任务完成的最长时间（秒），None表示不限制
+            poll_interval: 轮询tasks/get的初始间隔（秒），之后指数增长
+            max_poll_interval: 轮询间隔上限（秒）；有推送通知时只以该间隔兜底轮询
+            in_process: 远程服务与调用方在同一进程中运行（由AgentServer/TeamServer启动）时，
+                是否不经网络直接调用其ASGI应用：None表示自动检测，True表示必须在本进程中，False表示总是走HTTP
             **kwargs: 传递给Agent父类的其他参数
         """
+        if stream_mode not in STREAM_MODES:
+            raise ValueError(f"不支持的stream_mode: {stream_mode}，可选值: {', '.join(STREAM_MODES)}")
+
         super().__init__(
             name=name,
             role=role or name,
             **kwargs
         )
-        self.base_url = base_url
+        self.base_urls = [base_url] if isinstance(base_url, str) else list(base_url)
+        if not self.base_urls:
+            raise ValueError("base_url不能为空")
+        # 保留单个base_url属性，兼容只使用一个远程服务的代码
+        self.base_url = self.base_urls[0]
         self.timeout = timeout
-        self._client = None
-        self._httpx_client = None
+        self.connect_timeout = connect_timeout
+        self.first_token_timeout = first_token_timeout
+        self.chunk_timeout = chunk_timeout
+        self.limits = limits
+        self.http2 = http2
+        self.wire_format = wire_format
+        self.card_cache = card_cache or get_card_cache()
+        self.stream_mode = stream_mode
+        self.concurrency_limiter = concurrency_limiter
+        self.balancer = balancer or LoadBalancer(self.base_urls)
+        # 副本（deep_copy）共享原实例的负载均衡器，关闭时不停止其健康检查
+        self._owns_balancer = True
+        self.session_affinity = session_affinity
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.coalesce = coalesce
+        self.cache_scope = cache_scope
+        self.single_flight = single_flight or get_single_flight()
+        self.response_cache = response_cache
+        self.cache_ttl = cache_ttl
+        self.long_running = long_running
+        self.notification_receiver = notification_receiver
+        self.task_timeout = task_timeout
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.in_process = in_process
+        # 每个副本各自的A2A客户端与共享httpx客户端；httpx客户端绑定事件循环，
+        # 因此按(base_url, 事件循环)区分，同一实例可以同时用于arun和同步的run
+        self._clients: Dict[Tuple[str, asyncio.AbstractEventLoop], A2AClient] = {}
+        self._httpx_clients: Dict[Tuple[str, asyncio.AbstractEventLoop], httpx.AsyncClient] = {}
+        # 进行中的远程取消请求，持有引用避免被垃圾回收
+        self._cancellations: Set[asyncio.Task] = set()
 
         # 添加流式响应支持标识
         self.is_streamable = True
 
-    async def _ensure_client(self) -> A2AClient:
+    async def _ensure_client(self, endpoint: Optional[Endpoint] = None) -> A2AClient:
         """
-        确保A2A客户端已初始化
-        
+        确保指定副本的A2A客户端已初始化
+
+        Args:
+            endpoint: 目标副本，为None时使用第一个副本
+
         Returns:
             初始化好的A2A客户端
         """
-        if self._client is None:
-            print(f"DEBUG 初始化A2A客户端，base_url={self.base_url}")
+        endpoint = endpoint or self.balancer.endpoints[0]
+        base_url = endpoint.base_url
+        key = (base_url, asyncio.get_running_loop())
+        client = self._clients.get(key)
+        if client is None:
+            tracer.debug("初始化A2A客户端，base_url=%s", base_url)
             try:
-                self._httpx_client = httpx.AsyncClient(timeout=self.timeout)
-                self._client = await A2AClient.get_client_from_agent_card_url(
-                    self._httpx_client, self.base_url
+                # 服务在本进程中运行时直接调用其ASGI应用（协议不变，省去TCP、HTTP解析和uvicorn）
+                local_app = get_local_app(base_url) if self.in_process is not False else None
+                if self.in_process and local_app is None:
+                    raise A2AAgentError(f"A2A服务不在本进程中运行: {base_url}")
+                # 否则从进程级注册表获取共享的httpx客户端，同一远程服务的所有实例复用保活连接
+                httpx_client = self._httpx_clients.get(key)
+                if local_app is not None:
+                    httpx_client = get_local_client(base_url, local_app)
+                    tracer.debug("使用进程内传输调用A2A服务，base_url=%s", base_url)
+                elif httpx_client is None:
+                    httpx_client = self._httpx_clients[key] = await get_client_registry().acquire(
+                        base_url, limits=self.limits, http2=self.http2, wire_format=self.wire_format
+                    )
+                # AgentCard走缓存，TTL内无需在首条消息前额外请求一次卡片
+                agent_card = await self.card_cache.get(
+                    httpx_client, base_url, http_kwargs=self._http_kwargs()
                 )
-                print(f"DEBUG A2A客户端初始化成功，client={self._client}")
+                client = self._clients[key] = A2AClient(httpx_client=httpx_client, agent_card=agent_card)
+                tracer.debug("A2A客户端初始化成功，client=%s", client)
             except Exception as e:
-                print(f"ERROR 初始化A2A客户端失败: {str(e)}")
-                traceback.print_exc()
+                tracer.exception("初始化A2A客户端失败: %s", e, base_url=base_url)
+                self.balancer.report_failure(endpoint, e)
                 raise e
-        return self._client
+            self.balancer.start_health_checks()
+        return client
+
+    def _stream_http_kwargs(self) -> dict:
+        """流式请求的httpx参数（不设读超时，由首块/块间超时和截止时间控制；传播追踪请求头）"""
+        kwargs = {}
+        if self.connect_timeout is not None:
+            kwargs["timeout"] = httpx.Timeout(None, connect=self.connect_timeout)
+        headers = propagation_headers()
+        if headers:
+            kwargs["headers"] = headers
+        return kwargs
+
+    def _limiter_for(self, endpoint: Endpoint) -> AdaptiveConcurrencyLimiter:
+        """副本对应的并发限制器"""
+        return self.concurrency_limiter or get_concurrency_limiter(endpoint.base_url)
+
+    def _http_kwargs(self, deadline: Optional[float] = None) -> dict:
+        """单个请求的httpx参数（共享客户端上按实例生效、收紧到截止时间以内的超时，以及向下游传播的追踪请求头）"""
+        timeout = bounded_timeout(self.timeout, deadline)
+        if self.connect_timeout is not None:
+            timeout = httpx.Timeout(timeout, connect=min(self.connect_timeout, timeout))
+        kwargs = {"timeout": timeout}
+        headers = propagation_headers()
+        if headers:
+            kwargs["headers"] = headers
+        return kwargs
 
     async def arun(
             self,
             message: str,
             session_id: Optional[str] = None,
             stream: bool = False,
+            cache_scope: Optional[str] = None,
+            timeout: Optional[float] = None,
             **kwargs
     ) -> Union[RunResponse, AsyncGenerator[RunResponse, None]]:
         """
         异步运行代理，获取回复
-        
+
+        可重试的错误（连接失败、超时、429/5xx）按retry_policy退避重试，每次尝试重新选择副本；
+        远程服务熔断时快速失败。流式请求只在收到首个数据块之前重试。
+        开启coalesce时，相同的进行中请求只向远程服务发送一次，流式请求的后加入者会先重放已收到的内容，
+        每个等待者按自己的截止时间放弃等待；不同会话的相同请求同样合并，等待者的消息不会记录到其远程会话中。
+        配置response_cache时，命中缓存的请求不再访问远程服务，流式请求以缓存的完整回复作为唯一的数据块。
+        开启long_running时，非流式请求以非阻塞方式提交，等待推送通知或轮询获取结果。
+        截止时间取timeout与上游传入的截止时间中较早者，剩余预算随消息metadata传给远程服务，
+        预算用完后停止重试和等待。
+
         Args:
             message: 用户消息
             session_id: 会话ID
             stream: 是否流式响应
+            cache_scope: 本次请求的合并与缓存作用域（可选），默认使用实例的cache_scope
+            timeout: 本次请求的总预算（秒，可选），包括重试、排队和下游的所有调用
             **kwargs: 其他参数
-            
+
         Returns:
             RunResponse或AsyncGenerator[RunResponse, None]: 运行响应或响应流
         """
-        client = await self._ensure_client()
         if not session_id:
             session_id = self._generate_session_id()
 
         # 创建唯一请求ID
         request_id = str(uuid4())
+        deadline = resolve_deadline(timeout)
 
-        print(
-            f"DEBUG A2AAgent 请求内容: message='{message}', session_id={session_id}, stream={stream}, request_id={request_id}")
+        tracer.debug(
+            "A2AAgent 请求内容: message='%s'", message, session_id=session_id, stream=stream, request_id=request_id
+        )
 
-        try:
-            # 使用A2A标准接口发送消息
-            if stream:
-                print(
-                    f"DEBUG A2AAgent 发送流式请求: URL={getattr(client, 'url', getattr(client, 'base_url', '未知URL'))}")
-
-                # 使用标准接口发送流式请求
-
-                # 构造消息对象
-                message_obj = Message(
-                    messageId=str(uuid4()),
-                    role=Role.user,
-                    parts=[Part(root=TextPart(kind="text", text=message))]
+        key = None
+        if self.coalesce or self.response_cache is not None:
+            key = request_key(self.base_urls, message, cache_scope or self.cache_scope)
+
+        if self.response_cache is not None:
+            cached = await self._cache_get(key)
+            if cached is not None:
+                tracer.debug("A2AAgent 命中响应缓存", key=key)
+                if stream:
+                    return self._handle_stream_response(self._replay_cached(cached))
+                return self._completed_response(cached)
+
+        affinity_key = session_id if self.session_affinity else None
+        # 合并键与缓存键一致，另外区分调用方式（不同方式的结果类型不同）；会话隔离由cache_scope负责
+        mode = "stream" if stream else ("long_running" if self.long_running else "send")
+        flight_key = (key, mode)
+
+        if stream:
+            request = SendStreamingMessageRequest(
+                id=request_id,
+                params=self._build_params(message, session_id, stream=True)
+            )
+            if self.coalesce:
+                deltas = self._until_deadline(
+                    self.single_flight.stream(flight_key, lambda: self._stream_deltas(request, affinity_key, deadline)),
+                    deadline
                 )
+            else:
+                deltas = self._stream_deltas(request, affinity_key, deadline)
+            return self._handle_stream_response(deltas, cache_key=key)
 
-                # 构造请求参数
-                params = MessageSendParams(
-                    message=message_obj,
-                    session_id=session_id,
-                    stream=True
-                )
+        if self.long_running:
+            call = lambda: self._submit_and_wait(message, session_id, request_id, affinity_key, deadline)
+        else:
+            request = SendMessageRequest(
+                id=request_id,
+                params=self._build_params(message, session_id, stream=False)
+            )
+            call = lambda: self._send_message(request, affinity_key, deadline)
+        try:
+            if self.coalesce:
+                # 共享调用按发起者的截止时间执行，每个等待者另按自己的截止时间放弃等待
+                result = await self._with_deadline(self.single_flight.do(flight_key, call), deadline)
+            else:
+                result = await call()
+        except Exception as e:
+            return self._error_response(e)
 
-                # 构造流式请求
-                request = SendStreamingMessageRequest(
-                    id=request_id,
-                    params=params
-                )
+        # 处理响应
+        if self.long_running:
+            run_response = self._completed_response(result)
+        else:
+            run_response = self._handle_nonstream_response(result[0])
+        # 只缓存成功的回复，远程报告的失败不能在TTL内被当作结果重放
+        if self.response_cache is not None and run_response.status == RunStatus.completed \
+                and run_response.content != EMPTY_RESPONSE_CONTENT:
+            await self._cache_set(key, run_response.content)
 
-                # 发送流式请求
-                try:
-                    response_stream = client.send_message_streaming(request)
-                    return self._handle_stream_response(response_stream, request_id)
-                except Exception as e:
-                    print(f"流式请求失败: {str(e)}")
-                    # 如果流式请求失败，回退到非流式请求
-                    # 注意：这里应该返回RunResponse，而不是AsyncGenerator
-                    try:
-                        # 构造非流式请求
-
-                        # 构造消息对象
-                        message_obj = Message(
-                            messageId=str(uuid4()),
-                            role=Role.user,
-                            parts=[Part(root=TextPart(kind="text", text=message))]
-                        )
-
-                        # 构造请求参数
-                        params = MessageSendParams(
-                            message=message_obj,
-                            session_id=session_id,
-                            stream=False
-                        )
-
-                        # 构造请求
-                        fallback_request = SendMessageRequest(
-                            id=request_id,
-                            params=params
-                        )
-
-                        response = await client.send_message(fallback_request)
-                        run_response = self._handle_nonstream_response(response)
-
-                        # 设置run_response属性
-                        self.run_response = run_response
-
-                        return run_response
-                    except Exception as fallback_error:
-                        print(f"回退请求也失败: {str(fallback_error)}")
-                        # 创建错误响应
-
-                        error_response = RunResponse(
-                            content=f"执行错误: {str(fallback_error)}",
-                            content_type="str",
-                            status=RunStatus.error
-                        )
-                        setattr(error_response, "event", "RunError")
-
-                        # 设置run_response属性
-                        self.run_response = error_response
-
-                        return error_response
-            else:
-                # 非流式请求
-                print(
-                    f"DEBUG A2AAgent 发送普通请求: URL={getattr(client, 'url', getattr(client, 'base_url', '未知URL'))}")
+        # 设置run_response属性，这样Team可以正确访问
+        self.run_response = run_response
 
-                # 使用标准接口发送普通请求
+        return run_response
 
-                # 构造消息对象
-                message_obj = Message(
-                    messageId=str(uuid4()),
-                    role=Role.user,
-                    parts=[Part(root=TextPart(kind="text", text=message))]
-                )
+    async def _send_message(
+            self,
+            request: SendMessageRequest,
+            affinity_key: Optional[str] = None,
+            deadline: Optional[float] = None
+    ) -> Tuple[SendMessageResponse, Endpoint]:
+        """
+        发送非流式请求，可重试的错误换副本退避重试（截止时间内）
 
-                # 构造请求参数
-                params = MessageSendParams(
-                    message=message_obj,
-                    session_id=session_id,
-                    stream=False
-                )
+        Args:
+            request: 请求
+            affinity_key: 会话亲和键（可选）
+            deadline: 截止时间（time.monotonic()时钟，可选）
 
-                # 构造请求
-                request = SendMessageRequest(
-                    id=request_id,
-                    params=params
-                )
+        Returns:
+            Tuple[SendMessageResponse, Endpoint]: 响应与处理该请求的副本
 
-                # 发送请求
-                response = await client.send_message(request)
+        Raises:
+            Exception: 最后一次尝试的异常（已记录失败）
+        """
+        self.retry_policy.on_request()
+        attempt = 1
+        failed: List[Endpoint] = []
+        while True:
+            check_deadline(deadline)
+            endpoint = self._pick_endpoint(affinity_key, failed)
+            try:
+                with track_client_call(endpoint.base_url, "message/send") as timer, \
+                        self._breaker_for(endpoint).guard():
+                    client = await self._ensure_client(endpoint)
+                    # 发送请求（受该远程服务的自适应并发限制）
+                    async with self._limiter_for(endpoint).slot():
+                        with self.balancer.track(endpoint):
+                            self._stamp_deadline(request.params, deadline)
+                            response = await self._with_deadline(
+                                client.send_message(request, http_kwargs=self._http_kwargs(deadline)), deadline
+                            )
+                    timer.check(response)
+                return response, endpoint
+            except Exception as e:
+                delay = self._retry_delay(attempt, e, deadline)
+                if delay is None:
+                    self._record_failure(e, endpoint)
+                    raise
+                tracer.warning("A2AAgent 第 %s 次请求失败，%.2f 秒后重试: %s", attempt, delay, e)
+                failed.append(endpoint)
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    async def asubmit(self, message: str, session_id: Optional[str] = None) -> SubmittedTask:
+        """
+        以非阻塞方式提交长任务，远程服务接受后立即返回，不等待执行完成
 
-                # 处理响应
-                run_response = self._handle_nonstream_response(response)
+        配置了notification_receiver时，任务结束后远程服务会把结果推送到接收器；
+        否则await_task通过轮询tasks/get获取结果。
 
-                # 设置run_response属性，这样Team可以正确访问
-                self.run_response = run_response
+        Args:
+            message: 用户消息
+            session_id: 会话ID
 
-                return run_response
+        Returns:
+            SubmittedTask: 已提交的任务（远程服务不支持后台执行时，直接包含最终的Message）
+        """
+        if not session_id:
+            session_id = self._generate_session_id()
+        affinity_key = session_id if self.session_affinity else None
+        return await self._submit(message, session_id, str(uuid4()), affinity_key)
+
+    async def await_task(self, submitted: SubmittedTask, timeout: Optional[float] = None) -> RunResponse:
+        """
+        等待已提交的长任务结束
 
+        Args:
+            submitted: asubmit返回的任务
+            timeout: 最长等待时间（秒），默认使用实例的task_timeout
+
+        Returns:
+            RunResponse: 任务结果，失败或超时时为错误响应
+        """
+        try:
+            content = await self._wait_settled(submitted, self.task_timeout if timeout is None else timeout)
         except Exception as e:
-            print(f"A2AAgent.arun 执行错误: {str(e)}")
-            traceback.print_exc()
+            return self._error_response(e)
+        return self._completed_response(content)
 
-            # 创建错误响应
-            error_response = RunResponse(
-                content=f"执行错误: {str(e)}",
-                content_type="str",
-                status=RunStatus.error
+    async def _submit_and_wait(
+            self,
+            message: str,
+            session_id: str,
+            request_id: str,
+            affinity_key: Optional[str] = None,
+            deadline: Optional[float] = None
+    ) -> str:
+        """提交长任务并在截止时间内等待结束，返回结果文本；放弃等待时取消远程任务"""
+        submitted = await self._submit(message, session_id, request_id, affinity_key, deadline)
+        try:
+            return await self._wait_settled(submitted, bounded_timeout(self.task_timeout, deadline))
+        except BaseException:
+            if not submitted.settled and submitted.task_id:
+                self._cancel_remote_later(submitted.endpoint, submitted.task_id)
+            raise
+
+    async def acancel(self, submitted: SubmittedTask) -> Optional[Task]:
+        """
+        取消已提交的长任务（tasks/cancel）
+
+        Args:
+            submitted: asubmit返回的任务
+
+        Returns:
+            Optional[Task]: 取消后的任务
+
+        Raises:
+            A2ARemoteError: 远程服务拒绝取消（例如任务已结束）
+        """
+        task = await self._cancel_remote(submitted.endpoint, submitted.task_id)
+        if task is not None:
+            submitted.task = task
+        return task
+
+    async def _submit(
+            self,
+            message: str,
+            session_id: str,
+            request_id: str,
+            affinity_key: Optional[str] = None,
+            deadline: Optional[float] = None
+    ) -> SubmittedTask:
+        """
+        以blocking=False发送消息，有通知接收器时附带推送配置
+
+        Raises:
+            A2ARemoteError: 远程服务返回JSON-RPC错误
+        """
+        push_config = None
+        if self.notification_receiver is not None:
+            await self.notification_receiver.start()
+            push_config = PushNotificationConfig(
+                url=self.notification_receiver.url,
+                token=self.notification_receiver.token,
             )
-            setattr(error_response, "event", "RunError")
+        params = self._build_params(message, session_id, stream=False)
+        params.configuration = MessageSendConfiguration(
+            accepted_output_modes=["text"],
+            blocking=False,
+            push_notification_config=push_config,
+        )
+        response, endpoint = await self._send_message(
+            SendMessageRequest(id=request_id, params=params), affinity_key, deadline
+        )
+
+        root = response.root
+        error = getattr(root, "error", None)
+        if error is not None:
+            raise A2ARemoteError(getattr(error, "message", str(error)), code=getattr(error, "code", None))
+        result = root.result
+        if isinstance(result, Task):
+            tracer.debug("A2AAgent 长任务已提交: task_id=%s, state=%s", result.id, result.status.state.value)
+            return SubmittedTask(task_id=result.id, context_id=result.context_id, endpoint=endpoint, task=result)
+        return SubmittedTask(task_id=result.task_id, context_id=result.context_id, endpoint=endpoint, message=result)
+
+    async def _wait_settled(self, submitted: SubmittedTask, timeout: Optional[float] = None) -> str:
+        """
+        等待任务结束并提取结果文本
+
+        有已启动的通知接收器时等待推送，并以max_poll_interval为间隔兜底轮询（防止通知丢失）；
+        否则从poll_interval开始按指数退避轮询tasks/get。
+
+        Raises:
+            TimeoutError: 超过timeout仍未结束
+            A2ARemoteError: 任务失败或被拒绝
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout is not None else None
+        receiver = self.notification_receiver
+        notified = None
+        if not submitted.settled and receiver is not None and receiver.started:
+            notified = receiver.expect(submitted.task_id)
+
+        interval = self.poll_interval
+        try:
+            while not submitted.settled:
+                wait = self.max_poll_interval if notified is not None else interval
+                if deadline is not None:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        raise TimeoutError(f"等待远程任务超时（{timeout} 秒）: task_id={submitted.task_id}")
+                    wait = min(wait, remaining)
+
+                if notified is not None:
+                    try:
+                        submitted.task = await asyncio.wait_for(asyncio.shield(notified), timeout=wait)
+                        break
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    await asyncio.sleep(wait)
+                    interval = min(interval * 2, self.max_poll_interval)
+
+                task = await self._get_task(submitted)
+                if task is not None:
+                    submitted.task = task
+        finally:
+            if notified is not None:
+                receiver.discard(submitted.task_id)
+                notified.cancel()
+
+        if submitted.message is not None:
+            content = parts_text(submitted.message.parts)
+        else:
+            content = StreamState().consume(submitted.task)
+        return content or EMPTY_RESPONSE_CONTENT
+
+    async def _get_task(self, submitted: SubmittedTask) -> Optional[Task]:
+        """
+        通过tasks/get查询任务的最新状态（发往接受该任务的副本）
 
-            # 设置run_response属性
-            self.run_response = error_response
+        Returns:
+            Optional[Task]: 最新的任务，遇到可重试的错误时返回None（下次轮询再试）
+        """
+        endpoint = submitted.endpoint
+        request = GetTaskRequest(id=str(uuid4()), params=TaskQueryParams(id=submitted.task_id))
+        try:
+            with track_client_call(endpoint.base_url, "tasks/get") as timer, self._breaker_for(endpoint).guard():
+                client = await self._ensure_client(endpoint)
+                response = await client.get_task(request, http_kwargs=self._http_kwargs())
+                timer.check(response)
+        except Exception as e:
+            # tasks/get是幂等的查询，临时故障都可以在下次轮询时重试
+            if is_transient_error(e):
+                tracer.warning("A2AAgent 查询任务状态失败，稍后重试: %s", e, task_id=submitted.task_id)
+                return None
+            raise
+        root = response.root
+        error = getattr(root, "error", None)
+        if error is not None:
+            raise A2ARemoteError(getattr(error, "message", str(error)), code=getattr(error, "code", None))
+        return root.result
+
+    async def _cancel_remote(self, endpoint: Endpoint, task_id: str) -> Optional[Task]:
+        """
+        通过tasks/cancel取消远程任务（发往执行该任务的副本）
 
-            return error_response
+        Raises:
+            A2ARemoteError: 远程服务返回JSON-RPC错误
+        """
+        request = CancelTaskRequest(id=str(uuid4()), params=TaskIdParams(id=task_id))
+        with track_client_call(endpoint.base_url, "tasks/cancel") as timer:
+            client = await self._ensure_client(endpoint)
+            response = await client.cancel_task(request, http_kwargs=self._http_kwargs())
+            timer.check(response)
+        root = response.root
+        error = getattr(root, "error", None)
+        if error is not None:
+            raise A2ARemoteError(getattr(error, "message", str(error)), code=getattr(error, "code", None))
+        return root.result
+
+    def _cancel_remote_later(self, endpoint: Endpoint, task_id: str) -> None:
+        """
+        在后台取消被放弃的远程任务（尽力而为，同步调用，可以在已被取消的协程中使用）
 
-    async def _handle_nonstream_fallback(self, client, message, session_id, request_id):
-        """当流式请求失败时的回退方法"""
+        调用方取消、超时或提前关闭流时，远程服务不一定能从断开的连接察觉，显式发送tasks/cancel，
+        避免远程继续执行没有人等待的工作。
+        """
         try:
-            # 使用标准接口发送普通请求
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if loop.is_closed():
+            return
 
-            # 构造消息对象
-            message_obj = Message(
-                messageId=str(uuid4()),
-                role=Role.user,
-                parts=[Part(root=TextPart(kind="text", text=message))]
-            )
+        async def cancel():
+            try:
+                await self._cancel_remote(endpoint, task_id)
+                tracer.debug("A2AAgent 已取消被放弃的远程任务: task_id=%s", task_id)
+            except Exception as e:
+                tracer.debug("A2AAgent 取消远程任务失败: %s", e, task_id=task_id)
 
-            # 构造请求参数
-            params = MessageSendParams(
-                message=message_obj,
-                session_id=session_id,
-                stream=False
-            )
+        task = loop.create_task(cancel())
+        self._cancellations.add(task)
+        task.add_done_callback(self._cancellations.discard)
 
-            # 构造请求
-            request = SendMessageRequest(
-                id=request_id,
-                params=params
-            )
+    def run(
+            self,
+            message: str,
+            session_id: Optional[str] = None,
+            stream: bool = False,
+            **kwargs
+    ) -> Union[RunResponse, Iterator[RunResponse]]:
+        """
+        同步运行代理，获取回复
+
+        请求在客户端注册表的后台事件循环上执行，同步调用之间复用保活连接，
+        不会每次调用都新建事件循环和HTTP客户端。
+
+        Args:
+            message: 用户消息
+            session_id: 会话ID
+            stream: 是否流式响应
+            **kwargs: 其他参数
+
+        Returns:
+            RunResponse或Iterator[RunResponse]: 运行响应或响应迭代器
+        """
+        registry = get_client_registry()
+        result = registry.run_sync(self.arun(message, session_id=session_id, stream=stream, **kwargs))
+        if isinstance(result, RunResponse):
+            return result
+        return self._iterate_sync(result)
+
+    @staticmethod
+    def _iterate_sync(response_stream: AsyncGenerator[RunResponse, None]) -> Iterator[RunResponse]:
+        """把后台事件循环上的异步响应流转换为同步迭代器，提前结束迭代时关闭响应流"""
+        registry = get_client_registry()
+
+        async def next_item():
+            try:
+                return True, await response_stream.__anext__()
+            except StopAsyncIteration:
+                return False, None
 
-            # 发送请求
-            response = await client.send_message(request)
+        try:
+            while True:
+                has_item, item = registry.run_sync(next_item())
+                if not has_item:
+                    return
+                yield item
+        finally:
+            registry.run_sync(response_stream.aclose())
+
+    async def arun_many(
+            self,
+            messages: Sequence[str],
+            concurrency: int = 8,
+            stream_results: bool = False,
+            timeout: Optional[float] = None,
+            session_id: Optional[str] = None,
+    ) -> Union[List[RunResponse], AsyncGenerator[Tuple[int, RunResponse], None]]:
+        """
+        并发发送多条互不相关的消息（评测、map式子任务等）
 
-            # 直接返回RunResponse对象，而不是异步生成器
-            return self._handle_nonstream_response(response)
+        固定数量的worker依次领取消息，请求在共享连接池上流水线发送，同一时刻最多concurrency个。
+        单条消息失败或超时只影响该条结果（status为error），不会中断整批。
 
+        Args:
+            messages: 消息列表
+            concurrency: 最大并发请求数
+            stream_results: 为True时返回异步生成器，按完成顺序产出(原始下标, RunResponse)；
+                为False时等待全部完成，按原始顺序返回RunResponse列表
+            timeout: 单条消息的超时时间（秒），为None时不限制
+            session_id: 会话ID前缀（可选），每条消息使用独立会话“{session_id}-{下标}”
+
+        Returns:
+            List[RunResponse]或AsyncGenerator[Tuple[int, RunResponse], None]: 批量结果
+        """
+        messages = list(messages)
+        if concurrency < 1:
+            raise ValueError("concurrency必须大于0")
+        if stream_results:
+            return self._run_many(messages, concurrency, timeout, session_id)
+
+        results: List[Optional[RunResponse]] = [None] * len(messages)
+        async for index, response in self._run_many(messages, concurrency, timeout, session_id):
+            results[index] = response
+        return results
+
+    async def _run_many(
+            self,
+            messages: List[str],
+            concurrency: int,
+            timeout: Optional[float],
+            session_id: Optional[str]
+    ) -> AsyncGenerator[Tuple[int, RunResponse], None]:
+        """按完成顺序产出批量请求的结果，生成器被提前关闭时取消未完成的请求"""
+        if not messages:
+            return
+
+        prefix = session_id or f"{self._generate_session_id()}-{uuid4().hex[:8]}"
+        done: asyncio.Queue = asyncio.Queue()
+        # worker共享同一个下标迭代器，单线程事件循环中无需加锁
+        pending = iter(range(len(messages)))
+
+        async def worker():
+            for index in pending:
+                response = await self._run_one(messages[index], f"{prefix}-{index}", timeout)
+                await done.put((index, response))
+
+        workers = [asyncio.create_task(worker()) for _ in range(min(concurrency, len(messages)))]
+        try:
+            for _ in range(len(messages)):
+                yield await done.get()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _run_one(self, message: str, session_id: str, timeout: Optional[float]) -> RunResponse:
+        """发送批量中的单条消息，超时和异常转换为错误响应"""
+        try:
+            return await asyncio.wait_for(self.arun(message, session_id=session_id, timeout=timeout), timeout=timeout)
+        except asyncio.TimeoutError:
+            return self._error_response(TimeoutError(f"请求超时（{timeout} 秒）"))
         except Exception as e:
-            print(f"回退请求失败: {str(e)}")
+            return self._error_response(e)
+
+    def _build_params(self, message: str, session_id: str, stream: bool) -> MessageSendParams:
+        """构造消息发送参数，会话ID作为消息的contextId发送"""
+        message_obj = Message(
+            messageId=str(uuid4()),
+            contextId=session_id,
+            role=Role.user,
+            parts=[Part(root=TextPart(kind="text", text=message))]
+        )
+        return MessageSendParams(
+            message=message_obj,
+            stream=stream
+        )
 
-            # 创建错误响应
-            error_response = RunResponse(
-                content=f"回退请求失败: {str(e)}",
-                content_type="str",
-                status=RunStatus.error
-            )
-            setattr(error_response, "event", "RunError")
+    @staticmethod
+    def _stamp_deadline(params: MessageSendParams, deadline: Optional[float]) -> None:
+        """把当前的剩余预算写入消息metadata（每次尝试前更新）"""
+        metadata = deadline_metadata(deadline)
+        if metadata is not None:
+            params.message.metadata = {**(params.message.metadata or {}), DEADLINE_METADATA_KEY: metadata}
+
+    @staticmethod
+    async def _with_deadline(awaitable, deadline: Optional[float]):
+        """等待远程调用，截止时间到达时取消"""
+        if deadline is None:
+            return await awaitable
+        try:
+            return await asyncio.wait_for(awaitable, timeout=remaining(deadline))
+        except asyncio.TimeoutError:
+            raise DeadlineExceededError("请求已超过截止时间，已取消") from None
+
+    async def _until_deadline(self, chunks: AsyncIterator[str], deadline: Optional[float]) -> AsyncGenerator[str, None]:
+        """按本请求的截止时间跟随共享流，超时后退出订阅（共享流本身按发起者的截止时间执行）"""
+        try:
+            while True:
+                try:
+                    chunk = await self._with_deadline(chunks.__anext__(), deadline)
+                except StopAsyncIteration:
+                    return
+                yield chunk
+        finally:
+            await chunks.aclose()
+
+    def _retry_delay(self, attempt: int, error: Exception, deadline: Optional[float]) -> Optional[float]:
+        """下次重试前的等待时间，不应重试或等待后已超过截止时间时返回None"""
+        delay = self.retry_policy.next_delay(attempt, error)
+        left = remaining(deadline)
+        if delay is not None and left is not None and delay >= left:
+            return None
+        return delay
+
+    def _pick_endpoint(self, affinity_key: Optional[str] = None, failed: Sequence[Endpoint] = ()) -> Endpoint:
+        """
+        选择副本，优先避开熔断中的副本和本次请求已失败过的副本
+
+        Args:
+            affinity_key: 会话亲和键，指定时按一致性哈希选择
+            failed: 本次请求已失败过的副本
+        """
+        return self.balancer.pick(
+            allow=lambda endpoint: endpoint not in failed and self._breaker_for(endpoint).is_available(),
+            affinity_key=affinity_key,
+        )
 
-            # 设置run_response属性
-            self.run_response = error_response
+    def _breaker_for(self, endpoint: Endpoint) -> CircuitBreaker:
+        """副本对应的熔断器"""
+        return get_circuit_breaker(endpoint.base_url)
 
-            return error_response
+    def _record_failure(self, error: Exception, endpoint: Endpoint) -> None:
+        """
+        记录最后一次尝试的失败
+
+        Args:
+            error: 最后一次尝试的异常
+            endpoint: 最后一次尝试的副本
+        """
+        # 本地并发限制、熔断拒绝和远程业务错误与卡片无关，无需重置客户端
+        if isinstance(error, A2AAgentError):
+            return
+        tracer.exception("A2AAgent.arun 执行错误: %s", error, base_url=endpoint.base_url)
+
+        # 远程服务已轮换卡片（例如迁移了RPC地址）时，下次调用重新获取；超时、5xx等临时故障不影响卡片
+        if is_card_error(error):
+            self.card_cache.invalidate(endpoint.base_url)
+            self._clients.pop((endpoint.base_url, asyncio.get_running_loop()), None)
+
+    def _error_response(self, error: Exception) -> RunResponse:
+        """
+        构造错误响应
+
+        Args:
+            error: 最后一次尝试的异常
+
+        Returns:
+            RunResponse: 错误响应
+        """
+        # 创建错误响应
+        error_response = RunResponse(
+            content=f"执行错误: {str(error)}",
+            content_type="str",
+            status=RunStatus.error
+        )
+        setattr(error_response, "event", "RunError")
+
+        # 设置run_response属性
+        self.run_response = error_response
+
+        return error_response
 
     def _extract_content_from_response(self, response):
         """从A2A响应中提取内容"""
         content = ""
 
         # 调试输出
-        print(f"DEBUG A2AAgent 提取响应内容: 响应类型={type(response).__name__}")
+        tracer.debug("A2AAgent 提取响应内容: 响应类型=%s", type(response).__name__)
 
         # 如果response是TextPart类型
         if hasattr(response, "kind") and hasattr(response, "text") and getattr(response, "kind") == "text":
             content = response.text
-            print(f"DEBUG A2AAgent 提取响应内容: 从TextPart.text直接提取: '{content}'")
+            tracer.debug("A2AAgent 提取响应内容: 从TextPart.text直接提取: '%s'", content)
             return content
 
         # 如果response是SendMessageSuccessResponse或其他包含root属性的对象
         if hasattr(response, "root"):
-            print(f"DEBUG A2AAgent 提取响应内容: 从response.root提取, 类型={type(response.root).__name__}")
+            tracer.debug("A2AAgent 提取响应内容: 从response.root提取, 类型=%s", type(response.root).__name__)
 
             # 如果root有result属性
             if hasattr(response.root, "result"):
                 result = response.root.result
-                print(f"DEBUG A2AAgent 提取响应内容: 从root.result提取, 类型={type(result).__name__}")
+                tracer.debug("A2AAgent 提取响应内容: 从root.result提取, 类型=%s", type(result).__name__)
 
                 # 如果result是Message并有parts属性
                 if hasattr(result, "parts") and result.parts:
-                    print(f"DEBUG A2AAgent 提取响应内容: 找到parts, 数量={len(result.parts)}")
+                    tracer.debug("A2AAgent 提取响应内容: 找到parts, 数量=%s", len(result.parts))
                     for i, part in enumerate(result.parts):
-                        print(f"DEBUG A2AAgent 提取响应内容: part[{i}]类型={type(part).__name__}")
+                        tracer.debug("A2AAgent 提取响应内容: part[%s]类型=%s", i, type(part).__name__)
 
                         # 从Part.root中提取文本
                         if hasattr(part, "root") and part.root:
                             if hasattr(part.root, "text"):
                                 content += part.root.text
-                                print(f"DEBUG A2AAgent 提取响应内容: 从part.root.text提取: '{part.root.text}'")
+                                tracer.debug("A2AAgent 提取响应内容: 从part.root.text提取: '%s'", part.root.text)
                         # 从Part中直接提取文本
                         elif hasattr(part, "text"):
                             content += part.text
-                            print(f"DEBUG A2AAgent 提取响应内容: 从part.text提取: '{part.text}'")
+                            tracer.debug("A2AAgent 提取响应内容: 从part.text提取: '%s'", part.text)
 
         # 如果response直接有result属性
         elif hasattr(response, "result"):
             result = response.result
-            print(f"DEBUG A2AAgent 提取响应内容: 从response.result提取, 类型={type(result).__name__}")
+            tracer.debug("A2AAgent 提取响应内容: 从response.result提取, 类型=%s", type(result).__name__)
 
             # 如果result是Message并有parts属性
             if hasattr(result, "parts") and result.parts:
-                print(f"DEBUG A2AAgent 提取响应内容: 找到parts, 数量={len(result.parts)}")
+                tracer.debug("A2AAgent 提取响应内容: 找到parts, 数量=%s", len(result.parts))
                 for i, part in enumerate(result.parts):
-                    print(f"DEBUG A2AAgent 提取响应内容: part[{i}]类型={type(part).__name__}")
+                    tracer.debug("A2AAgent 提取响应内容: part[%s]类型=%s", i, type(part).__name__)
 
                     # 从Part.root中提取文本
                     if hasattr(part, "root") and part.root:
                         if hasattr(part.root, "text"):
                             content += part.root.text
-                            print(f"DEBUG A2AAgent 提取响应内容: 从part.root.text提取: '{part.root.text}'")
+                            tracer.debug("A2AAgent 提取响应内容: 从part.root.text提取: '%s'", part.root.text)
                     # 从Part中直接提取文本
                     elif hasattr(part, "text"):
                         content += part.text
-                        print(f"DEBUG A2AAgent 提取响应内容: 从part.text提取: '{part.text}'")
+                        tracer.debug("A2AAgent 提取响应内容: 从part.text提取: '%s'", part.text)
 
         # 如果没有提取到内容，尝试直接访问content属性
         if not content and hasattr(response, "content"):
             content = response.content
-            print(f"DEBUG A2AAgent 提取响应内容: 从response.content提取: '{content}'")
+            tracer.debug("A2AAgent 提取响应内容: 从response.content提取: '%s'", content)
 
         # 如果仍然没有内容，记录警告
         if not content:
-            print(f"警告: 无法从响应中提取内容: {response}")
+            tracer.warning("无法从响应中提取内容: %s", response)
             return "无响应内容"
 
-        print(f"DEBUG A2AAgent 提取响应内容: 最终内容='{content}'")
+        tracer.debug("A2AAgent 提取响应内容: 最终内容='%s'", content)
         return content
 
     def _handle_nonstream_response(self, response):
         """处理非流式响应"""
 
-        # 提取内容
-        content = self._extract_content_from_response(response)
+        # 远程以任务返回结果时按任务状态解析：执行失败（failed/rejected）转换为错误响应，不当作成功的回复
+        result = getattr(getattr(response, "root", response), "result", None)
+        if isinstance(result, Task):
+            try:
+                content = StreamState().consume(result)
+            except A2ARemoteError as e:
+                tracer.warning("A2AAgent 远程任务执行失败: %s", e, task_id=result.id)
+                return self._error_response(e)
+        else:
+            # 提取内容
+            content = self._extract_content_from_response(response)
 
         # 确保内容不为空
         if not content or content == "无响应内容":
-            content = "远程服务返回空响应"
+            content = EMPTY_RESPONSE_CONTENT
 
         # 创建响应对象
         run_response = RunResponse(
@@ -384,123 +970,248 @@ class A2AAgent(Agent):
 
         return run_response
 
+    def _completed_response(self, content: str) -> RunResponse:
+        """用缓存的回复构造完成响应"""
+        run_response = RunResponse(
+            content=content,
+            content_type="str",
+            status=RunStatus.completed
+        )
+        setattr(run_response, "event", "RunCompleted")
+        self.run_response = run_response
+        return run_response
+
+    async def _cache_get(self, key: str) -> Optional[str]:
+        """读取响应缓存，缓存后端出错时按未命中处理"""
+        try:
+            return await self.response_cache.aget(key)
+        except Exception as e:
+            tracer.warning("A2AAgent 读取响应缓存失败，按未命中处理: %s", e, key=key)
+            return None
+
+    async def _cache_set(self, key: str, content: str) -> None:
+        """写入响应缓存，缓存后端出错时只记录警告"""
+        try:
+            await self.response_cache.aset(key, content, ttl=self.cache_ttl)
+        except Exception as e:
+            tracer.warning("A2AAgent 写入响应缓存失败: %s", e, key=key)
+
+    @staticmethod
+    async def _replay_cached(content: str) -> AsyncGenerator[str, None]:
+        """把缓存的完整回复作为单个数据块重放"""
+        yield content
+
+    async def _stream_deltas(
+            self,
+            request: SendStreamingMessageRequest,
+            affinity_key: Optional[str] = None,
+            deadline: Optional[float] = None
+    ) -> AsyncGenerator[str, None]:
+        """
+        发送流式请求，逐块产出新增文本
+
+        每个数据块只做一次增量提取，整体开销与响应长度成线性关系。
+        收到首个数据块之前的可重试错误会换副本重试；之后的错误直接抛出，避免重复输出。
+        等待首个数据块和相邻数据块分别受first_token_timeout和chunk_timeout限制，并且都不超过截止时间。
+
+        Args:
+            request: 流式请求
+            affinity_key: 会话亲和键（可选）
+            deadline: 截止时间（time.monotonic()时钟，可选）
+
+        Yields:
+            str: 本次新增的文本
+
+        Raises:
+            Exception: 最后一次尝试的异常（已记录失败）
+        """
+        self.retry_policy.on_request()
+        attempt = 1
+        failed: List[Endpoint] = []
+        while True:
+            check_deadline(deadline)
+            endpoint = self._pick_endpoint(affinity_key, failed)
+            state = StreamState()
+            received = False
+            try:
+                with track_client_call(endpoint.base_url, "message/stream") as timer, \
+                        self._breaker_for(endpoint).guard():
+                    client = await self._ensure_client(endpoint)
+                    # 整个流期间占用一个并发名额，以首块延迟作为延迟信号
+                    async with self._limiter_for(endpoint).slot() as slot:
+                        with self.balancer.track(endpoint) as call:
+                            self._stamp_deadline(request.params, deadline)
+                            chunks = client.send_message_streaming(request, http_kwargs=self._stream_http_kwargs())
+                            # 处理流中的每个响应
+                            async for chunk in self._timed_chunks(chunks, deadline):
+                                received = True
+                                slot.mark_first_byte()
+                                call.mark_first_byte()
+                                timer.mark_first_byte()
+                                delta = state.consume(chunk)
+                                if delta:
+                                    yield delta
+                return
+            except BaseException as e:
+                # 调用方取消、超时或提前关闭流时，远程任务可能仍在执行
+                if state.task_id and not state.finished:
+                    self._cancel_remote_later(endpoint, state.task_id)
+                if not isinstance(e, Exception):
+                    raise
+                delay = None if received else self._retry_delay(attempt, e, deadline)
+                if delay is None:
+                    tracer.debug("流式请求失败，不再重试: %s", e)
+                    self._record_failure(e, endpoint)
+                    raise
+                tracer.warning("A2AAgent 第 %s 次流式请求失败，%.2f 秒后重试: %s", attempt, delay, e)
+                failed.append(endpoint)
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    async def _timed_chunks(self, chunks: AsyncGenerator, deadline: Optional[float]) -> AsyncGenerator:
+        """
+        逐个等待流式数据块，等待时间超过首块/块间超时或截止时间时关闭流
+
+        Raises:
+            A2AStreamTimeoutError: 等待首个数据块或相邻数据块超时
+            DeadlineExceededError: 超过截止时间
+        """
+        first = True
+        try:
+            while True:
+                limit = self.first_token_timeout if first else self.chunk_timeout
+                wait = bounded_timeout(limit, deadline)
+                try:
+                    if wait is None:
+                        chunk = await chunks.__anext__()
+                    else:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), timeout=wait)
+                except StopAsyncIteration:
+                    return
+                except asyncio.TimeoutError:
+                    if limit is not None and wait == limit:
+                        stage = "首个数据块" if first else "下一个数据块"
+                        raise A2AStreamTimeoutError(f"等待{stage}超时（{limit} 秒）") from None
+                    raise DeadlineExceededError("流式请求已超过截止时间，已取消") from None
+                first = False
+                yield chunk
+        finally:
+            await chunks.aclose()
+
     async def _handle_stream_response(
             self,
-            response_stream: AsyncIterator,
-            request_id: str
+            deltas: AsyncIterator[str],
+            cache_key: Optional[str] = None
     ) -> AsyncGenerator[RunResponse, None]:
         """
-        处理流式响应
-        
+        把新增文本流转换为响应流
+
+        内容追加到列表缓冲区，流式过程中复用同一个RunResponse对象：
+            - delta模式：content为本次新增的文本
+            - accumulated模式：content为截至目前的完整文本
+
         Args:
-            response_stream: 响应流
-            request_id: 请求ID
-            
+            deltas: 新增文本流（直接请求、合并后的共享流或缓存重放）
+            cache_key: 响应缓存键，流正常完成后把完整回复写入缓存
+
         Yields:
             RunResponse: 运行响应
         """
+        running_response = RunResponse(
+            content="",
+            content_type="str",
+            status=RunStatus.running
+        )
+        setattr(running_response, "event", "RunResponse")
 
+        buffer = ContentBuffer()
         try:
-            # 跟踪当前的响应内容
-            current_content = ""
-            chunk_count = 0
-
-            # 处理流中的每个响应
-            async for chunk in response_stream:
-                chunk_count += 1
-                # 调试输出
-                print(f"DEBUG A2AAgent 收到流式响应 #{chunk_count}: {chunk}")
-
-                # 从响应中提取内容
-                content = ""
-
-                # 如果chunk有root属性（SendStreamingMessageSuccessResponse）
-                if hasattr(chunk, "root"):
-                    # 如果root有result属性
-                    if hasattr(chunk.root, "result"):
-                        result = chunk.root.result
-                        # 如果result有parts属性
-                        if hasattr(result, "parts") and result.parts:
-                            for part in result.parts:
-                                # 从Part.root中提取文本
-                                if hasattr(part, "root") and hasattr(part.root, "text"):
-                                    content += part.root.text
-                                # 从Part中直接提取文本
-                                elif hasattr(part, "text"):
-                                    content += part.text
-
-                # 如果chunk直接有result属性
-                elif hasattr(chunk, "result"):
-                    result = chunk.result
-                    # 如果result有parts属性
-                    if hasattr(result, "parts") and result.parts:
-                        for part in result.parts:
-                            # 从Part.root中提取文本
-                            if hasattr(part, "root") and hasattr(part.root, "text"):
-                                content += part.root.text
-                            # 从Part中直接提取文本
-                            elif hasattr(part, "text"):
-                                content += part.text
-
-                # 如果是字典（我们的手动处理方式）
-                elif isinstance(chunk, dict):
-                    content = chunk.get("content", "")
-
-                # 更新当前内容
-                if content:
-                    current_content = content
-                    print(f"DEBUG A2AAgent 提取流式内容: '{content}'")
-
-                # 只在有内容时yield响应，避免重复
-                if content:
-                    # 创建运行中的响应
-                    running_response = RunResponse(
-                        content=current_content,
-                        content_type="str",
-                        status=RunStatus.running
-                    )
-                    setattr(running_response, "event", "RunResponse")
-                    yield running_response
-
-            # 发送最终完成响应（只有在有内容时才发送）
-            if current_content:
-                final_response = RunResponse(
-                    content=current_content,
-                    content_type="str",
-                    status=RunStatus.completed
-                )
-                setattr(final_response, "event", "RunCompleted")
-                yield final_response
-            else:
-                # 如果没有内容，发送错误响应
-                error_response = RunResponse(
-                    content="无响应内容",
-                    content_type="str",
-                    status=RunStatus.error
-                )
-                setattr(error_response, "event", "RunError")
-                yield error_response
-
+            async for delta in deltas:
+                buffer.append(delta)
+                if self.stream_mode == "accumulated":
+                    # 先释放响应对象对旧文本的引用：调用方没有保留上一块的content时，
+                    # 字符串原地扩展，每块只复制新增部分，整体开销保持线性
+                    text = running_response.content
+                    running_response.content = None
+                    text += delta
+                    running_response.content = text
+                else:
+                    running_response.content = delta
+                yield running_response
         except Exception as e:
             # 发生错误时，发送错误响应
-            print(f"处理流式响应时出错: {str(e)}")
-            traceback.print_exc()
-
-            error_response = RunResponse(
-                content=f"处理响应时出错: {str(e)}",
+            error_response = self._error_response(e)
+            error_response.content = f"处理响应时出错: {str(e)}"
+            yield error_response
+            return
+        finally:
+            aclose = getattr(deltas, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+        # 发送最终完成响应（只有在有内容时才发送）
+        if buffer:
+            final_response = RunResponse(
+                content=buffer.text(),
+                content_type="str",
+                status=RunStatus.completed
+            )
+            setattr(final_response, "event", "RunCompleted")
+            if cache_key is not None and self.response_cache is not None:
+                await self._cache_set(cache_key, final_response.content)
+        else:
+            # 如果没有内容，发送错误响应
+            final_response = RunResponse(
+                content="无响应内容",
                 content_type="str",
                 status=RunStatus.error
             )
-            setattr(error_response, "event", "RunError")
-            yield error_response
+            setattr(final_response, "event", "RunError")
+
+        # 流结束后设置run_response属性，这样Team可以正确访问完整结果
+        self.run_response = final_response
+        yield final_response
+
+    def deep_copy(self, *, update: Optional[Dict[str, Any]] = None) -> "A2AAgent":
+        """
+        复制代理用于单次运行（例如Team按请求复制成员）
+
+        远程代理没有需要隔离的模型或记忆：副本与原实例共享负载均衡、并发限制、合并组和缓存，
+        运行状态（run_response等）和会话状态相互独立。副本按需从进程级注册表获取自己的客户端引用，
+        close只释放副本自己获取的引用，不会停止原实例的健康检查。
+
+        Args:
+            update: 需要在副本上覆盖的属性
+
+        Returns:
+            A2AAgent: 新的代理实例
+        """
+        clone = copy.copy(self)
+        clone._clients = {}
+        clone._httpx_clients = {}
+        clone._cancellations = set()
+        clone._owns_balancer = False
+        clone.run_id = None
+        clone.run_input = None
+        clone.run_messages = None
+        clone.run_response = None
+        for name in ("session_state", "team_session_state", "workflow_session_state"):
+            value = getattr(self, name, None)
+            if value is not None:
+                setattr(clone, name, copy.deepcopy(value))
+        for name, value in (update or {}).items():
+            setattr(clone, name, value)
+        return clone
 
     def _generate_session_id(self) -> str:
         """生成会话ID"""
         return f"a2a-agent-{id(self)}"
 
     async def close(self):
-        """关闭客户端连接"""
-        if self._httpx_client:
-            await self._httpx_client.aclose()
-            self._httpx_client = None
-            self._client = None
+        """停止健康检查并释放本实例对共享客户端的引用，最后一个使用者释放时才真正关闭连接"""
+        if self._owns_balancer:
+            await self.balancer.aclose()
+        httpx_clients, self._httpx_clients = self._httpx_clients, {}
+        self._clients = {}
+        for base_url, loop in httpx_clients:
+            await get_client_registry().release(base_url, loop=loop)
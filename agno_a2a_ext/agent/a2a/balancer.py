@@ -0,0 +1,361 @@
+# ai_agent/agent/a2a/balancer.py
+from __future__ import annotations
+
+import asyncio
+import bisect
+import hashlib
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from agno.utils.log import log_debug, log_info, log_warning
+
+from agno_a2a_ext.agent.a2a.card_cache import AGENT_CARD_PATH
+from agno_a2a_ext.agent.a2a.client_pool import get_client_registry, request_base_url
+from agno_a2a_ext.agent.a2a.concurrency import ConcurrencySlot, is_overload_error
+
+
+@dataclass
+class Endpoint:
+    """负载均衡中的一个远程副本"""
+
+    base_url: str
+    outstanding: int = 0
+    ewma_latency: Optional[float] = None
+    consecutive_failures: int = 0
+    ejected: bool = False
+    ejections: int = 0
+    next_probe_at: float = 0.0
+    requests: int = 0
+    failures: int = 0
+
+
+def _ring_hash(value: str) -> int:
+    return int.from_bytes(hashlib.sha1(value.encode("utf-8")).digest()[:8], "big")
+
+
+class ConsistentHashRing:
+    """
+    一致性哈希环
+
+    每个节点在环上放置replicas个虚拟节点，键映射到顺时针方向的第一个节点。
+    节点加入或离开时只有约1/N的键改变归属。
+    """
+
+    def __init__(self, nodes: Optional[List[str]] = None, replicas: int = 100):
+        """
+        初始化哈希环
+
+        Args:
+            nodes: 初始节点
+            replicas: 每个节点的虚拟节点数，越大分布越均匀
+        """
+        self.replicas = replicas
+        self._hashes: List[int] = []
+        self._points: List[Tuple[int, str]] = []
+        self._nodes: List[str] = []
+        for node in nodes or []:
+            self.add(node)
+
+    @property
+    def nodes(self) -> List[str]:
+        return list(self._nodes)
+
+    def add(self, node: str) -> None:
+        """加入节点"""
+        if node in self._nodes:
+            return
+        self._nodes.append(node)
+        for i in range(self.replicas):
+            point = (_ring_hash(f"{node}#{i}"), node)
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._hashes.insert(index, point[0])
+
+    def remove(self, node: str) -> None:
+        """移除节点"""
+        if node not in self._nodes:
+            return
+        self._nodes.remove(node)
+        self._points = [point for point in self._points if point[1] != node]
+        self._hashes = [point[0] for point in self._points]
+
+    def walk(self, key: str) -> Iterator[str]:
+        """按顺时针顺序依次产出键的候选节点（每个节点只出现一次），首个即键的归属节点"""
+        if not self._points:
+            return
+        start = bisect.bisect(self._hashes, _ring_hash(key))
+        seen = set()
+        for offset in range(len(self._points)):
+            node = self._points[(start + offset) % len(self._points)][1]
+            if node not in seen:
+                seen.add(node)
+                yield node
+                if len(seen) == len(self._nodes):
+                    return
+
+
+class LoadBalancer:
+    """
+    A2A远程副本的负载均衡器
+
+    - 每次调用使用二选一（power of two choices）：随机取两个健康副本，
+      选择 (进行中请求数 + 1) * EWMA延迟 较小的一个
+    - 连续failure_threshold次连接失败/超时/5xx的副本会被摘除
+    - 后台健康检查周期性请求被摘除副本的AgentCard，成功后重新加入；
+      探测失败时探测间隔指数退避
+    - 所有副本都被摘除时退化为在全部副本中选择，避免完全不可用
+    - 指定亲和键（会话ID）时按一致性哈希选择副本，同一会话的后续请求落在同一副本上，
+      副本被摘除或不可用时顺延到环上的下一个副本；副本增减时只有约1/N的会话改变归属
+    """
+
+    def __init__(
+            self,
+            base_urls: List[str],
+            ewma_decay: float = 0.3,
+            failure_threshold: int = 3,
+            health_check_interval: float = 10.0,
+            max_probe_interval: float = 300.0,
+            health_check_timeout: float = 5.0,
+            health_check_path: str = AGENT_CARD_PATH,
+            ring_replicas: int = 100,
+    ):
+        """
+        初始化负载均衡器
+
+        Args:
+            base_urls: 远程副本的基础URL列表
+            ewma_decay: EWMA延迟中新样本的权重
+            failure_threshold: 连续失败多少次后摘除副本
+            health_check_interval: 健康检查的基础间隔（秒）
+            max_probe_interval: 探测退避的最大间隔（秒）
+            health_check_timeout: 单次健康检查的超时时间（秒）
+            health_check_path: 健康检查请求的路径
+            ring_replicas: 会话亲和一致性哈希环上每个副本的虚拟节点数
+        """
+        if not base_urls:
+            raise ValueError("base_urls不能为空")
+
+        self.endpoints = [Endpoint(base_url=url) for url in base_urls]
+        self.ewma_decay = ewma_decay
+        self.failure_threshold = failure_threshold
+        self.health_check_interval = health_check_interval
+        self.max_probe_interval = max_probe_interval
+        self.health_check_timeout = health_check_timeout
+        self.health_check_path = "/" + health_check_path.lstrip("/")
+        self.ring = ConsistentHashRing([endpoint.base_url for endpoint in self.endpoints], replicas=ring_replicas)
+
+        self._mutex = threading.Lock()
+        self._health_task: Optional[asyncio.Task] = None
+
+    def pick(
+            self,
+            allow: Optional[Callable[[Endpoint], bool]] = None,
+            affinity_key: Optional[str] = None,
+    ) -> Endpoint:
+        """
+        为一次调用选择副本
+
+        Args:
+            allow: 额外的可用性过滤（例如排除熔断中的副本），没有满足条件的副本时忽略该过滤
+            affinity_key: 亲和键（通常是会话ID），指定时按一致性哈希选择副本
+
+        Returns:
+            Endpoint: 选中的副本
+        """
+        with self._mutex:
+            if affinity_key is not None and len(self.endpoints) > 1:
+                return self._pick_affine(affinity_key, allow)
+
+            candidates = [endpoint for endpoint in self.endpoints if not endpoint.ejected]
+            if not candidates:
+                candidates = self.endpoints
+            if allow is not None:
+                candidates = [endpoint for endpoint in candidates if allow(endpoint)] or candidates
+            if len(candidates) == 1:
+                return candidates[0]
+
+            first, second = random.sample(candidates, 2)
+            default_latency = self._mean_latency()
+            if self._score(first, default_latency) <= self._score(second, default_latency):
+                return first
+            return second
+
+    @contextmanager
+    def track(self, endpoint: Endpoint) -> Iterator[ConcurrencySlot]:
+        """
+        跟踪一次发往副本的调用，退出时记录延迟或失败
+
+        流式调用应在收到首个数据块时调用mark_first_byte()，以首块延迟作为延迟信号。
+        """
+        with self._mutex:
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+        call = ConcurrencySlot()
+        try:
+            yield call
+        except BaseException as e:
+            self._finish(endpoint, None, e)
+            raise
+        else:
+            self._finish(endpoint, call.latency(), None)
+
+    def add_endpoint(self, base_url: str) -> Endpoint:
+        """
+        加入一个副本（例如扩容），已存在时直接返回
+
+        Returns:
+            Endpoint: 该副本
+        """
+        with self._mutex:
+            for endpoint in self.endpoints:
+                if endpoint.base_url == base_url:
+                    return endpoint
+            endpoint = Endpoint(base_url=base_url)
+            self.endpoints.append(endpoint)
+            self.ring.add(base_url)
+            log_info(f"A2A副本加入: {base_url}")
+            return endpoint
+
+    def remove_endpoint(self, base_url: str) -> None:
+        """移除一个副本（例如缩容），进行中的请求不受影响"""
+        with self._mutex:
+            if len(self.endpoints) == 1 and self.endpoints[0].base_url == base_url:
+                raise ValueError("不能移除最后一个副本")
+            self.endpoints = [endpoint for endpoint in self.endpoints if endpoint.base_url != base_url]
+            self.ring.remove(base_url)
+            log_info(f"A2A副本移除: {base_url}")
+
+    def report_failure(self, endpoint: Endpoint, error: BaseException) -> None:
+        """记录一次未经track的失败（例如获取AgentCard失败）"""
+        with self._mutex:
+            self._on_failure(endpoint, error)
+
+    def start_health_checks(self) -> None:
+        """在当前事件循环上启动后台健康检查（单副本时不需要）"""
+        if len(self.endpoints) < 2:
+            return
+        if self._health_task is not None and not self._health_task.done():
+            return
+        self._health_task = asyncio.get_running_loop().create_task(self._health_check_loop())
+
+    async def aclose(self) -> None:
+        """停止后台健康检查"""
+        task, self._health_task = self._health_task, None
+        if task is None or task.done():
+            return
+        if task.get_loop() is not asyncio.get_running_loop():
+            # 健康检查运行在其他事件循环上（例如同步调用的后台循环），只能线程安全地取消
+            task.get_loop().call_soon_threadsafe(task.cancel)
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """
+        获取各副本的状态
+
+        Returns:
+            List[Dict]: 每个副本的进行中请求数、EWMA延迟、摘除状态与计数器
+        """
+        with self._mutex:
+            return [
+                {
+                    "base_url": endpoint.base_url,
+                    "outstanding": endpoint.outstanding,
+                    "ewma_latency": endpoint.ewma_latency,
+                    "ejected": endpoint.ejected,
+                    "consecutive_failures": endpoint.consecutive_failures,
+                    "requests": endpoint.requests,
+                    "failures": endpoint.failures,
+                }
+                for endpoint in self.endpoints
+            ]
+
+    def _finish(self, endpoint: Endpoint, latency: Optional[float], error: Optional[BaseException]) -> None:
+        with self._mutex:
+            endpoint.outstanding -= 1
+            if error is not None:
+                self._on_failure(endpoint, error)
+                return
+            endpoint.consecutive_failures = 0
+            if endpoint.ewma_latency is None:
+                endpoint.ewma_latency = latency
+            else:
+                endpoint.ewma_latency = self.ewma_decay * latency + (1 - self.ewma_decay) * endpoint.ewma_latency
+
+    def _on_failure(self, endpoint: Endpoint, error: BaseException) -> None:
+        """只有连接失败、超时和5xx/429计入摘除判定，远程业务错误不影响副本健康（需持有锁）"""
+        if not is_overload_error(error):
+            return
+        endpoint.failures += 1
+        endpoint.consecutive_failures += 1
+        if not endpoint.ejected and endpoint.consecutive_failures >= self.failure_threshold:
+            endpoint.ejected = True
+            endpoint.ejections = 0
+            endpoint.next_probe_at = time.monotonic() + self.health_check_interval
+            log_warning(f"A2A副本连续失败 {endpoint.consecutive_failures} 次，已摘除: {endpoint.base_url}")
+
+    def _pick_affine(self, affinity_key: str, allow: Optional[Callable[[Endpoint], bool]]) -> Endpoint:
+        """沿哈希环选择第一个健康且可用的副本，都不满足时依次放宽条件（需持有锁）"""
+        by_url = {endpoint.base_url: endpoint for endpoint in self.endpoints}
+        ordered = [by_url[url] for url in self.ring.walk(affinity_key)]
+        for endpoint in ordered:
+            if not endpoint.ejected and (allow is None or allow(endpoint)):
+                return endpoint
+        for endpoint in ordered:
+            if not endpoint.ejected:
+                return endpoint
+        return ordered[0]
+
+    def _mean_latency(self) -> float:
+        """已知副本的平均延迟，作为尚无样本的副本的估计值（需持有锁）"""
+        known = [endpoint.ewma_latency for endpoint in self.endpoints if endpoint.ewma_latency is not None]
+        return sum(known) / len(known) if known else 0.0
+
+    @staticmethod
+    def _score(endpoint: Endpoint, default_latency: float) -> float:
+        latency = endpoint.ewma_latency if endpoint.ewma_latency is not None else default_latency
+        return (endpoint.outstanding + 1) * latency + endpoint.outstanding * 1e-9
+
+    async def _health_check_loop(self) -> None:
+        """后台探测被摘除的副本"""
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            now = time.monotonic()
+            with self._mutex:
+                due = [endpoint for endpoint in self.endpoints if endpoint.ejected and endpoint.next_probe_at <= now]
+            for endpoint in due:
+                healthy = await self._probe(endpoint)
+                with self._mutex:
+                    if healthy:
+                        endpoint.ejected = False
+                        endpoint.consecutive_failures = 0
+                        endpoint.ejections = 0
+                        log_info(f"A2A副本健康检查通过，重新加入: {endpoint.base_url}")
+                    else:
+                        endpoint.ejections += 1
+                        interval = min(self.max_probe_interval, self.health_check_interval * (2 ** endpoint.ejections))
+                        endpoint.next_probe_at = time.monotonic() + interval
+
+    async def _probe(self, endpoint: Endpoint) -> bool:
+        """请求副本的健康检查路径"""
+        registry = get_client_registry()
+        client = await registry.acquire(endpoint.base_url)
+        try:
+            response = await client.get(
+                f"{request_base_url(endpoint.base_url).rstrip('/')}{self.health_check_path}",
+                timeout=self.health_check_timeout,
+            )
+            return response.status_code < 400
+        except Exception as e:
+            log_debug(f"A2A副本健康检查失败: {endpoint.base_url}, 错误: {e}")
+            return False
+        finally:
+            await registry.release(endpoint.base_url)
@@ -0,0 +1,282 @@
+# ai_agent/agent/a2a/card_cache.py
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+from a2a.client.errors import A2AClientHTTPError, A2AClientJSONError
+from a2a.types import AgentCard
+from agno.utils.log import log_debug, log_warning
+from pydantic import ValidationError
+
+from agno_a2a_ext.agent.a2a.client_pool import normalize_base_url, request_base_url
+
+AGENT_CARD_PATH = "/.well-known/agent.json"
+DEFAULT_CARD_TTL = 300.0
+
+
+def is_card_error(error: BaseException) -> bool:
+    """判断异常是否说明缓存的卡片已失效：RPC地址返回404（卡片已轮换、服务已迁移），或卡片无法解析"""
+    if isinstance(error, A2AClientJSONError):
+        return True
+    return isinstance(error, A2AClientHTTPError) and error.status_code == 404
+
+
+@dataclass
+class _CardEntry:
+    """缓存中的一张AgentCard"""
+
+    card: AgentCard
+    etag: Optional[str]
+    last_modified: Optional[str]
+    # 墙钟时间，便于写入磁盘快照后跨进程计算年龄
+    fetched_at: float
+
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class AgentCardCache:
+    """
+    AgentCard缓存，避免每个A2AAgent实例在首条消息前都请求一次/.well-known/agent.json
+
+    - TTL内直接使用缓存
+    - 过期后使用ETag/Last-Modified做条件请求（If-None-Match/If-Modified-Since），
+      远程返回304时只刷新时间戳；远程轮换了卡片则返回200并替换缓存
+    - 远程暂时不可用时，若存在过期缓存则继续使用（stale-if-error）
+    - 可选的磁盘快照，让冷启动的进程在TTL内无需请求卡片；快照只在卡片变化时在线程池中写入，
+      304只刷新内存中的时间戳
+    """
+
+    def __init__(
+            self,
+            ttl: float = DEFAULT_CARD_TTL,
+            snapshot_path: Optional[str] = None,
+            agent_card_path: str = AGENT_CARD_PATH,
+    ):
+        """
+        初始化AgentCard缓存
+
+        Args:
+            ttl: 卡片的有效期（秒），过期后会进行条件请求重新验证
+            snapshot_path: 磁盘快照文件路径（可选），为None时只做内存缓存
+            agent_card_path: 卡片相对于base_url的路径
+        """
+        self.ttl = ttl
+        self.snapshot_path = snapshot_path
+        self.agent_card_path = "/" + agent_card_path.lstrip("/")
+
+        self._entries: Dict[str, _CardEntry] = {}
+        self._mutex = threading.Lock()
+        self._fetch_locks: Dict[Tuple[str, int], asyncio.Lock] = {}
+        # 串行化快照写入，后写入者总是写入最新的内容
+        self._snapshot_lock = threading.Lock()
+
+        if self.snapshot_path:
+            self._load_snapshot()
+
+    async def get(
+            self,
+            httpx_client: httpx.AsyncClient,
+            base_url: str,
+            http_kwargs: Optional[Dict[str, Any]] = None,
+    ) -> AgentCard:
+        """
+        获取base_url对应的AgentCard，必要时请求或重新验证
+
+        Args:
+            httpx_client: 用于请求卡片的httpx客户端
+            base_url: 远程A2A服务的基础URL
+            http_kwargs: 传递给httpx.get的其他参数
+
+        Returns:
+            AgentCard: 远程服务的卡片
+
+        Raises:
+            A2AClientHTTPError: 请求失败且没有可用的缓存
+            A2AClientJSONError: 卡片内容无法解析
+        """
+        key = normalize_base_url(base_url)
+        entry = self._get_entry(key)
+        if entry is not None and entry.age() < self.ttl:
+            return entry.card
+
+        # 同一远程服务的并发请求只发出一次卡片请求
+        async with self._fetch_lock(key):
+            entry = self._get_entry(key)
+            if entry is not None and entry.age() < self.ttl:
+                return entry.card
+            return await self._fetch(httpx_client, base_url, key, entry, http_kwargs)
+
+    def invalidate(self, base_url: Optional[str] = None) -> None:
+        """
+        使缓存失效
+
+        Args:
+            base_url: 要失效的远程服务，为None时清空全部缓存
+        """
+        with self._mutex:
+            if base_url is None:
+                changed = bool(self._entries)
+                self._entries.clear()
+            else:
+                changed = self._entries.pop(normalize_base_url(base_url), None) is not None
+        if changed:
+            self._schedule_snapshot()
+
+    async def _fetch(
+            self,
+            httpx_client: httpx.AsyncClient,
+            base_url: str,
+            key: str,
+            entry: Optional[_CardEntry],
+            http_kwargs: Optional[Dict[str, Any]],
+    ) -> AgentCard:
+        """请求（或条件请求）卡片并更新缓存"""
+        target_url = f"{request_base_url(base_url).rstrip('/')}{self.agent_card_path}"
+        kwargs = dict(http_kwargs or {})
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        try:
+            response = await httpx_client.get(target_url, headers=headers, **kwargs)
+            if response.status_code == 304 and entry is not None:
+                log_debug(f"AgentCard未变化（304），刷新缓存: {key}")
+                entry.fetched_at = time.time()
+                return entry.card
+            response.raise_for_status()
+            card = AgentCard.model_validate(response.json())
+        except httpx.HTTPStatusError as e:
+            if entry is not None:
+                log_warning(f"重新验证AgentCard失败，继续使用过期缓存: {key}, 错误: {e}")
+                return entry.card
+            raise A2AClientHTTPError(
+                e.response.status_code, f"Failed to fetch agent card from {target_url}: {e}"
+            ) from e
+        except httpx.RequestError as e:
+            if entry is not None:
+                log_warning(f"重新验证AgentCard失败，继续使用过期缓存: {key}, 错误: {e}")
+                return entry.card
+            raise A2AClientHTTPError(
+                503, f"Network communication error fetching agent card from {target_url}: {e}"
+            ) from e
+        except (json.JSONDecodeError, ValidationError) as e:
+            raise A2AClientJSONError(f"Failed to parse agent card from {target_url}: {e}") from e
+
+        new_entry = _CardEntry(
+            card=card,
+            etag=response.headers.get("etag"),
+            last_modified=response.headers.get("last-modified"),
+            fetched_at=time.time(),
+        )
+        with self._mutex:
+            previous = self._entries.get(key)
+            self._entries[key] = new_entry
+        changed = previous is None or (previous.card, previous.etag, previous.last_modified) != (
+            new_entry.card, new_entry.etag, new_entry.last_modified)
+        if changed and self.snapshot_path:
+            await asyncio.get_running_loop().run_in_executor(None, self._save_snapshot)
+        log_debug(f"AgentCard已缓存: {key}")
+        return card
+
+    def _get_entry(self, key: str) -> Optional[_CardEntry]:
+        with self._mutex:
+            return self._entries.get(key)
+
+    def _fetch_lock(self, key: str) -> asyncio.Lock:
+        """获取当前事件循环上该远程服务的请求锁"""
+        lock_key = (key, id(asyncio.get_running_loop()))
+        with self._mutex:
+            lock = self._fetch_locks.get(lock_key)
+            if lock is None:
+                lock = self._fetch_locks[lock_key] = asyncio.Lock()
+            return lock
+
+    def _load_snapshot(self) -> None:
+        """从磁盘快照加载卡片"""
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for key, item in data.items():
+                self._entries[key] = _CardEntry(
+                    card=AgentCard.model_validate(item["card"]),
+                    etag=item.get("etag"),
+                    last_modified=item.get("last_modified"),
+                    fetched_at=float(item.get("fetched_at", 0)),
+                )
+            log_debug(f"从快照加载了 {len(self._entries)} 张AgentCard: {self.snapshot_path}")
+        except Exception as e:
+            log_warning(f"读取AgentCard快照失败，忽略: {self.snapshot_path}, 错误: {e}")
+
+    def _schedule_snapshot(self) -> None:
+        """写入磁盘快照，在事件循环中调用时放到线程池中执行"""
+        if not self.snapshot_path:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._save_snapshot()
+            return
+        loop.run_in_executor(None, self._save_snapshot)
+
+    def _save_snapshot(self) -> None:
+        """将卡片写入磁盘快照（先写临时文件再原子替换）"""
+        if not self.snapshot_path:
+            return
+        with self._snapshot_lock:
+            self._write_snapshot()
+
+    def _write_snapshot(self) -> None:
+        with self._mutex:
+            data = {
+                key: {
+                    "card": entry.card.model_dump(mode="json", exclude_none=True),
+                    "etag": entry.etag,
+                    "last_modified": entry.last_modified,
+                    "fetched_at": entry.fetched_at,
+                }
+                for key, entry in self._entries.items()
+            }
+        try:
+            directory = os.path.dirname(os.path.abspath(self.snapshot_path))
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.snapshot_path)
+        except Exception as e:
+            log_warning(f"写入AgentCard快照失败: {self.snapshot_path}, 错误: {e}")
+
+
+_default_cache: Optional[AgentCardCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_card_cache() -> AgentCardCache:
+    """
+    获取进程级默认的AgentCard缓存
+
+    可通过环境变量配置：
+        AGNO_A2A_CARD_TTL: 卡片有效期（秒）
+        AGNO_A2A_CARD_SNAPSHOT: 磁盘快照文件路径
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = AgentCardCache(
+                ttl=float(os.environ.get("AGNO_A2A_CARD_TTL", DEFAULT_CARD_TTL)),
+                snapshot_path=os.environ.get("AGNO_A2A_CARD_SNAPSHOT") or None,
+            )
+        return _default_cache
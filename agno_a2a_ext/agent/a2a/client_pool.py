@@ -0,0 +1,389 @@
+# ai_agent/agent/a2a/client_pool.py
+from __future__ import annotations
+
+import asyncio
+import atexit
+import os
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Coroutine, Dict, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+import httpx
+from agno.utils.log import log_debug
+
+from agno_a2a_ext.agent.a2a.wire import WIRE_FORMATS, WireFormatClient
+
+# 默认连接池参数：足以支撑几十个Team成员共享同一个远程服务
+DEFAULT_LIMITS = httpx.Limits(
+    max_connections=100,
+    max_keepalive_connections=20,
+    keepalive_expiry=30.0,
+)
+DEFAULT_TIMEOUT = 60.0
+
+# 通过unix domain socket访问的服务的base_url前缀，例如 unix:///run/agents/search.sock
+UNIX_SCHEME = "unix://"
+# 经unix socket发送的请求使用的HTTP地址（主机名只用于Host请求头，连接由socket路径决定）
+UNIX_HTTP_BASE_URL = "http://localhost"
+
+
+def unix_socket_path(base_url: str) -> Optional[str]:
+    """
+    获取unix://形式的base_url指向的socket路径
+
+    Args:
+        base_url: 远程A2A服务的基础URL
+
+    Returns:
+        Optional[str]: socket文件路径，不是unix://地址时返回None
+    """
+    base_url = base_url.strip()
+    if not base_url.lower().startswith(UNIX_SCHEME):
+        return None
+    return unquote(base_url[len(UNIX_SCHEME):]).rstrip("/") or None
+
+
+def request_base_url(base_url: str) -> str:
+    """
+    拼接请求URL时使用的基础地址：unix://地址替换为UNIX_HTTP_BASE_URL，其他地址原样返回
+    """
+    return UNIX_HTTP_BASE_URL if unix_socket_path(base_url) else base_url
+
+
+def normalize_base_url(base_url: str) -> str:
+    """
+    将base_url规范化为连接池的键（scheme://netloc）
+
+    连接池按源（origin）复用连接，因此路径和末尾的斜杠不影响共享；
+    unix://地址按socket路径区分（路径区分大小写）
+    """
+    socket_path = unix_socket_path(base_url)
+    if socket_path:
+        return f"{UNIX_SCHEME}{socket_path}"
+    parts = urlsplit(base_url.strip())
+    if not parts.scheme or not parts.netloc:
+        return base_url.strip().rstrip("/").lower()
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+
+@dataclass
+class _PooledClient:
+    """注册表中的一个共享客户端条目"""
+
+    client: httpx.AsyncClient
+    loop: asyncio.AbstractEventLoop
+    http2: bool
+    refcount: int = 0
+
+
+@dataclass
+class _EndpointConfig:
+    """某个远程端点的连接池配置"""
+
+    limits: httpx.Limits = field(default_factory=lambda: DEFAULT_LIMITS)
+    http2: bool = False
+    timeout: float = DEFAULT_TIMEOUT
+    wire_format: str = "json"
+
+
+class A2AClientRegistry:
+    """
+    进程级的httpx客户端注册表，按base_url共享连接池
+
+    base_url可以是unix://<socket路径>：同一主机上的服务通过unix domain socket访问，
+    省去回环TCP的协议栈开销，连接池、保活与限制参数与TCP相同。
+
+    多个A2AAgent实例（以及引用它们的多个Team）指向同一个远程服务时，
+    会复用同一个httpx.AsyncClient及其保活连接，避免重复的TCP/TLS握手。
+    客户端采用引用计数管理：最后一个使用者release之后才真正关闭。
+
+    httpx.AsyncClient绑定在创建它的事件循环上，因此条目按(base_url, 事件循环)区分。
+
+    注册表还持有一个长期运行的后台事件循环线程，供同步调用方（A2AAgent.run等）提交协程，
+    同步调用之间连接保持热态，而不是每次调用都新建事件循环、重建客户端。
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls, *args, **kwargs):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super(A2AClientRegistry, cls).__new__(cls)
+                cls._instance._initialized = False
+            return cls._instance
+
+    def __init__(self):
+        """初始化注册表，只在第一次创建实例时执行"""
+        if self._initialized:
+            return
+
+        self._clients: Dict[Tuple[str, int], _PooledClient] = {}
+        self._configs: Dict[str, _EndpointConfig] = {}
+        self._mutex = threading.Lock()
+
+        self._background_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._background_thread: Optional[threading.Thread] = None
+
+        self._initialized = True
+
+    def configure(
+            self,
+            base_url: str,
+            limits: Optional[httpx.Limits] = None,
+            http2: Optional[bool] = None,
+            timeout: Optional[float] = None,
+            wire_format: Optional[str] = None,
+    ) -> None:
+        """
+        设置某个远程端点的连接池参数
+
+        只影响之后新建的客户端；已经存在的共享客户端保持原有配置。
+
+        Args:
+            base_url: 远程A2A服务的基础URL
+            limits: 连接数与保活限制
+            http2: 是否启用HTTP/2（需要安装h2）
+            timeout: 客户端默认超时时间（秒）
+            wire_format: 响应编码，"json"或"msgpack"（需要安装msgpack，对方不支持时自动使用JSON）
+        """
+        key = normalize_base_url(base_url)
+        with self._mutex:
+            config = self._configs.setdefault(key, _EndpointConfig())
+            if limits is not None:
+                config.limits = limits
+            if http2 is not None:
+                config.http2 = http2
+            if timeout is not None:
+                config.timeout = timeout
+            if wire_format is not None:
+                config.wire_format = wire_format
+
+    async def acquire(
+            self,
+            base_url: str,
+            limits: Optional[httpx.Limits] = None,
+            http2: Optional[bool] = None,
+            timeout: Optional[float] = None,
+            wire_format: Optional[str] = None,
+    ) -> httpx.AsyncClient:
+        """
+        获取（必要时创建）指向base_url的共享客户端，并增加引用计数
+
+        Args:
+            base_url: 远程A2A服务的基础URL
+            limits: 首次创建客户端时使用的连接数与保活限制
+            http2: 首次创建客户端时是否启用HTTP/2
+            timeout: 首次创建客户端时的默认超时时间（秒）
+            wire_format: 首次创建客户端时使用的响应编码
+
+        Returns:
+            httpx.AsyncClient: 共享的异步HTTP客户端
+        """
+        loop = asyncio.get_running_loop()
+        key = normalize_base_url(base_url)
+
+        with self._mutex:
+            self._prune_closed_loops()
+
+            entry = self._clients.get((key, id(loop)))
+            if entry is None or entry.client.is_closed:
+                config = self._configs.get(key) or _EndpointConfig()
+                use_http2 = config.http2 if http2 is None else http2
+                entry = _PooledClient(
+                    client=self._create_client(
+                        limits=limits or config.limits,
+                        http2=use_http2,
+                        timeout=config.timeout if timeout is None else timeout,
+                        uds=unix_socket_path(key),
+                        wire_format=config.wire_format if wire_format is None else wire_format,
+                    ),
+                    loop=loop,
+                    http2=use_http2,
+                )
+                self._clients[(key, id(loop))] = entry
+                log_debug(f"创建共享A2A客户端: {key}, http2={use_http2}")
+            entry.refcount += 1
+            return entry.client
+
+    async def release(self, base_url: str, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """
+        释放对共享客户端的一次引用，引用计数归零时关闭客户端
+
+        Args:
+            base_url: 远程A2A服务的基础URL
+            loop: 客户端所在的事件循环，默认为当前事件循环
+        """
+        running_loop = asyncio.get_running_loop()
+        loop = loop or running_loop
+        key = normalize_base_url(base_url)
+
+        with self._mutex:
+            entry = self._clients.get((key, id(loop)))
+            if entry is None:
+                return
+            entry.refcount -= 1
+            if entry.refcount > 0:
+                return
+            del self._clients[(key, id(loop))]
+
+        if loop is running_loop:
+            await entry.client.aclose()
+        elif not loop.is_closed():
+            # 客户端只能在自己的事件循环上关闭
+            asyncio.run_coroutine_threadsafe(entry.client.aclose(), loop)
+        log_debug(f"关闭共享A2A客户端: {key}")
+
+    async def aclose_all(self) -> None:
+        """关闭当前事件循环上的所有共享客户端（通常在进程退出前调用）"""
+        await self._aclose_loop_clients(asyncio.get_running_loop())
+
+    def get_background_loop(self) -> asyncio.AbstractEventLoop:
+        """
+        获取（必要时启动）后台事件循环
+
+        Returns:
+            asyncio.AbstractEventLoop: 在守护线程中持续运行的事件循环
+        """
+        with self._mutex:
+            if self._background_loop is None or self._background_loop.is_closed():
+                loop = asyncio.new_event_loop()
+                started = threading.Event()
+
+                def run_loop():
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(started.set)
+                    loop.run_forever()
+
+                thread = threading.Thread(target=run_loop, name="a2a-client-loop", daemon=True)
+                thread.start()
+                started.wait()
+                self._background_loop = loop
+                self._background_thread = thread
+                log_debug("启动A2A客户端后台事件循环")
+            return self._background_loop
+
+    def submit(self, coro: Coroutine[Any, Any, Any]) -> Future:
+        """
+        把协程提交到后台事件循环执行
+
+        Args:
+            coro: 要执行的协程
+
+        Returns:
+            concurrent.futures.Future: 协程的结果
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.get_background_loop())
+
+    def run_sync(self, coro: Coroutine[Any, Any, Any], timeout: Optional[float] = None) -> Any:
+        """
+        在后台事件循环上执行协程并阻塞等待结果
+
+        Args:
+            coro: 要执行的协程
+            timeout: 最长等待时间（秒），为None时一直等待
+
+        Returns:
+            Any: 协程的返回值
+
+        Raises:
+            RuntimeError: 在后台事件循环线程内调用（会造成死锁）
+        """
+        if self._background_thread is not None and threading.current_thread() is self._background_thread:
+            coro.close()
+            raise RuntimeError("不能在A2A客户端后台事件循环内同步等待，请直接await对应的异步方法")
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def shutdown_background_loop(self, timeout: float = 5.0) -> None:
+        """关闭后台事件循环上的共享客户端并停止该循环（进程退出时自动调用）"""
+        with self._mutex:
+            loop, thread = self._background_loop, self._background_thread
+            self._background_loop = None
+            self._background_thread = None
+        if loop is None or loop.is_closed():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._aclose_loop_clients(loop), loop).result(timeout)
+        except Exception as e:
+            log_debug(f"关闭后台事件循环上的客户端失败: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout)
+        if not loop.is_running():
+            loop.close()
+
+    async def _aclose_loop_clients(self, loop: asyncio.AbstractEventLoop) -> None:
+        with self._mutex:
+            entries = [(key, entry) for key, entry in self._clients.items() if entry.loop is loop]
+            for key, _ in entries:
+                del self._clients[key]
+        for _, entry in entries:
+            await entry.client.aclose()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        获取连接池使用情况
+
+        Returns:
+            Dict: base_url -> {"clients": 客户端数量, "refcount": 引用总数}
+        """
+        result: Dict[str, Dict[str, int]] = {}
+        with self._mutex:
+            for (key, _), entry in self._clients.items():
+                item = result.setdefault(key, {"clients": 0, "refcount": 0})
+                item["clients"] += 1
+                item["refcount"] += entry.refcount
+        return result
+
+    def _prune_closed_loops(self) -> None:
+        """丢弃绑定在已关闭事件循环上的客户端（这些客户端已无法再使用）"""
+        stale = [key for key, entry in self._clients.items() if entry.loop.is_closed()]
+        for key in stale:
+            del self._clients[key]
+
+    @staticmethod
+    def _create_client(limits: httpx.Limits, http2: bool, timeout: float,
+                       uds: Optional[str] = None, wire_format: str = "json") -> httpx.AsyncClient:
+        """创建新的httpx.AsyncClient（指定uds时连接到该unix socket，wire_format为msgpack时以msgpack接收响应）"""
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                raise ImportError("`h2` not installed. Please install it using `pip install httpx[http2]`")
+        if wire_format not in WIRE_FORMATS:
+            raise ValueError(f"不支持的wire_format: {wire_format}，可选值: {', '.join(WIRE_FORMATS)}")
+        client_class = WireFormatClient if wire_format == "msgpack" else httpx.AsyncClient
+        if uds:
+            # 同一主机上带宽不是瓶颈，不请求压缩，省去两端的压缩开销
+            transport = httpx.AsyncHTTPTransport(uds=uds, limits=limits, http2=http2)
+            return client_class(transport=transport, timeout=timeout, headers={"Accept-Encoding": "identity"})
+        return client_class(limits=limits, http2=http2, timeout=timeout)
+
+
+def get_client_registry() -> A2AClientRegistry:
+    """获取进程级的A2A客户端注册表"""
+    return A2AClientRegistry()
+
+
+@atexit.register
+def _shutdown_background_loop() -> None:
+    if A2AClientRegistry._instance is not None:
+        A2AClientRegistry._instance.shutdown_background_loop()
+
+
+def _reset_after_fork() -> None:
+    # fork出的子进程（例如多进程服务的工作进程）不继承后台线程，父进程的连接也不能跨进程使用，
+    # 子进程从一个空的注册表开始
+    A2AClientRegistry._instance = None
+    A2AClientRegistry._lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,363 @@
+# ai_agent/agent/a2a/concurrency.py
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+import httpx
+from a2a.client.errors import A2AClientHTTPError, A2AClientTimeoutError
+from agno.utils.log import log_debug, log_warning
+
+from agno_a2a_ext.agent.a2a.client_pool import normalize_base_url
+from agno_a2a_ext.agent.a2a.errors import A2AConcurrencyLimitError, A2AStreamTimeoutError
+from agno_a2a_ext.observability.metrics import (
+    CLIENT_CONCURRENCY_LIMIT,
+    CLIENT_IN_FLIGHT,
+    CLIENT_QUEUE_DEPTH,
+    get_registry,
+)
+
+# 表示远程服务过载的HTTP状态码
+OVERLOAD_STATUS_CODES = {429, 502, 503, 504}
+
+# 请求结束时对限制器的反馈
+OUTCOME_SUCCESS = "success"
+OUTCOME_OVERLOAD = "overload"
+OUTCOME_IGNORE = "ignore"
+
+# 延迟与并发数的滑动统计的平滑系数（约最近1/α个请求）
+_STATS_ALPHA = 0.05
+# 积累足够的样本后才根据延迟下调限制
+_WARMUP_SAMPLES = 20
+# 延迟与并发数的相关系数超过该值时，才认为延迟是随并发升高的（而不是远程服务本身的波动）
+_MIN_CORRELATION = 0.5
+
+
+def is_overload_error(error: BaseException) -> bool:
+    """判断异常是否意味着远程服务过载（超时、首块/块间超时、连接失败、429/5xx网关错误）"""
+    if isinstance(error, (A2AClientTimeoutError, A2AStreamTimeoutError, httpx.TimeoutException, httpx.ConnectError)):
+        return True
+    if isinstance(error, A2AClientHTTPError):
+        return error.status_code in OVERLOAD_STATUS_CODES
+    return False
+
+
+class ConcurrencySlot:
+    """限制器中的一个并发名额，记录请求的耗时"""
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.first_byte_at: Optional[float] = None
+
+    def mark_first_byte(self) -> None:
+        """标记收到首个数据块，流式请求以首块延迟作为延迟信号"""
+        if self.first_byte_at is None:
+            self.first_byte_at = time.monotonic()
+
+    def latency(self) -> float:
+        end = self.first_byte_at if self.first_byte_at is not None else time.monotonic()
+        return end - self.started_at
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    按远程服务自适应调整的并发限制器（AIMD）
+
+    - 限制被用到（进行中请求数达到限制的一半）且延迟正常时，限制加法增长（每个往返约+1）
+    - 延迟随并发升高时限制乘法下降：对最近请求的(发出时的并发数, 延迟)做滑动线性回归，
+      两者明显相关，并且按回归估计当前并发下的延迟超过单并发延迟的latency_tolerance倍时视为过载
+      （类似TCP Vegas/Gradient的排队判断）。与并发无关的延迟波动（LLM的常态）相关性很低，不会触发下降
+    - 出现超时/429/5xx时限制乘法下降
+    - 超出限制的请求进入有界等待队列，队列已满或等待超时抛出A2AConcurrencyLimitError
+
+    限制器是线程安全的，可以被不同事件循环上的A2AAgent共享。
+    """
+
+    def __init__(
+            self,
+            name: Optional[str] = None,
+            initial_limit: int = 20,
+            min_limit: int = 1,
+            max_limit: int = 200,
+            max_queue: int = 1000,
+            queue_timeout: float = 30.0,
+            latency_tolerance: float = 2.0,
+            backoff_ratio: float = 0.9,
+    ):
+        """
+        初始化并发限制器
+
+        Args:
+            name: 限制器名称（通常是远程服务的base_url），用于日志和错误信息
+            initial_limit: 初始并发限制
+            min_limit: 并发限制下限
+            max_limit: 并发限制上限
+            max_queue: 等待队列的最大长度
+            queue_timeout: 在队列中等待的最长时间（秒）
+            latency_tolerance: 当前并发下的估计延迟超过单并发估计延迟的倍数时视为过载
+            backoff_ratio: 过载时限制的乘法下降系数
+        """
+        self.name = name
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.latency_tolerance = latency_tolerance
+        self.backoff_ratio = backoff_ratio
+
+        self._limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self._in_flight = 0
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+        self._mutex = threading.Lock()
+
+        # 单并发下的估计延迟（基线）与平滑延迟
+        self._baseline: Optional[float] = None
+        self._smoothed: Optional[float] = None
+        # 并发数x与延迟y的滑动矩：E[x]、E[y]、E[x²]、E[y²]、E[xy]
+        self._moments: Optional[List[float]] = None
+        self._min_latency = 0.0
+        self._samples = 0
+        self._last_decrease = 0.0
+
+        self._completed = 0
+        self._overloaded = 0
+        self._rejected = 0
+        self._timed_out = 0
+
+    @property
+    def limit(self) -> int:
+        """当前并发限制"""
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        """正在进行的请求数"""
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """等待队列长度"""
+        return len(self._waiters)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[ConcurrencySlot]:
+        """
+        获取一个并发名额，退出时根据耗时和异常调整限制
+
+        Raises:
+            A2AConcurrencyLimitError: 队列已满或排队超时
+        """
+        await self.acquire()
+        # 发出请求时的并发数（包括本请求），与延迟一起判断是否过载
+        concurrency = self._in_flight
+        slot = ConcurrencySlot()
+        outcome = OUTCOME_SUCCESS
+        try:
+            yield slot
+        except BaseException as e:
+            outcome = OUTCOME_OVERLOAD if is_overload_error(e) else OUTCOME_IGNORE
+            raise
+        finally:
+            self.release(slot.latency(), outcome, concurrency)
+
+    async def acquire(self) -> None:
+        """
+        获取一个并发名额，必要时排队等待
+
+        Raises:
+            A2AConcurrencyLimitError: 队列已满或排队超时
+        """
+        loop = asyncio.get_running_loop()
+        with self._mutex:
+            if not self._waiters and self._in_flight < self.limit:
+                self._in_flight += 1
+                return
+            if len(self._waiters) >= self.max_queue:
+                self._rejected += 1
+                raise self._error("并发等待队列已满")
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+
+        try:
+            await asyncio.wait_for(waiter[1], timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            with self._mutex:
+                self._timed_out += 1
+            raise self._error(f"排队等待超过 {self.queue_timeout} 秒")
+        except BaseException:
+            self._abandon(waiter)
+            raise
+
+    def release(self, latency: Optional[float] = None, outcome: str = OUTCOME_IGNORE,
+                concurrency: Optional[int] = None) -> None:
+        """
+        归还一个并发名额并反馈请求结果
+
+        Args:
+            latency: 请求延迟（秒）
+            outcome: 请求结果，success/overload/ignore
+            concurrency: 发出请求时的并发数（包括该请求），默认使用当前的并发数
+        """
+        with self._mutex:
+            if outcome == OUTCOME_SUCCESS and latency is not None:
+                self._completed += 1
+                self._on_success(latency, concurrency if concurrency is not None else self._in_flight)
+            self._in_flight -= 1
+            if outcome == OUTCOME_OVERLOAD:
+                self._overloaded += 1
+                self._decrease("远程服务过载")
+            self._wake_waiters()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取限制器的当前状态
+
+        Returns:
+            Dict: 当前限制、进行中请求数、队列长度、延迟与计数器
+        """
+        with self._mutex:
+            return {
+                "limit": self.limit,
+                "in_flight": self._in_flight,
+                "queue_depth": len(self._waiters),
+                "baseline_latency": self._baseline,
+                "smoothed_latency": self._smoothed,
+                "completed": self._completed,
+                "overloaded": self._overloaded,
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+            }
+
+    def _on_success(self, latency: float, concurrency: int) -> None:
+        """成功请求的反馈：更新延迟与并发的统计并调整限制（需持有锁）"""
+        self._samples += 1
+        x, y = float(max(concurrency, 1)), latency
+        sample = [x, y, x * x, y * y, x * y]
+        if self._moments is None:
+            self._moments = sample
+            self._min_latency = latency
+        else:
+            self._moments = [m + _STATS_ALPHA * (v - m) for m, v in zip(self._moments, sample)]
+            self._min_latency = min(self._min_latency, latency)
+        mean_x, mean_y, mean_xx, mean_yy, mean_xy = self._moments
+        self._smoothed = mean_y
+
+        # 延迟对并发数的滑动线性回归
+        var_x = mean_xx - mean_x * mean_x
+        var_y = mean_yy - mean_y * mean_y
+        cov = mean_xy - mean_x * mean_y
+        correlation = 0.0
+        if var_x > 1e-9 and var_y > 1e-12:
+            slope = cov / var_x
+            correlation = cov / math.sqrt(var_x * var_y)
+            # 单并发下的估计延迟，不低于见过的最小延迟
+            self._baseline = max(mean_y + slope * (1.0 - mean_x), self._min_latency)
+            expected = mean_y + slope * (x - mean_x)
+        else:
+            self._baseline = max(self._baseline or mean_y, self._min_latency)
+            expected = mean_y
+
+        # 只在限制确实被用到时调整：空闲期间限制不会无限膨胀，低并发时的变慢也与本端并发无关
+        if self._in_flight < self._limit / 2:
+            return
+        if (self._samples >= _WARMUP_SAMPLES and correlation > _MIN_CORRELATION
+                and expected > self._baseline * self.latency_tolerance):
+            self._decrease("延迟随并发升高")
+        else:
+            self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+
+    def _decrease(self, reason: str) -> None:
+        """乘法下降，每个平滑往返时间内最多下降一次（需持有锁）"""
+        now = time.monotonic()
+        if self._smoothed is not None and now - self._last_decrease < self._smoothed:
+            return
+        self._last_decrease = now
+        previous = self.limit
+        self._limit = max(float(self.min_limit), self._limit * self.backoff_ratio)
+        if self.limit != previous:
+            log_debug(f"并发限制下降({reason}): {self.name}, {previous} -> {self.limit}")
+
+    def _wake_waiters(self) -> None:
+        """把空出的名额交给排队中的请求（需持有锁）"""
+        while self._waiters and self._in_flight < self.limit:
+            loop, future = self._waiters.popleft()
+            if future.done() or loop.is_closed():
+                continue
+            self._in_flight += 1
+            loop.call_soon_threadsafe(self._grant, future)
+
+    def _grant(self, future: asyncio.Future) -> None:
+        """在等待者的事件循环上交付名额；等待者已取消则把名额还回去"""
+        if future.done():
+            self.release()
+        else:
+            future.set_result(None)
+
+    def _abandon(self, waiter: Tuple[asyncio.AbstractEventLoop, asyncio.Future]) -> None:
+        """放弃排队：从队列移除（若名额已在交付途中，由_grant负责归还）"""
+        with self._mutex:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+
+    def _error(self, reason: str) -> A2AConcurrencyLimitError:
+        log_warning(f"A2A请求被并发限制拒绝: {self.name}, {reason}")
+        return A2AConcurrencyLimitError(
+            f"{reason}（{self.name}，当前限制 {self.limit}，队列长度 {len(self._waiters)}）",
+            base_url=self.name,
+            limit=self.limit,
+            queue_depth=len(self._waiters),
+        )
+
+
+_limiters: Dict[str, AdaptiveConcurrencyLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_concurrency_limiter(base_url: str, **kwargs) -> AdaptiveConcurrencyLimiter:
+    """
+    获取base_url对应的进程级共享并发限制器
+
+    Args:
+        base_url: 远程A2A服务的基础URL
+        **kwargs: 首次创建限制器时传给AdaptiveConcurrencyLimiter的参数
+
+    Returns:
+        AdaptiveConcurrencyLimiter: 该远程服务的并发限制器
+    """
+    key = normalize_base_url(base_url)
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = _limiters[key] = AdaptiveConcurrencyLimiter(name=key, **kwargs)
+        return limiter
+
+
+def concurrency_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    获取所有远程服务的并发限制器状态
+
+    Returns:
+        Dict: base_url -> 限制器状态
+    """
+    with _limiters_lock:
+        limiters = list(_limiters.items())
+    return {key: limiter.stats() for key, limiter in limiters}
+
+
+def _export_metrics() -> None:
+    for key, stats in concurrency_stats().items():
+        CLIENT_IN_FLIGHT.labels(key).set(stats["in_flight"])
+        CLIENT_QUEUE_DEPTH.labels(key).set(stats["queue_depth"])
+        CLIENT_CONCURRENCY_LIMIT.labels(key).set(stats["limit"])
+
+
+# /metrics导出前刷新各远程服务的进行中请求数、队列长度和当前限制
+get_registry().register_collector(_export_metrics)
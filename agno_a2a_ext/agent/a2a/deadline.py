@@ -0,0 +1,174 @@
+# ai_agent/agent/a2a/deadline.py
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, Mapping, Optional, TypeVar
+
+from agno_a2a_ext.agent.a2a.errors import DeadlineExceededError
+
+T = TypeVar("T")
+
+# A2A消息metadata中携带截止时间的键：{"expires_at": 绝对过期时间（Unix时间戳）, "budget": 发送时的剩余预算（秒）}
+DEADLINE_METADATA_KEY = "a2a_deadline"
+
+# 入口请求通过请求头声明的剩余预算（秒）
+DEADLINE_HEADER = "X-A2A-Timeout"
+
+# 当前请求的截止时间（time.monotonic()时钟），对其中创建的asyncio任务同样生效
+_deadline: ContextVar[Optional[float]] = ContextVar("a2a_deadline", default=None)
+
+
+def current_deadline() -> Optional[float]:
+    """当前上下文的截止时间（time.monotonic()时钟），None表示不限制"""
+    return _deadline.get()
+
+
+def resolve_deadline(timeout: Optional[float] = None, deadline: Optional[float] = None) -> Optional[float]:
+    """
+    合并当前上下文的截止时间、给定的超时和截止时间，取最早者
+
+    Args:
+        timeout: 从现在开始的超时（秒）
+        deadline: 截止时间（time.monotonic()时钟）
+
+    Returns:
+        Optional[float]: 最早的截止时间，都未设置时为None
+    """
+    candidates = [value for value in (_deadline.get(), deadline) if value is not None]
+    if timeout is not None:
+        candidates.append(time.monotonic() + timeout)
+    return min(candidates) if candidates else None
+
+
+def remaining(deadline: Optional[float]) -> Optional[float]:
+    """截止时间前的剩余秒数（不小于0），None表示不限制"""
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def bounded_timeout(timeout: Optional[float], deadline: Optional[float]) -> Optional[float]:
+    """把单次操作的超时收紧到截止时间以内"""
+    left = remaining(deadline)
+    if left is None:
+        return timeout
+    return left if timeout is None else min(timeout, left)
+
+
+def check_deadline(deadline: Optional[float]) -> None:
+    """
+    截止时间已过时抛出异常
+
+    Raises:
+        DeadlineExceededError: 剩余预算已用完
+    """
+    if deadline is not None and deadline <= time.monotonic():
+        raise DeadlineExceededError("请求已超过截止时间")
+
+
+@contextmanager
+def deadline_scope(timeout: Optional[float] = None, deadline: Optional[float] = None) -> Iterator[Optional[float]]:
+    """
+    在上下文中收紧截止时间（不会放宽外层的截止时间），其中发出的A2A请求会向下游传播剩余预算
+
+    Args:
+        timeout: 从现在开始的超时（秒）
+        deadline: 截止时间（time.monotonic()时钟）
+
+    Yields:
+        Optional[float]: 生效的截止时间
+    """
+    effective = resolve_deadline(timeout, deadline)
+    token = _deadline.set(effective)
+    try:
+        yield effective
+    finally:
+        _deadline.reset(token)
+
+
+async def run_with_deadline(func: Callable[[], Awaitable[T]], deadline: Optional[float]) -> T:
+    """
+    在截止时间内执行调用，超时后取消
+
+    截止时间已过时不会开始执行；执行期间截止时间对下游调用同样生效。
+
+    Args:
+        func: 返回待执行协程的函数
+        deadline: 截止时间（time.monotonic()时钟），None表示不限制
+
+    Raises:
+        DeadlineExceededError: 开始前截止时间已过，或执行超过了截止时间
+    """
+    check_deadline(deadline)
+    with deadline_scope(deadline=deadline) as effective:
+        if effective is None:
+            return await func()
+        try:
+            return await asyncio.wait_for(func(), timeout=remaining(effective))
+        except asyncio.TimeoutError:
+            raise DeadlineExceededError("执行超过截止时间，已取消") from None
+
+
+def deadline_metadata(deadline: Optional[float]) -> Optional[Dict[str, float]]:
+    """
+    构造向下游传播的截止时间
+
+    同时携带绝对过期时间和剩余预算：下游优先使用不依赖时钟同步的剩余预算。
+
+    Args:
+        deadline: 截止时间（time.monotonic()时钟）
+
+    Returns:
+        Optional[Dict[str, float]]: 写入消息metadata的值，未设置截止时间时为None
+    """
+    left = remaining(deadline)
+    if left is None:
+        return None
+    return {"expires_at": round(time.time() + left, 3), "budget": round(left, 3)}
+
+
+def deadline_from_metadata(metadata: Optional[Mapping[str, Any]]) -> Optional[float]:
+    """
+    从上游A2A消息的metadata中解析截止时间
+
+    Args:
+        metadata: 消息metadata
+
+    Returns:
+        Optional[float]: 本地的截止时间（time.monotonic()时钟），未携带或格式错误时为None
+    """
+    value = (metadata or {}).get(DEADLINE_METADATA_KEY)
+    if not isinstance(value, Mapping):
+        return None
+    try:
+        if value.get("budget") is not None:
+            left = float(value["budget"])
+        elif value.get("expires_at") is not None:
+            left = float(value["expires_at"]) - time.time()
+        else:
+            return None
+    except (TypeError, ValueError):
+        return None
+    return time.monotonic() + left
+
+
+def deadline_from_header(value: Optional[str]) -> Optional[float]:
+    """
+    从入口请求的X-A2A-Timeout请求头解析截止时间
+
+    Args:
+        value: 请求头的值（剩余秒数）
+
+    Returns:
+        Optional[float]: 本地的截止时间（time.monotonic()时钟），未携带或格式错误时为None
+    """
+    if not value:
+        return None
+    try:
+        left = float(value)
+    except ValueError:
+        return None
+    return time.monotonic() + left
@@ -0,0 +1,41 @@
+# ai_agent/agent/a2a/errors.py
+from typing import Optional
+
+
+class A2AAgentError(Exception):
+    """A2AAgent客户端错误的基类"""
+
+
+class A2ARemoteError(A2AAgentError):
+    """远程A2A服务返回了JSON-RPC错误或失败状态的任务"""
+
+    def __init__(self, message: str, code: Optional[int] = None):
+        super().__init__(message)
+        self.code = code
+
+
+class A2AConcurrencyLimitError(A2AAgentError):
+    """请求在本地并发限制器中排队超时或队列已满，未发送到远程服务"""
+
+    def __init__(self, message: str, base_url: Optional[str] = None, limit: int = 0, queue_depth: int = 0):
+        super().__init__(message)
+        self.base_url = base_url
+        self.limit = limit
+        self.queue_depth = queue_depth
+
+
+class CircuitOpenError(A2AAgentError):
+    """远程服务的熔断器处于打开状态，请求被快速拒绝"""
+
+    def __init__(self, message: str, base_url: Optional[str] = None, retry_after: float = 0.0):
+        super().__init__(message)
+        self.base_url = base_url
+        self.retry_after = retry_after
+
+
+class DeadlineExceededError(A2AAgentError, TimeoutError):
+    """请求的截止时间已过（调用方的剩余预算用完），不再发送或继续等待"""
+
+
+class A2AStreamTimeoutError(A2AAgentError, TimeoutError):
+    """流式请求等待首个数据块或相邻数据块的时间超过了限制"""
@@ -0,0 +1,241 @@
+# ai_agent/agent/a2a/local_transport.py
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+from urllib.parse import unquote
+
+import httpx
+from agno.utils.log import log_debug
+
+from agno_a2a_ext.agent.a2a.client_pool import UNIX_SCHEME, normalize_base_url, request_base_url
+
+# 监听所有地址时，同一进程内的调用方可能使用的主机名
+_WILDCARD_HOSTS = ("0.0.0.0", "::", "")
+_LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "0.0.0.0")
+
+_END = object()
+
+_apps: Dict[str, Any] = {}
+_apps_lock = threading.Lock()
+
+# 响应结束后仍在运行的应用任务（例如后台任务），持有引用避免被垃圾回收
+_app_tasks: Set[asyncio.Task] = set()
+
+# 同一应用在同一事件循环上共享的客户端
+_clients: Dict[Tuple[int, int], httpx.AsyncClient] = {}
+
+
+def local_urls(host: str, port: int, uds: Optional[str] = None) -> List[str]:
+    """
+    服务在本进程中可被访问的URL
+
+    Args:
+        host: 服务监听的地址
+        port: 服务监听的端口
+        uds: 服务同时监听的unix socket路径（可选）
+
+    Returns:
+        List[str]: 监听所有地址时包括回环地址和localhost；监听unix socket时包括对应的unix://地址
+    """
+    hosts = list(_LOOPBACK_HOSTS) if host in _WILDCARD_HOSTS else [host]
+    urls = [f"http://{h}:{port}" for h in hosts]
+    if uds:
+        urls.append(f"{UNIX_SCHEME}{uds}")
+    return urls
+
+
+def register_local_app(base_url: str, app: Any) -> None:
+    """
+    登记在本进程中运行的A2A应用，指向它的A2AAgent可以不经网络直接调用
+
+    Args:
+        base_url: 应用的访问地址（与AgentCard中的url一致）
+        app: ASGI应用
+    """
+    with _apps_lock:
+        _apps[normalize_base_url(base_url)] = app
+    log_debug(f"登记进程内A2A应用: {base_url}")
+
+
+def unregister_local_app(base_url: str, app: Optional[Any] = None) -> None:
+    """
+    取消登记（服务停止时调用）
+
+    Args:
+        base_url: 应用的访问地址
+        app: 只在登记的仍是该应用时取消（可选）
+    """
+    key = normalize_base_url(base_url)
+    with _apps_lock:
+        if app is None or _apps.get(key) is app:
+            _apps.pop(key, None)
+
+
+def get_local_app(base_url: str) -> Optional[Any]:
+    """
+    查找在本进程中运行的A2A应用
+
+    Args:
+        base_url: 目标服务的访问地址
+
+    Returns:
+        ASGI应用，不在本进程中时返回None
+    """
+    return _apps.get(normalize_base_url(base_url))
+
+
+def get_local_client(base_url: str, app: Any) -> httpx.AsyncClient:
+    """
+    获取通过进程内传输调用应用的客户端（同一应用在同一事件循环上共享）
+
+    Args:
+        base_url: 应用的访问地址
+        app: ASGI应用
+
+    Returns:
+        httpx.AsyncClient: 使用LocalASGITransport的客户端，没有连接需要释放
+    """
+    loop = asyncio.get_running_loop()
+    key = (id(app), id(loop))
+    client = _clients.get(key)
+    if client is None or client.is_closed:
+        client = _clients[key] = httpx.AsyncClient(
+            transport=LocalASGITransport(app, base_url), base_url=request_base_url(base_url)
+        )
+    return client
+
+
+class LocalASGITransport(httpx.AsyncBaseTransport):
+    """
+    在当前事件循环中直接调用ASGI应用的httpx传输
+
+    省去TCP连接、HTTP解析和uvicorn，协议层面与网络调用完全一致：同样的JSON-RPC请求与响应、
+    同样的中间件和请求处理器。与httpx.ASGITransport不同，响应体按块流式返回（SSE的每个事件立即可读），
+    调用方关闭响应时应用会收到http.disconnect，与客户端断开TCP连接的效果相同（服务端据此取消运行）。
+    应用已停止（取消登记）时请求失败并抛出ConnectError，与连接已停止的服务一致。
+    """
+
+    def __init__(self, app: Any, base_url: str):
+        """
+        初始化传输
+
+        Args:
+            app: ASGI应用
+            base_url: 应用登记的访问地址
+        """
+        self.app = app
+        self.base_url = base_url
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if get_local_app(self.base_url) is not self.app:
+            raise httpx.ConnectError(f"In-process A2A app at {self.base_url} is not running", request=request)
+
+        body = b"".join([chunk async for chunk in request.stream])
+        url = request.url
+        raw_path, _, _ = url.raw_path.partition(b"?")
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": request.method,
+            # 响应不经过网络，不请求压缩
+            "headers": [(key.lower(), value) for key, value in request.headers.raw if key.lower() != b"accept-encoding"],
+            "scheme": url.scheme,
+            "path": unquote(raw_path.decode("ascii")),
+            "raw_path": raw_path,
+            "query_string": url.query,
+            "server": (url.host, url.port),
+            "client": ("127.0.0.1", 0),
+            "root_path": "",
+        }
+
+        loop = asyncio.get_running_loop()
+        started: asyncio.Future = loop.create_future()
+        chunks: asyncio.Queue = asyncio.Queue()
+        disconnected = asyncio.Event()
+        request_sent = False
+
+        async def receive() -> dict:
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # 请求体已读完，之后只会在调用方关闭响应时返回（与服务端等待TCP断开相同）
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: dict) -> None:
+            if message["type"] == "http.response.start":
+                if not started.done():
+                    started.set_result(message)
+            elif message["type"] == "http.response.body" and not disconnected.is_set():
+                chunk = message.get("body", b"")
+                if chunk:
+                    chunks.put_nowait(chunk)
+                if not message.get("more_body", False):
+                    chunks.put_nowait(_END)
+
+        async def run_app() -> None:
+            try:
+                await self.app(scope, receive, send)
+            except BaseException as e:
+                if not started.done():
+                    started.set_exception(e if isinstance(e, Exception) else httpx.ReadError(str(e) or "app cancelled"))
+                else:
+                    chunks.put_nowait(e)
+                if not isinstance(e, Exception):
+                    raise
+            finally:
+                if not started.done():
+                    started.set_exception(httpx.RemoteProtocolError("App returned without starting a response"))
+                chunks.put_nowait(_END)
+
+        # 超时由传输层实现（httpx本身不计时），读超时同样作用于等待响应头和相邻数据块
+        read_timeout = (request.extensions.get("timeout") or {}).get("read")
+        task = asyncio.ensure_future(run_app())
+        _app_tasks.add(task)
+        task.add_done_callback(_app_tasks.discard)
+        try:
+            start = await asyncio.wait_for(asyncio.shield(started), read_timeout)
+        except asyncio.TimeoutError:
+            disconnected.set()
+            raise httpx.ReadTimeout(f"No response from in-process A2A app within {read_timeout}s", request=request)
+        except BaseException:
+            disconnected.set()
+            raise
+        return httpx.Response(
+            status_code=start["status"],
+            headers=start.get("headers", []),
+            stream=_ResponseStream(chunks, disconnected, read_timeout, request),
+            request=request,
+        )
+
+
+class _ResponseStream(httpx.AsyncByteStream):
+    """应用发送的响应体；关闭时通知应用客户端已断开"""
+
+    def __init__(self, chunks: asyncio.Queue, disconnected: asyncio.Event, read_timeout: Optional[float],
+                 request: httpx.Request):
+        self._chunks = chunks
+        self._disconnected = disconnected
+        self._read_timeout = read_timeout
+        self._request = request
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        while True:
+            try:
+                item = await asyncio.wait_for(self._chunks.get(), self._read_timeout)
+            except asyncio.TimeoutError:
+                raise httpx.ReadTimeout(
+                    f"No data from in-process A2A app within {self._read_timeout}s", request=self._request
+                )
+            if item is _END:
+                return
+            if isinstance(item, BaseException):
+                raise httpx.ReadError(str(item) or type(item).__name__) from item
+            yield item
+
+    async def aclose(self) -> None:
+        self._disconnected.set()
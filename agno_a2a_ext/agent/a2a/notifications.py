@@ -0,0 +1,223 @@
+# ai_agent/agent/a2a/notifications.py
+from __future__ import annotations
+
+import asyncio
+import secrets
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import uvicorn
+from a2a.types import Message, Task, TaskState
+from agno.utils.log import log_debug, log_info, log_warning
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+from agno_a2a_ext.agent.a2a.balancer import Endpoint
+
+# A2A推送通知携带的令牌请求头
+NOTIFICATION_TOKEN_HEADER = "X-A2A-Notification-Token"
+
+# 任务结束（或需要调用方介入）的状态，收到这些状态的通知时唤醒等待者
+SETTLED_STATES = {
+    TaskState.completed,
+    TaskState.canceled,
+    TaskState.failed,
+    TaskState.rejected,
+    TaskState.input_required,
+    TaskState.auth_required,
+}
+
+
+class NotificationReceiver:
+    """
+    本地的A2A推送通知接收器（webhook）
+
+    长任务以非阻塞方式提交后，远程服务在任务结束时把最终的Task推送到这里，
+    客户端不需要为每个任务保持一个打开的HTTP连接。一个接收器可以被多个A2AAgent共享，
+    同时等待的任务数量只受内存限制。
+
+    - 每个接收器生成一个随机令牌，只接受携带该令牌的通知
+    - 通知可能先于等待者注册到达（任务很快完成时），未被认领的结果会暂存一段时间
+    - 等待者可以位于任意事件循环上（例如同步调用使用的后台循环）
+    """
+
+    def __init__(
+            self,
+            host: str = "127.0.0.1",
+            port: int = 0,
+            public_url: Optional[str] = None,
+            path: str = "/a2a/notifications",
+            max_unclaimed: int = 10000,
+    ):
+        """
+        初始化通知接收器
+
+        Args:
+            host: 监听地址
+            port: 监听端口，0表示自动分配
+            public_url: 远程服务回调时使用的URL（经过NAT或反向代理时需要），默认根据监听地址生成
+            path: webhook路径
+            max_unclaimed: 暂存的未被认领通知的最大数量
+        """
+        self.host = host
+        self.port = port
+        self.public_url = public_url
+        self.path = "/" + path.lstrip("/")
+        self.max_unclaimed = max_unclaimed
+        self.token = secrets.token_urlsafe(24)
+
+        self._server: Optional[uvicorn.Server] = None
+        self._serve_task: Optional[asyncio.Task] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._mutex = threading.Lock()
+        self._waiters: Dict[str, Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = {}
+        self._unclaimed: "OrderedDict[str, Task]" = OrderedDict()
+
+        self._received = 0
+        self._rejected = 0
+
+    @property
+    def url(self) -> str:
+        """远程服务回调的webhook地址"""
+        if self.public_url:
+            return self.public_url.rstrip("/") + self.path
+        if self._server is None:
+            raise RuntimeError("NotificationReceiver尚未启动")
+        return f"http://{self.host}:{self.port}{self.path}"
+
+    @property
+    def started(self) -> bool:
+        return self._server is not None and self._server.started
+
+    async def start(self) -> None:
+        """在当前事件循环上启动接收器（已启动时直接返回）"""
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self.started:
+                return
+            app = Starlette(routes=[Route(self.path, self._handle, methods=["POST"])])
+            config = uvicorn.Config(app=app, host=self.host, port=self.port, log_level="warning", lifespan="off")
+            server = uvicorn.Server(config)
+            self._serve_task = asyncio.create_task(server.serve())
+            while not server.started:
+                if self._serve_task.done():
+                    # 启动失败（例如端口被占用），抛出原始异常
+                    self._serve_task.result()
+                    raise RuntimeError("NotificationReceiver启动失败")
+                await asyncio.sleep(0.01)
+            self._server = server
+            # 自动分配端口时取实际监听的端口
+            self.port = server.servers[0].sockets[0].getsockname()[1]
+            log_info(f"A2A通知接收器已启动: {self.url}")
+
+    async def stop(self) -> None:
+        """停止接收器，仍在等待的任务会收到CancelledError"""
+        server, self._server = self._server, None
+        if server is not None:
+            server.should_exit = True
+            if self._serve_task is not None:
+                await self._serve_task
+                self._serve_task = None
+        with self._mutex:
+            waiters, self._waiters = self._waiters, {}
+        for loop, future in waiters.values():
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(future.cancel)
+
+    def expect(self, task_id: str) -> asyncio.Future:
+        """
+        注册等待某个任务的通知
+
+        Args:
+            task_id: 任务ID
+
+        Returns:
+            asyncio.Future: 收到该任务结束的通知时完成，结果为最终的Task
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._mutex:
+            task = self._unclaimed.pop(task_id, None)
+            if task is None:
+                self._waiters[task_id] = (loop, future)
+        if task is not None:
+            future.set_result(task)
+        return future
+
+    def discard(self, task_id: str) -> None:
+        """放弃等待某个任务（例如等待超时或改为轮询获得了结果）"""
+        with self._mutex:
+            self._waiters.pop(task_id, None)
+            self._unclaimed.pop(task_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        获取接收器状态
+
+        Returns:
+            Dict: 等待中的任务数、暂存的通知数与收到/拒绝的通知数
+        """
+        with self._mutex:
+            return {
+                "waiting": len(self._waiters),
+                "unclaimed": len(self._unclaimed),
+                "received": self._received,
+                "rejected": self._rejected,
+            }
+
+    async def _handle(self, request: Request) -> Response:
+        """处理一次推送通知"""
+        if not secrets.compare_digest(request.headers.get(NOTIFICATION_TOKEN_HEADER, ""), self.token):
+            with self._mutex:
+                self._rejected += 1
+            return Response(status_code=401)
+        try:
+            task = Task.model_validate_json(await request.body())
+        except Exception as e:
+            log_warning(f"无法解析A2A推送通知: {e}")
+            return Response(status_code=400)
+
+        log_debug(f"收到A2A推送通知: task_id={task.id}, state={task.status.state.value}")
+        if task.status.state not in SETTLED_STATES:
+            return Response(status_code=204)
+
+        with self._mutex:
+            self._received += 1
+            waiter = self._waiters.pop(task.id, None)
+            if waiter is None:
+                self._unclaimed[task.id] = task
+                while len(self._unclaimed) > self.max_unclaimed:
+                    self._unclaimed.popitem(last=False)
+        if waiter is not None:
+            loop, future = waiter
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(self._resolve, future, task)
+        return Response(status_code=204)
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, task: Task) -> None:
+        if not future.done():
+            future.set_result(task)
+
+
+@dataclass
+class SubmittedTask:
+    """以非阻塞方式提交到远程服务的任务"""
+
+    task_id: Optional[str]
+    context_id: Optional[str]
+    # 接受该任务的副本，轮询必须发往同一副本
+    endpoint: Endpoint
+    # 最近一次已知的任务状态；远程服务不支持后台执行而直接返回Message时为None
+    task: Optional[Task] = None
+    message: Optional[Message] = None
+
+    @property
+    def settled(self) -> bool:
+        """任务是否已经结束（或需要调用方介入）"""
+        return self.message is not None or (self.task is not None and self.task.status.state in SETTLED_STATES)
@@ -0,0 +1,387 @@
+# ai_agent/agent/a2a/resilience.py
+from __future__ import annotations
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import httpx
+from httpx_sse import SSEError
+from a2a.client.errors import A2AClientHTTPError
+from agno.utils.log import log_info, log_warning
+
+from agno_a2a_ext.agent.a2a.client_pool import normalize_base_url
+from agno_a2a_ext.agent.a2a.concurrency import is_overload_error
+from agno_a2a_ext.agent.a2a.errors import A2AConcurrencyLimitError, CircuitOpenError, DeadlineExceededError
+
+# 可以安全重试的HTTP状态码：请求未被处理或远程暂时不可用
+RETRYABLE_STATUS_CODES = {408, 429, 502, 503, 504}
+# 建立连接阶段的错误：请求还没有发出，重发不会导致远程重复执行
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """
+    判断请求是否可以安全重发
+
+    message/send不是幂等的，只重试确定没有被远程执行的请求：建立连接阶段的错误，
+    以及远程明确返回的408/429/502/503/504。请求发出后的读超时、连接中断等错误不重试，
+    远程可能已经在执行，重发会导致重复执行。
+    """
+    if isinstance(error, A2AClientHTTPError):
+        cause = error.__cause__
+        # 流式请求收到非SSE的错误响应（例如503）时，a2a客户端只会报告400协议错误，
+        # 拿不到真实状态码；此时远程没有开始流式处理，按可重试处理
+        if isinstance(cause, SSEError):
+            return True
+        # a2a客户端把网络错误包装为503，按原始错误判断
+        if isinstance(cause, httpx.RequestError):
+            return isinstance(cause, CONNECT_ERRORS)
+        return error.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(error, CONNECT_ERRORS)
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """判断异常是否属于远程的临时故障（可重试的错误、超时和网络错误），计入熔断器的失败"""
+    if is_retryable_error(error) or is_overload_error(error):
+        return True
+    if isinstance(error, A2AClientHTTPError):
+        return isinstance(error.__cause__, httpx.TransportError)
+    return isinstance(error, httpx.TransportError)
+
+
+def retry_after_of(error: BaseException) -> Optional[float]:
+    """读取错误响应的Retry-After（秒数形式），没有时返回None"""
+    cause = error.__cause__
+    response = cause.response if isinstance(cause, httpx.HTTPStatusError) else None
+    if response is None:
+        return None
+    try:
+        return max(0.0, float(response.headers.get("retry-after", "")))
+    except ValueError:
+        return None
+
+
+class RetryBudget:
+    """
+    重试预算（令牌桶）
+
+    每个请求存入ratio个令牌，每次重试消耗一个令牌，另外按min_per_second持续补充，
+    保证远程服务故障时重试流量不超过正常流量的ratio倍，避免重试放大压垮远程服务。
+    """
+
+    def __init__(self, ratio: float = 0.2, min_per_second: float = 1.0, max_tokens: float = 20.0):
+        """
+        初始化重试预算
+
+        Args:
+            ratio: 每个请求允许的重试比例
+            min_per_second: 低流量时每秒保底的重试次数
+            max_tokens: 令牌上限
+        """
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+
+        self._tokens = max_tokens
+        self._updated_at = time.monotonic()
+        self._mutex = threading.Lock()
+
+    def deposit(self) -> None:
+        """记录一个新请求"""
+        with self._mutex:
+            self._refill()
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_withdraw(self) -> bool:
+        """尝试为一次重试消耗令牌，预算不足时返回False"""
+        with self._mutex:
+            self._refill()
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+    @property
+    def tokens(self) -> float:
+        with self._mutex:
+            self._refill()
+            return self._tokens
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.max_tokens, self._tokens + (now - self._updated_at) * self.min_per_second)
+        self._updated_at = now
+
+
+class RetryPolicy:
+    """
+    重试策略：指数退避 + 完全抖动（full jitter），只重试可重试的错误，并受重试预算约束
+    """
+
+    def __init__(
+            self,
+            max_attempts: int = 3,
+            base_delay: float = 0.2,
+            max_delay: float = 5.0,
+            budget: Optional[RetryBudget] = None,
+            retryable: Callable[[BaseException], bool] = is_retryable_error,
+    ):
+        """
+        初始化重试策略
+
+        Args:
+            max_attempts: 最多尝试次数（包含第一次），1表示不重试
+            base_delay: 第一次重试的退避上限（秒）
+            max_delay: 退避时间上限（秒）
+            budget: 重试预算（可选），默认创建一个新的预算
+            retryable: 判断异常是否可重试的函数
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget or RetryBudget()
+        self.retryable = retryable
+
+    def on_request(self) -> None:
+        """每个逻辑请求开始时调用一次，为重试预算存入令牌"""
+        self.budget.deposit()
+
+    def next_delay(self, attempt: int, error: BaseException) -> Optional[float]:
+        """
+        计算第attempt次尝试失败后的退避时间
+
+        Args:
+            attempt: 已经进行的尝试次数（从1开始）
+            error: 本次尝试的异常
+
+        Returns:
+            Optional[float]: 退避时间（秒），不应重试时返回None
+        """
+        if attempt >= self.max_attempts or not self.retryable(error):
+            return None
+        if not self.budget.try_withdraw():
+            log_warning(f"重试预算已耗尽，放弃重试: {error}")
+            return None
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+        # 远程服务通过Retry-After声明了恢复时间（例如准入控制拒绝）时，不早于该时间重试
+        retry_after = retry_after_of(error)
+        if retry_after is not None:
+            delay = max(delay, min(self.max_delay, retry_after))
+        return delay
+
+
+class CircuitBreaker:
+    """
+    远程服务的熔断器
+
+    - closed：正常放行，连续failure_threshold次过载类失败后打开
+    - open：快速失败（CircuitOpenError），reset_timeout之后进入half_open
+    - half_open：只放行half_open_max_calls个探测请求，成功则关闭，失败则重新打开
+
+    只有连接失败、超时和429/5xx计为失败；远程业务错误说明服务仍在响应，计为成功；
+    本地并发限制、调用方截止时间用完和取消不影响熔断状态。
+    """
+
+    def __init__(
+            self,
+            name: Optional[str] = None,
+            failure_threshold: int = 5,
+            reset_timeout: float = 30.0,
+            half_open_max_calls: int = 1,
+    ):
+        """
+        初始化熔断器
+
+        Args:
+            name: 熔断器名称（通常是远程服务的base_url）
+            failure_threshold: 连续失败多少次后打开
+            reset_timeout: 打开后多久进入半开状态（秒）
+            half_open_max_calls: 半开状态下允许的并发探测请求数
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._state = CIRCUIT_CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        # 可重入：监听器在状态变化时可以读取熔断器状态
+        self._mutex = threading.RLock()
+        self._listeners: List[Callable[[str, str, str], None]] = []
+
+        self._successes = 0
+        self._failures = 0
+        self._rejected = 0
+        self._opened_count = 0
+
+    @property
+    def state(self) -> str:
+        """当前状态：closed/open/half_open"""
+        with self._mutex:
+            self._maybe_half_open()
+            return self._state
+
+    def add_listener(self, listener: Callable[[str, str, str], None]) -> None:
+        """
+        注册状态变化监听器
+
+        Args:
+            listener: 回调函数，参数为(熔断器名称, 旧状态, 新状态)
+        """
+        self._listeners.append(listener)
+
+    def is_available(self) -> bool:
+        """是否会放行请求（不占用半开探测名额）"""
+        with self._mutex:
+            self._maybe_half_open()
+            if self._state == CIRCUIT_CLOSED:
+                return True
+            return self._state == CIRCUIT_HALF_OPEN and self._half_open_calls < self.half_open_max_calls
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        """
+        在熔断器保护下执行一次调用
+
+        Raises:
+            CircuitOpenError: 熔断器打开或半开探测名额已满
+        """
+        probe = self._before_call()
+        try:
+            yield
+        except BaseException as e:
+            if is_transient_error(e):
+                self._on_failure(probe)
+            elif isinstance(e, (A2AConcurrencyLimitError, CircuitOpenError, DeadlineExceededError)) \
+                    or not isinstance(e, Exception):
+                self._on_neutral(probe)
+            else:
+                self._on_success(probe)
+            raise
+        else:
+            self._on_success(probe)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取熔断器状态
+
+        Returns:
+            Dict: 状态、连续失败次数与计数器
+        """
+        with self._mutex:
+            self._maybe_half_open()
+            return {
+                "state": self._state,
+                "consecutive_failures": self._consecutive_failures,
+                "successes": self._successes,
+                "failures": self._failures,
+                "rejected": self._rejected,
+                "opened": self._opened_count,
+            }
+
+    def _before_call(self) -> bool:
+        """检查是否放行，返回本次调用是否为半开探测"""
+        with self._mutex:
+            self._maybe_half_open()
+            if self._state == CIRCUIT_CLOSED:
+                return False
+            if self._state == CIRCUIT_HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+                self._half_open_calls += 1
+                return True
+            self._rejected += 1
+            retry_after = max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+        raise CircuitOpenError(
+            f"远程服务熔断中: {self.name}，{retry_after:.1f} 秒后重试",
+            base_url=self.name,
+            retry_after=retry_after,
+        )
+
+    def _on_success(self, probe: bool) -> None:
+        with self._mutex:
+            self._successes += 1
+            self._consecutive_failures = 0
+            if probe:
+                self._half_open_calls -= 1
+            if self._state != CIRCUIT_CLOSED:
+                self._transition(CIRCUIT_CLOSED)
+
+    def _on_failure(self, probe: bool) -> None:
+        with self._mutex:
+            self._failures += 1
+            self._consecutive_failures += 1
+            if probe:
+                self._half_open_calls -= 1
+            if self._state == CIRCUIT_HALF_OPEN or (
+                    self._state == CIRCUIT_CLOSED and self._consecutive_failures >= self.failure_threshold
+            ):
+                self._opened_at = time.monotonic()
+                self._opened_count += 1
+                self._transition(CIRCUIT_OPEN)
+
+    def _on_neutral(self, probe: bool) -> None:
+        if probe:
+            with self._mutex:
+                self._half_open_calls -= 1
+
+    def _maybe_half_open(self) -> None:
+        """打开超过reset_timeout后进入半开状态（需持有锁）"""
+        if self._state == CIRCUIT_OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._half_open_calls = 0
+            self._transition(CIRCUIT_HALF_OPEN)
+
+    def _transition(self, state: str) -> None:
+        """切换状态并通知监听器（需持有锁）"""
+        previous, self._state = self._state, state
+        if state == CIRCUIT_OPEN:
+            log_warning(f"A2A熔断器打开: {self.name}（连续失败 {self._consecutive_failures} 次）")
+        else:
+            log_info(f"A2A熔断器状态变化: {self.name}, {previous} -> {state}")
+        for listener in self._listeners:
+            try:
+                listener(self.name, previous, state)
+            except Exception as e:
+                log_warning(f"熔断器监听器执行失败: {e}")
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(base_url: str, **kwargs) -> CircuitBreaker:
+    """
+    获取base_url对应的进程级共享熔断器
+
+    Args:
+        base_url: 远程A2A服务的基础URL
+        **kwargs: 首次创建熔断器时传给CircuitBreaker的参数
+
+    Returns:
+        CircuitBreaker: 该远程服务的熔断器
+    """
+    key = normalize_base_url(base_url)
+    with _breakers_lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = _breakers[key] = CircuitBreaker(name=key, **kwargs)
+        return breaker
+
+
+def circuit_breaker_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    获取所有远程服务的熔断器状态
+
+    Returns:
+        Dict: base_url -> 熔断器状态
+    """
+    with _breakers_lock:
+        breakers = list(_breakers.items())
+    return {key: breaker.stats() for key, breaker in breakers}
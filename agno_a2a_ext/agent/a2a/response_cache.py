@@ -0,0 +1,335 @@
+# ai_agent/agent/a2a/response_cache.py
+from __future__ import annotations
+
+import asyncio
+import functools
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from agno.utils.log import log_debug
+
+# SQLite缓存超出上限时批量淘汰到上限的该比例，之后的写入不必每次都淘汰
+_EVICT_WATERMARK = 0.9
+
+
+class ResponseCache(ABC):
+    """
+    A2A远程调用的响应缓存基类
+
+    缓存的是远程服务最终的完整回复文本，键由调用方计算（见singleflight.request_key：
+    远程服务 + 规范化消息 + 作用域）。只适用于对相同输入结果确定的远程服务。
+    条目按TTL过期，超出条目数或总字节数上限时淘汰最久未使用的条目。
+    """
+
+    def __init__(self, ttl: Optional[float] = 300.0, max_entries: int = 1024, max_bytes: Optional[int] = None):
+        """
+        初始化响应缓存
+
+        Args:
+            ttl: 默认有效期（秒），None表示不过期
+            max_entries: 最大条目数
+            max_bytes: 缓存内容的总字节数上限（UTF-8），None表示不限制
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries必须大于0")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._mutex = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._sets = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        读取缓存的回复，并记录命中/未命中
+
+        Args:
+            key: 请求键
+
+        Returns:
+            Optional[str]: 缓存的回复文本，未命中或已过期时返回None
+        """
+        with self._mutex:
+            content, expired = self._load(key, time.time())
+            if expired:
+                self._expirations += 1
+            if content is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+            return content
+
+    def set(self, key: str, content: str, ttl: Optional[float] = None) -> None:
+        """
+        写入回复
+
+        Args:
+            key: 请求键
+            content: 完整的回复文本
+            ttl: 本条目的有效期（秒），默认使用缓存的ttl
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl is not None else None
+        size = len(content.encode("utf-8"))
+        if self.max_bytes is not None and size > self.max_bytes:
+            log_debug(f"回复超过缓存字节上限，不缓存: {size} > {self.max_bytes}")
+            return
+        with self._mutex:
+            self._store(key, content, size, expires_at)
+            self._sets += 1
+            self._evictions += self._evict()
+
+    async def aget(self, key: str) -> Optional[str]:
+        """异步读取缓存的回复（见get），访问较慢的后端时不阻塞事件循环"""
+        return self.get(key)
+
+    async def aset(self, key: str, content: str, ttl: Optional[float] = None) -> None:
+        """异步写入回复（见set），访问较慢的后端时不阻塞事件循环"""
+        self.set(key, content, ttl=ttl)
+
+    def invalidate(self, key: str) -> None:
+        """删除一个条目"""
+        with self._mutex:
+            self._delete(key)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._mutex:
+            self._clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计
+
+        Returns:
+            Dict: 条目数、字节数与命中/未命中/写入/淘汰/过期计数
+        """
+        with self._mutex:
+            entries, size = self._usage()
+            return {
+                "entries": entries,
+                "bytes": size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "sets": self._sets,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
+
+    @abstractmethod
+    def _load(self, key: str, now: float) -> Tuple[Optional[str], bool]:
+        """读取条目并标记为最近使用，返回(内容, 是否因过期被删除)（需持有锁）"""
+        pass
+
+    @abstractmethod
+    def _store(self, key: str, content: str, size: int, expires_at: Optional[float]) -> None:
+        """写入条目（需持有锁）"""
+        pass
+
+    @abstractmethod
+    def _evict(self) -> int:
+        """淘汰超出上限的最久未使用条目，返回淘汰数量（需持有锁）"""
+        pass
+
+    @abstractmethod
+    def _delete(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    def _clear(self) -> None:
+        pass
+
+    @abstractmethod
+    def _usage(self) -> Tuple[int, int]:
+        """返回(条目数, 总字节数)（需持有锁）"""
+        pass
+
+
+class InMemoryResponseCache(ResponseCache):
+    """进程内的LRU响应缓存"""
+
+    def __init__(self, ttl: Optional[float] = 300.0, max_entries: int = 1024, max_bytes: Optional[int] = None):
+        super().__init__(ttl=ttl, max_entries=max_entries, max_bytes=max_bytes)
+        # key -> (内容, 字节数, 过期时间)，顺序即最近使用顺序
+        self._entries: "OrderedDict[str, Tuple[str, int, Optional[float]]]" = OrderedDict()
+        self._bytes = 0
+
+    def _load(self, key: str, now: float) -> Tuple[Optional[str], bool]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None, False
+        content, _, expires_at = entry
+        if expires_at is not None and expires_at <= now:
+            self._delete(key)
+            return None, True
+        self._entries.move_to_end(key)
+        return content, False
+
+    def _store(self, key: str, content: str, size: int, expires_at: Optional[float]) -> None:
+        self._delete(key)
+        self._entries[key] = (content, size, expires_at)
+        self._bytes += size
+
+    def _evict(self) -> int:
+        evicted = 0
+        while self._entries and (
+                len(self._entries) > self.max_entries
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            _, (_, size, _) = self._entries.popitem(last=False)
+            self._bytes -= size
+            evicted += 1
+        return evicted
+
+    def _delete(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def _clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def _usage(self) -> Tuple[int, int]:
+        return len(self._entries), self._bytes
+
+
+class SqliteResponseCache(ResponseCache):
+    """
+    基于SQLite文件的响应缓存，进程重启后仍然有效，也可以被同一台机器上的多个进程共享
+
+    aget/aset在线程池中访问数据库，不阻塞事件循环。条目数与字节数在本进程内增量估计，
+    估计值超出上限时才统计实际用量，并批量淘汰到上限的90%；多个进程共享时上限是近似的。
+    """
+
+    def __init__(
+            self,
+            db_file: str,
+            ttl: Optional[float] = 3600.0,
+            max_entries: int = 10000,
+            max_bytes: Optional[int] = None,
+            table_name: str = "a2a_response_cache",
+            busy_timeout: float = 5.0,
+    ):
+        """
+        初始化SQLite响应缓存
+
+        Args:
+            db_file: SQLite数据库文件路径
+            ttl: 默认有效期（秒），None表示不过期
+            max_entries: 最大条目数
+            max_bytes: 缓存内容的总字节数上限（UTF-8），None表示不限制
+            table_name: 缓存表名
+            busy_timeout: 数据库被其他进程锁定时等待的最长时间（秒）
+        """
+        super().__init__(ttl=ttl, max_entries=max_entries, max_bytes=max_bytes)
+        self.db_file = db_file
+        self.table_name = table_name
+
+        directory = os.path.dirname(os.path.abspath(db_file))
+        os.makedirs(directory, exist_ok=True)
+        # 所有访问都在self._mutex下进行，可以跨线程共享同一个连接
+        self._conn = sqlite3.connect(db_file, check_same_thread=False, isolation_level=None)
+        self._conn.execute(f"PRAGMA busy_timeout = {int(busy_timeout * 1000)}")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table_name} ("
+            "key TEXT PRIMARY KEY, content TEXT NOT NULL, size INTEGER NOT NULL, "
+            "expires_at REAL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table_name}_accessed_at ON {table_name} (accessed_at)")
+        # 条目数与字节数的估计值（写入时增加，淘汰时按实际用量校正）
+        self._estimated_entries, self._estimated_bytes = self._usage()
+        log_debug(f"Created SqliteResponseCache: {db_file}")
+
+    async def aget(self, key: str) -> Optional[str]:
+        return await self._run(self.get, key)
+
+    async def aset(self, key: str, content: str, ttl: Optional[float] = None) -> None:
+        await self._run(functools.partial(self.set, ttl=ttl), key, content)
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(func, *args))
+
+    def _load(self, key: str, now: float) -> Tuple[Optional[str], bool]:
+        row = self._conn.execute(
+            f"SELECT content, expires_at FROM {self.table_name} WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None, False
+        content, expires_at = row
+        if expires_at is not None and expires_at <= now:
+            self._delete(key)
+            return None, True
+        self._conn.execute(f"UPDATE {self.table_name} SET accessed_at = ? WHERE key = ?", (now, key))
+        return content, False
+
+    def _store(self, key: str, content: str, size: int, expires_at: Optional[float]) -> None:
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO {self.table_name} (key, content, size, expires_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, content, size, expires_at, time.time()),
+        )
+        # 覆盖已有条目时估计值偏大，只会让下一次校正提前
+        self._estimated_entries += 1
+        self._estimated_bytes += size
+
+    def _over_limit(self, entries: int, size: int) -> bool:
+        return entries > self.max_entries or (self.max_bytes is not None and size > self.max_bytes)
+
+    def _evict(self) -> int:
+        if not self._over_limit(self._estimated_entries, self._estimated_bytes):
+            return 0
+        # 先清理已过期的条目（不计入淘汰数），再按实际用量判断
+        self._conn.execute(
+            f"DELETE FROM {self.table_name} WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+        )
+        entries, size = self._usage()
+        evicted = 0
+        if self._over_limit(entries, size):
+            # 按最近使用时间从旧到新删除，直到条目数和字节数都回到水位以内（至少保留最新的一条）
+            target_entries = max(1, int(self.max_entries * _EVICT_WATERMARK))
+            target_bytes = int(self.max_bytes * _EVICT_WATERMARK) if self.max_bytes is not None else None
+            for (entry_size,) in self._conn.execute(
+                    f"SELECT size FROM {self.table_name} ORDER BY accessed_at LIMIT ?", (entries - 1,)
+            ).fetchall():
+                if entries <= target_entries and (target_bytes is None or size <= target_bytes):
+                    break
+                evicted += 1
+                entries -= 1
+                size -= entry_size
+            self._conn.execute(
+                f"DELETE FROM {self.table_name} WHERE key IN "
+                f"(SELECT key FROM {self.table_name} ORDER BY accessed_at LIMIT ?)",
+                (evicted,),
+            )
+        self._estimated_entries, self._estimated_bytes = entries, size
+        return evicted
+
+    def _delete(self, key: str) -> None:
+        self._conn.execute(f"DELETE FROM {self.table_name} WHERE key = ?", (key,))
+
+    def _clear(self) -> None:
+        self._conn.execute(f"DELETE FROM {self.table_name}")
+        self._estimated_entries = self._estimated_bytes = 0
+
+    def _usage(self) -> Tuple[int, int]:
+        entries, size = self._conn.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table_name}"
+        ).fetchone()
+        return entries, size
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._mutex:
+            self._conn.close()
@@ -0,0 +1,211 @@
+# ai_agent/agent/a2a/singleflight.py
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+def normalize_message(message: str) -> str:
+    """规范化消息文本：去掉首尾空白并把连续空白合并为一个空格"""
+    return " ".join(message.split())
+
+
+def request_key(base_urls: Sequence[str], message: str, scope: Optional[str] = None) -> str:
+    """
+    计算一次A2A请求的去重键
+
+    Args:
+        base_urls: 远程服务（所有副本）的基础URL
+        message: 用户消息，规范化后参与计算
+        scope: 作用域（例如租户或用户ID），不同作用域的相同请求互不共享结果
+
+    Returns:
+        str: 请求键（sha256十六进制）
+    """
+    payload = json.dumps(
+        [sorted(url.rstrip("/") for url in base_urls), scope, normalize_message(message)],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _Call:
+    """一次进行中的共享调用"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class _Stream:
+    """一次进行中的共享流，保存已产出的数据块供后加入的订阅者重放"""
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    def notify(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def wait(self) -> None:
+        await self._changed.wait()
+
+
+class SingleFlight:
+    """
+    合并相同的进行中请求（single-flight）
+
+    同一事件循环上键相同的并发调用只执行一次，所有等待者共享结果或异常；
+    流式调用的订阅者先重放已产出的数据块，再跟随后续数据块。
+    调用结束后立即移除，之后的相同请求会重新执行（结果缓存不在这里处理）。
+    所有等待者都取消时，共享调用也随之取消。
+    """
+
+    def __init__(self):
+        self._calls: Dict[Tuple[asyncio.AbstractEventLoop, Hashable], _Call] = {}
+        self._streams: Dict[Tuple[asyncio.AbstractEventLoop, Hashable], _Stream] = {}
+        self._mutex = threading.Lock()
+
+        self._executed = 0
+        self._shared = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        执行调用，键相同的调用正在进行时等待并共享其结果
+
+        Args:
+            key: 请求键
+            func: 实际执行调用的协程函数
+
+        Returns:
+            共享调用的结果（异常同样共享）
+        """
+        loop = asyncio.get_running_loop()
+        flight_key = (loop, key)
+        with self._mutex:
+            call = self._calls.get(flight_key)
+            if call is None:
+                call = self._calls[flight_key] = _Call(loop.create_task(func()))
+                call.task.add_done_callback(lambda _: self._forget(self._calls, flight_key, call))
+                self._executed += 1
+            else:
+                self._shared += 1
+            call.waiters += 1
+
+        try:
+            # shield：单个等待者被取消不影响其他等待者
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # 立即移除，之后的相同请求不会加入正在取消的调用
+                self._forget(self._calls, flight_key, call)
+                call.task.cancel()
+
+    async def stream(self, key: Hashable, func: Callable[[], AsyncIterator[T]]) -> AsyncIterator[T]:
+        """
+        订阅流式调用，键相同的流正在进行时从头重放并跟随其数据块
+
+        Args:
+            key: 请求键
+            func: 返回实际数据流的函数
+
+        Yields:
+            共享流的数据块（流的异常会在每个订阅者中重新抛出）
+        """
+        loop = asyncio.get_running_loop()
+        flight_key = (loop, key)
+        with self._mutex:
+            flight = self._streams.get(flight_key)
+            if flight is None:
+                flight = self._streams[flight_key] = _Stream()
+                flight.task = loop.create_task(self._pump(flight_key, flight, func))
+                self._executed += 1
+            else:
+                self._shared += 1
+            flight.subscribers += 1
+
+        index = 0
+        try:
+            while True:
+                if index < len(flight.items):
+                    item = flight.items[index]
+                    index += 1
+                    yield item
+                elif flight.done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                else:
+                    await flight.wait()
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done:
+                self._forget(self._streams, flight_key, flight)
+                flight.task.cancel()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        获取合并统计
+
+        Returns:
+            Dict: 进行中的调用数、实际执行次数与被合并的次数
+        """
+        with self._mutex:
+            return {
+                "in_flight": len(self._calls) + len(self._streams),
+                "executed": self._executed,
+                "shared": self._shared,
+            }
+
+    async def _pump(self, flight_key, flight: _Stream, func: Callable[[], AsyncIterator[T]]) -> None:
+        """在独立任务中消费实际数据流，订阅者中途退出不影响其他订阅者"""
+        source = func()
+        try:
+            async for item in source:
+                flight.items.append(item)
+                flight.notify()
+        except Exception as e:
+            flight.error = e
+        finally:
+            # 所有订阅者都退出时任务被取消，及时关闭实际数据流以释放连接和并发名额
+            aclose = getattr(source, "aclose", None)
+            if aclose is not None:
+                await aclose()
+            flight.done = True
+            flight.notify()
+            self._forget(self._streams, flight_key, flight)
+
+    def _forget(self, flights: Dict, flight_key, flight: Any) -> None:
+        with self._mutex:
+            if flights.get(flight_key) is flight:
+                del flights[flight_key]
+
+
+_default_group: Optional[SingleFlight] = None
+_default_group_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    """
+    获取进程级默认的请求合并组，指向同一远程服务的所有A2AAgent共享
+
+    Returns:
+        SingleFlight: 默认请求合并组
+    """
+    global _default_group
+    if _default_group is None:
+        with _default_group_lock:
+            if _default_group is None:
+                _default_group = SingleFlight()
+    return _default_group
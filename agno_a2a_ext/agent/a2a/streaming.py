@@ -0,0 +1,157 @@
+# ai_agent/agent/a2a/streaming.py
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+from a2a.types import Message, Task, TaskArtifactUpdateEvent, TaskState, TaskStatusUpdateEvent
+
+from agno_a2a_ext.agent.a2a.errors import A2ARemoteError
+
+STREAM_MODES = ("delta", "accumulated")
+
+_TERMINAL_STATES = {TaskState.completed, TaskState.canceled, TaskState.failed, TaskState.rejected}
+_FAILED_STATES = {TaskState.failed, TaskState.rejected}
+
+
+def parts_text(parts: Optional[List[Any]]) -> str:
+    """拼接一组Part中的文本内容"""
+    if not parts:
+        return ""
+    texts = []
+    for part in parts:
+        root = getattr(part, "root", part)
+        text = getattr(root, "text", None)
+        if text:
+            texts.append(text)
+    return "".join(texts)
+
+
+class ContentBuffer:
+    """
+    追加式文本缓冲区
+
+    以列表保存增量片段，只在需要完整文本时拼接一次并缓存结果，
+    避免逐块字符串拼接带来的二次方复制开销。
+    """
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._length = 0
+        self._joined: Optional[str] = None
+
+    def append(self, text: str) -> None:
+        if not text:
+            return
+        self._parts.append(text)
+        self._length += len(text)
+        self._joined = None
+
+    def text(self) -> str:
+        if self._joined is None:
+            self._joined = "".join(self._parts)
+            # 拼接后只保留一个片段，后续追加只需拼接新增部分
+            self._parts = [self._joined] if self._joined else []
+        return self._joined
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __bool__(self) -> bool:
+        return self._length > 0
+
+
+class StreamState:
+    """
+    A2A流式响应的增量解析状态
+
+    按A2A事件语义把每个数据块转换为本次新增的文本：
+        - TaskArtifactUpdateEvent(append=True)：片段本身就是增量
+        - 不带append的Artifact或Message：可能是整段重发，只取超出已接收部分的后缀
+        - 进行中的TaskStatusUpdateEvent：进度说明，不计入内容
+        - 终态Task/状态且尚无内容时：取其中的结果文本
+    """
+
+    def __init__(self):
+        self.buffer = ContentBuffer()
+        self.task_id: Optional[str] = None
+        self.context_id: Optional[str] = None
+        self.state: Optional[TaskState] = None
+        # artifact_id -> 已接收的文本长度
+        self._artifact_lengths: Dict[str, int] = {}
+        self._last_message_text = ""
+
+    def consume(self, chunk: Any) -> str:
+        """
+        解析一个流式数据块，返回新增文本（可能为空字符串）
+
+        Raises:
+            A2ARemoteError: 远程返回JSON-RPC错误或任务失败
+        """
+        event = chunk
+        root = getattr(chunk, "root", None)
+        if root is not None:
+            error = getattr(root, "error", None)
+            if error is not None:
+                raise A2ARemoteError(getattr(error, "message", str(error)), code=getattr(error, "code", None))
+            event = getattr(root, "result", root)
+
+        if isinstance(event, dict):
+            delta = event.get("content", "") or ""
+        elif isinstance(event, TaskArtifactUpdateEvent):
+            self._track(event.task_id, event.context_id)
+            delta = self._consume_artifact(event.artifact.artifact_id, parts_text(event.artifact.parts), event.append)
+        elif isinstance(event, Message):
+            self._track(event.task_id, event.context_id)
+            delta = self._consume_message(parts_text(event.parts))
+        elif isinstance(event, TaskStatusUpdateEvent):
+            self._track(event.task_id, event.context_id)
+            delta = self._consume_status(event.status.state, event.status.message)
+        elif isinstance(event, Task):
+            self._track(event.id, event.context_id)
+            delta = self._consume_status(event.status.state, event.status.message)
+            if not delta and not self.buffer and event.status.state == TaskState.completed:
+                for artifact in event.artifacts or []:
+                    delta += self._consume_artifact(artifact.artifact_id, parts_text(artifact.parts), False)
+        else:
+            delta = ""
+
+        self.buffer.append(delta)
+        return delta
+
+    @property
+    def finished(self) -> bool:
+        """远程任务是否已进入终态"""
+        return self.state in _TERMINAL_STATES
+
+    def _track(self, task_id: Optional[str], context_id: Optional[str]) -> None:
+        if task_id:
+            self.task_id = task_id
+        if context_id:
+            self.context_id = context_id
+
+    def _consume_artifact(self, artifact_id: str, text: str, append: Optional[bool]) -> str:
+        received = self._artifact_lengths.get(artifact_id)
+        if append or received is None:
+            self._artifact_lengths[artifact_id] = (received or 0) + len(text)
+            return text
+        # 同一artifact的整段重发：只取新增的后缀
+        if len(text) <= received:
+            return ""
+        self._artifact_lengths[artifact_id] = len(text)
+        return text[received:]
+
+    def _consume_message(self, text: str) -> str:
+        previous = self._last_message_text
+        self._last_message_text = text
+        if previous and text.startswith(previous):
+            return text[len(previous):]
+        return text
+
+    def _consume_status(self, state: TaskState, message: Optional[Message]) -> str:
+        self.state = state
+        text = parts_text(message.parts) if message is not None else ""
+        if state in _FAILED_STATES:
+            raise A2ARemoteError(text or f"远程任务状态: {state.value}")
+        if state in _TERMINAL_STATES and not self.buffer:
+            return text
+        return ""
@@ -0,0 +1,110 @@
+# ai_agent/agent/a2a/wire.py
+from __future__ import annotations
+
+from typing import Any, Optional
+
+import httpx
+
+# A2A调用可选的编码格式
+WIRE_FORMATS = ("json", "msgpack")
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+# 请求msgpack响应时的Accept；不支持msgpack的服务忽略它，照常返回JSON
+MSGPACK_ACCEPT = f"{MSGPACK_MEDIA_TYPE}, application/json;q=0.9"
+
+
+def import_msgpack() -> Any:
+    """
+    导入msgpack模块
+
+    Raises:
+        ImportError: 未安装msgpack
+    """
+    try:
+        import msgpack
+    except ImportError:
+        raise ImportError("`msgpack` not installed. Please install it using `pip install msgpack`")
+    return msgpack
+
+
+def msgpack_available() -> bool:
+    """是否安装了msgpack"""
+    try:
+        import_msgpack()
+    except ImportError:
+        return False
+    return True
+
+
+def accepts_media_type(accept: Optional[str], media_type: str) -> bool:
+    """
+    Accept请求头是否明确接受某个媒体类型（q大于0，不含通配符）
+
+    Args:
+        accept: Accept请求头
+        media_type: 媒体类型，例如application/msgpack
+
+    Returns:
+        bool: 是否接受
+    """
+    for item in (accept or "").split(","):
+        name, *params = [part.strip() for part in item.split(";")]
+        if name.lower() != media_type:
+            continue
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+class MsgpackResponse(httpx.Response):
+    """msgpack编码的响应，json()直接解码msgpack，调用方（A2AClient）无需感知编码"""
+
+    def json(self, **kwargs: Any) -> Any:
+        return import_msgpack().unpackb(self.content)
+
+
+class WireFormatClient(httpx.AsyncClient):
+    """
+    以msgpack接收A2A JSON-RPC响应的httpx客户端
+
+    非流式的JSON-RPC请求携带Accept: application/msgpack，支持的服务（AgentServer/TeamServer）以msgpack返回结果，
+    比JSON更紧凑，解码也更快；其他服务照常返回JSON，行为与普通客户端一致。
+    请求体仍使用JSON：请求通常很小，并且不依赖对方的版本（同一地址后的副本版本不一致时也不会出错）。
+    流式请求（SSE）不受影响。
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        import_msgpack()
+        super().__init__(*args, **kwargs)
+
+    def build_request(self, method: str, url: Any, **kwargs: Any) -> httpx.Request:
+        request = super().build_request(method, url, **kwargs)
+        # 只替换默认的Accept（SSE请求会明确指定text/event-stream）
+        if request.method == "POST" and request.headers.get("accept", "*/*") == "*/*":
+            request.headers["Accept"] = MSGPACK_ACCEPT
+        return request
+
+    async def send(self, request: httpx.Request, **kwargs: Any) -> httpx.Response:
+        response = await super().send(request, **kwargs)
+        content_type = response.headers.get("content-type", "")
+        if content_type.split(";")[0].strip().lower() != MSGPACK_MEDIA_TYPE:
+            return response
+        await response.aread()
+        # 响应体已解压，新的响应不再携带Content-Encoding
+        headers = [
+            (name, value) for name, value in response.headers.multi_items()
+            if name.lower() not in ("content-encoding", "content-length")
+        ]
+        return MsgpackResponse(
+            status_code=response.status_code,
+            headers=headers,
+            content=response.content,
+            request=response.request,
+            extensions=response.extensions,
+        )
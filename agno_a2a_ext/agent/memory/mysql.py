@@ -17,6 +17,8 @@ from agno.memory.db import MemoryDb
 from agno.memory.row import MemoryRow
 from agno.utils.log import log_debug, logger
 
+from agno_a2a_ext.observability.metrics import timed_db_operation
+
 
 class MySqlMemoryDb(MemoryDb):
     def __init__(
@@ -109,6 +111,7 @@ class MySqlMemoryDb(MemoryDb):
                 logger.error(f"Error creating table '{self.table.fullname}': {e}")
                 raise
 
+    @timed_db_operation("mysql_memory")
     def memory_exists(self, memory: MemoryRow) -> bool:
         columns = [self.table.c.id]
         with self.Session() as sess, sess.begin():
@@ -116,6 +119,7 @@ class MySqlMemoryDb(MemoryDb):
             result = sess.execute(stmt).first()
             return result is not None
 
+    @timed_db_operation("mysql_memory")
     def read_memories(
             self, user_id: Optional[str] = None, limit: Optional[int] = None, sort: Optional[str] = None
     ) -> List[MemoryRow]:
@@ -144,6 +148,7 @@ class MySqlMemoryDb(MemoryDb):
             # self.create()
         return memories
 
+    @timed_db_operation("mysql_memory")
     def upsert_memory(self, memory: MemoryRow, create_and_retry: bool = True) -> None:
         """Create a new memory if it does not exist, otherwise update the existing memory"""
 
@@ -179,6 +184,7 @@ class MySqlMemoryDb(MemoryDb):
                 return self.upsert_memory(memory, create_and_retry=False)
             return None
 
+    @timed_db_operation("mysql_memory")
     def delete_memory(self, id: str) -> None:
         with self.Session() as sess, sess.begin():
             stmt = delete(self.table).where(self.table.c.id == id)
@@ -197,6 +203,7 @@ class MySqlMemoryDb(MemoryDb):
             logger.error(e)
             return False
 
+    @timed_db_operation("mysql_memory")
     def clear(self) -> bool:
         with self.Session() as sess, sess.begin():
             stmt = delete(self.table)
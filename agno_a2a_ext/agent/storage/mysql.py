@@ -9,6 +9,8 @@ from agno.storage.session.team import TeamSession
 from agno.storage.session.workflow import WorkflowSession
 from agno.utils.log import log_debug, log_info, log_warning, logger
 
+from agno_a2a_ext.observability.metrics import timed_db_operation
+
 try:
     from sqlalchemy.engine import Engine, create_engine
     from sqlalchemy.inspection import inspect
@@ -316,6 +318,7 @@ class MySqlStorage(Storage):
                 logger.error(f"Could not create table: '{self.table.fullname}': {e}")
                 raise
 
+    @timed_db_operation("mysql_storage")
     def read(self, session_id: str, user_id: Optional[str] = None) -> Optional[Session]:
         """
         Read an Session from the database.
@@ -387,6 +390,7 @@ class MySqlStorage(Storage):
                 log_debug(traceback.format_exc())
         return None
 
+    @timed_db_operation("mysql_storage")
     def get_all_session_ids(self, user_id: Optional[str] = None, entity_id: Optional[str] = None) -> List[str]:
         """
         Get all session IDs, optionally filtered by user_id and/or entity_id.
@@ -443,6 +447,7 @@ class MySqlStorage(Storage):
                 log_debug(f"Error getting session IDs: {e}")
         return []
 
+    @timed_db_operation("mysql_storage")
     def get_all_sessions(self, user_id: Optional[str] = None, entity_id: Optional[str] = None) -> List[Session]:
         """
         Get all sessions, optionally filtered by user_id and/or entity_id.
@@ -567,6 +572,7 @@ class MySqlStorage(Storage):
             logger.error(f"Error during schema upgrade: {e}")
             raise
 
+    @timed_db_operation("mysql_storage")
     def upsert(self, session: Session, create_and_retry: bool = True) -> Optional[Session]:
         """
         Insert or update an Session in the database.
@@ -660,6 +666,7 @@ class MySqlStorage(Storage):
                 return None
         return self.read(session_id=session.session_id)
 
+    @timed_db_operation("mysql_storage")
     def delete_session(self, session_id: Optional[str] = None):
         """
         Delete a session from the database.
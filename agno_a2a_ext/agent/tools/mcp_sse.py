@@ -1,5 +1,6 @@
 import asyncio
 from typing import Callable, List, Optional
+from urllib.parse import urlsplit
 
 from agno.tools import Toolkit
 from agno.tools.function import Function
@@ -7,6 +8,8 @@ from agno.utils.log import log_debug, logger
 
 from agno.tools.mcp import MCPTools
 
+from agno_a2a_ext.observability.metrics import track_tool_call
+
 
 class SSEMCPTools(Toolkit):
     """
@@ -31,6 +34,9 @@ class SSEMCPTools(Toolkit):
         self.url = url
         self.include_tools = include_tools
         self.exclude_tools = exclude_tools
+        # 指标中的服务标签，去掉查询参数（可能携带令牌）
+        parts = urlsplit(url)
+        self._metrics_server = f"{parts.scheme}://{parts.netloc}{parts.path}"
 
         # 内部MCPTools实例
         self._mcp_tools = None
@@ -150,7 +156,12 @@ class SSEMCPTools(Toolkit):
 
             try:
                 # 调用原始函数 - 传递agent参数
-                return await original_entrypoint(agent, *args, **kwargs)
+                with track_tool_call(self._metrics_server, tool_name) as call:
+                    result = await original_entrypoint(agent, *args, **kwargs)
+                    # agno把MCP工具的错误转换为"Error: ..."返回值
+                    if isinstance(result, str) and result.startswith("Error: "):
+                        call.fail()
+                return result
             except Exception as e:
                 logger.error(f"调用工具失败 {tool_name}: {e}")
                 # 处理连接错误
@@ -0,0 +1 @@
+# agno_a2a_ext/observability/__init__.py
@@ -0,0 +1,691 @@
+# agno_a2a_ext/observability/metrics.py
+from __future__ import annotations
+
+import functools
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# /metrics响应的Content-Type（Prometheus文本格式0.0.4）
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 运行、A2A调用等以秒计的延迟分桶
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+# 数据库查询、HTTP路由等通常很快的操作
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# 多进程模式下工作进程写快照的间隔（秒）
+SNAPSHOT_INTERVAL = 1.0
+# 已退出的工作进程留下的快照文件前缀：只保留计数器和直方图，不再计入仪表
+_RETIRED_PREFIX = "retired-"
+
+
+class _CounterChild:
+    __slots__ = ("_value", "_lock")
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def _reset(self) -> None:
+        with self._lock:
+            self._value = 0.0
+
+    def _sample(self) -> float:
+        return self._value
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value -= amount
+
+    def set(self, value: float) -> None:
+        self._value = float(value)
+
+
+class _HistogramChild:
+    __slots__ = ("_bounds", "_counts", "_sum", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self._bounds = bounds
+        # 最后一个位置是+Inf桶
+        self._counts = [0] * (len(bounds) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self._bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def _reset(self) -> None:
+        with self._lock:
+            self._counts = [0] * len(self._counts)
+            self._sum = 0.0
+
+    def _sample(self) -> List[Any]:
+        with self._lock:
+            return [list(self._counts), self._sum]
+
+
+class _Metric:
+    """一个指标族：同名、不同标签值的一组时间序列"""
+
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: Any) -> Any:
+        """
+        获取一组标签值对应的时间序列（首次使用时创建）
+
+        Args:
+            *values: 按labelnames顺序的标签值
+
+        Raises:
+            ValueError: 标签值个数与labelnames不一致
+        """
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name}需要{len(self.labelnames)}个标签值，收到{len(key)}个")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def _reset(self) -> None:
+        with self._lock:
+            children = list(self._children.values())
+        for child in children:
+            child._reset()
+
+    def _snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            children = list(self._children.items())
+        return {
+            "type": self.type,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "samples": [[list(key), child._sample()] for key, child in children],
+        }
+
+
+class Counter(_Metric):
+    """只增不减的计数器"""
+
+    type = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+
+class Gauge(_Metric):
+    """可增可减的当前值（进行中的运行数、队列长度等）"""
+
+    type = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+
+class Histogram(_Metric):
+    """按分桶累计观测值的直方图（延迟分布）"""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(bound) for bound in buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def _snapshot(self) -> Dict[str, Any]:
+        snapshot = super()._snapshot()
+        snapshot["buckets"] = list(self.buckets)
+        return snapshot
+
+
+class MetricsRegistry:
+    """
+    进程级的指标注册表
+
+    - 记录一次观测只有一次字典查找和一次加锁的加法，可以在生产环境中常开
+    - 进程内状态（并发限制器、准入控制等）通过收集函数在导出前刷新到仪表，平时没有额外开销
+    - 多进程模式下每个工作进程定期把快照写到共享目录，任一工作进程响应/metrics时合并所有快照：
+      计数器和直方图累加（包括已退出的工作进程），仪表只累加仍在运行的工作进程
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+        self._directory: Optional[str] = None
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """获取或创建计数器"""
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """获取或创建仪表"""
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """获取或创建直方图"""
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def _get_or_create(self, cls, name: str, documentation: str, labelnames: Sequence[str], **kwargs: Any):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"指标{name}已以不同的类型或标签注册")
+            return metric
+
+    def register_collector(self, collector: Callable[[], None]) -> None:
+        """
+        注册导出前调用的收集函数，用于把进程内状态刷新到仪表
+
+        Args:
+            collector: 无参函数，异常会被忽略
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        当前进程的指标快照（可以JSON序列化）
+
+        Returns:
+            Dict: 指标名 -> 类型、说明、标签名与各时间序列的值
+        """
+        with self._lock:
+            collectors = list(self._collectors)
+            metrics = list(self._metrics.values())
+        for collector in collectors:
+            try:
+                collector()
+            except Exception:
+                pass
+        return {metric.name: metric._snapshot() for metric in metrics}
+
+    def render(self) -> str:
+        """
+        以Prometheus文本格式导出指标（多进程模式下合并所有工作进程）
+
+        Returns:
+            str: /metrics响应体
+        """
+        if self._directory is None:
+            return render_snapshot(self.snapshot())
+        self.write_snapshot()
+        return render_snapshot(read_snapshots(self._directory))
+
+    def share(self, directory: str, interval: float = SNAPSHOT_INTERVAL) -> None:
+        """
+        在工作进程中调用：清空从监督进程继承的值，之后定期把快照写到共享目录
+
+        Args:
+            directory: 监督进程创建的共享目录
+            interval: 写快照的间隔（秒）
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric._reset()
+        self._directory = directory
+        self.write_snapshot()
+
+        def writer():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.write_snapshot()
+                except Exception:
+                    pass
+
+        threading.Thread(target=writer, name="metrics-snapshot", daemon=True).start()
+
+    def write_snapshot(self) -> None:
+        """把当前进程的快照写到共享目录（先写临时文件再替换，读取方不会读到一半的内容）"""
+        if self._directory is None:
+            return
+        path = os.path.join(self._directory, f"{os.getpid()}.json")
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+
+_registry: Optional[MetricsRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> MetricsRegistry:
+    """
+    获取进程级共享的指标注册表
+
+    Returns:
+        MetricsRegistry: 指标注册表
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = MetricsRegistry()
+    return _registry
+
+
+def retire_worker(directory: str, pid: int) -> None:
+    """
+    监督进程在工作进程退出后调用：保留它的计数器和直方图，不再计入它的仪表
+
+    Args:
+        directory: 共享目录
+        pid: 已退出的工作进程
+    """
+    try:
+        os.replace(os.path.join(directory, f"{pid}.json"), os.path.join(directory, f"{_RETIRED_PREFIX}{pid}.json"))
+    except FileNotFoundError:
+        pass
+
+
+def read_snapshots(directory: str) -> Dict[str, Dict[str, Any]]:
+    """
+    合并共享目录中所有工作进程的快照
+
+    Args:
+        directory: 共享目录
+
+    Returns:
+        Dict: 合并后的快照，格式与MetricsRegistry.snapshot()一致
+    """
+    merged: Dict[str, Dict[str, Any]] = {}
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        try:
+            with open(path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        _merge_snapshot(merged, snapshot, live=not os.path.basename(path).startswith(_RETIRED_PREFIX))
+    return {name: {**metric, "samples": [[list(key), value] for key, value in metric["samples"].items()]}
+            for name, metric in merged.items()}
+
+
+def _merge_snapshot(merged: Dict[str, Dict[str, Any]], snapshot: Dict[str, Dict[str, Any]], live: bool) -> None:
+    for name, metric in snapshot.items():
+        if metric["type"] == "gauge" and not live:
+            continue
+        target = merged.get(name)
+        if target is None:
+            target = merged[name] = {**metric, "samples": {}}
+        elif target.get("buckets") != metric.get("buckets"):
+            continue
+        samples = target["samples"]
+        for key, value in metric["samples"]:
+            key = tuple(key)
+            current = samples.get(key)
+            if current is None:
+                samples[key] = value
+            elif metric["type"] == "histogram":
+                samples[key] = [[a + b for a, b in zip(current[0], value[0])], current[1] + value[1]]
+            else:
+                samples[key] = current + value
+
+
+def render_snapshot(snapshot: Dict[str, Dict[str, Any]]) -> str:
+    """
+    把快照转换为Prometheus文本格式
+
+    Args:
+        snapshot: MetricsRegistry.snapshot()或read_snapshots()的结果
+
+    Returns:
+        str: 文本格式的指标
+    """
+    lines: List[str] = []
+    for name in sorted(snapshot):
+        metric = snapshot[name]
+        if not metric["samples"]:
+            continue
+        lines.append(f"# HELP {name} {_escape_help(metric['help'])}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        labelnames = metric["labelnames"]
+        for values, value in sorted(metric["samples"], key=lambda sample: sample[0]):
+            pairs = list(zip(labelnames, values))
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{_format_labels(pairs)} {_format_value(value)}")
+                continue
+            counts, total = value
+            cumulative = 0
+            for bound, count in zip(metric["buckets"] + ["+Inf"], counts):
+                cumulative += count
+                le = bound if bound == "+Inf" else _format_value(bound)
+                lines.append(f"{name}_bucket{_format_labels(pairs + [('le', le)])} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(pairs)} {_format_value(total)}")
+            lines.append(f"{name}_count{_format_labels(pairs)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _format_labels(pairs: List[Tuple[str, Any]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in pairs) + "}"
+
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+# ---------------------------------------------------------------------------
+# 本包使用的指标
+# ---------------------------------------------------------------------------
+
+_metrics = get_registry()
+
+HTTP_REQUESTS = _metrics.counter(
+    "agno_a2a_http_requests_total", "HTTP requests handled, by route template and status code",
+    ("server", "route", "method", "status"),
+)
+HTTP_REQUEST_DURATION = _metrics.histogram(
+    "agno_a2a_http_request_duration_seconds", "Time until the HTTP response was fully sent",
+    ("server", "route", "method"), buckets=FAST_BUCKETS + (10.0, 30.0, 60.0, 120.0, 300.0),
+)
+
+RUNS = _metrics.counter(
+    "agno_a2a_runs_total", "Finished agent/team runs by outcome (ok, error, cancelled)",
+    ("kind", "name", "transport", "status"),
+)
+RUN_DURATION = _metrics.histogram(
+    "agno_a2a_run_duration_seconds", "Wall time of agent/team runs", ("kind", "name", "transport"),
+)
+RUN_TTFT = _metrics.histogram(
+    "agno_a2a_run_ttft_seconds", "Time from run start to the first streamed chunk", ("kind", "name", "transport"),
+)
+RUN_CHUNKS = _metrics.counter(
+    "agno_a2a_run_chunks_total", "Streamed chunks sent to callers", ("kind", "name", "transport"),
+)
+RUNS_IN_FLIGHT = _metrics.gauge(
+    "agno_a2a_runs_in_flight", "Agent/team runs currently executing", ("kind", "name", "transport"),
+)
+
+CLIENT_REQUESTS = _metrics.counter(
+    "agno_a2a_client_requests_total", "A2A client calls (one per attempt) by outcome",
+    ("remote", "method", "outcome"),
+)
+CLIENT_REQUEST_DURATION = _metrics.histogram(
+    "agno_a2a_client_request_duration_seconds", "Duration of A2A client calls, including whole streams",
+    ("remote", "method"),
+)
+CLIENT_TTFT = _metrics.histogram(
+    "agno_a2a_client_ttft_seconds", "Time from sending a streaming A2A call to its first chunk", ("remote", "method"),
+)
+CLIENT_ERRORS = _metrics.counter(
+    "agno_a2a_client_errors_total", "Failed A2A client calls by error type", ("remote", "method", "error"),
+)
+
+CLIENT_IN_FLIGHT = _metrics.gauge(
+    "agno_a2a_client_in_flight", "A2A calls holding a concurrency slot, per remote", ("remote",),
+)
+CLIENT_QUEUE_DEPTH = _metrics.gauge(
+    "agno_a2a_client_queue_depth", "A2A calls waiting for a concurrency slot, per remote", ("remote",),
+)
+CLIENT_CONCURRENCY_LIMIT = _metrics.gauge(
+    "agno_a2a_client_concurrency_limit", "Current adaptive concurrency limit, per remote", ("remote",),
+)
+
+ADMISSION_IN_FLIGHT = _metrics.gauge(
+    "agno_a2a_admission_in_flight", "Runs holding an admission slot", ("name",),
+)
+ADMISSION_QUEUE_DEPTH = _metrics.gauge(
+    "agno_a2a_admission_queue_depth", "Requests queued for an admission slot", ("name",),
+)
+ADMISSION_REJECTED = _metrics.counter(
+    "agno_a2a_admission_rejected_total", "Requests rejected by admission control (503)", ("name", "reason"),
+)
+
+DB_QUERY_DURATION = _metrics.histogram(
+    "agno_a2a_db_query_duration_seconds", "Duration of storage/memory database operations",
+    ("db", "table", "operation"), buckets=FAST_BUCKETS,
+)
+DB_ERRORS = _metrics.counter(
+    "agno_a2a_db_errors_total", "Storage/memory database operations that raised", ("db", "table", "operation"),
+)
+
+MCP_TOOL_CALLS = _metrics.counter(
+    "agno_a2a_mcp_tool_calls_total", "MCP tool calls by outcome", ("server", "tool", "status"),
+)
+MCP_TOOL_CALL_DURATION = _metrics.histogram(
+    "agno_a2a_mcp_tool_call_duration_seconds", "Duration of MCP tool calls", ("server", "tool"),
+)
+
+# 当前运行的计时器，流式输出处据此统计首块延迟和数据块数
+_current_run: ContextVar[Optional["RunTimer"]] = ContextVar("a2a_current_run", default=None)
+
+
+def _outcome(error: BaseException) -> str:
+    return "error" if isinstance(error, Exception) else "cancelled"
+
+
+class RunTimer:
+    """一次agent/team运行的计时：开始时间、首块时间、结果"""
+
+    __slots__ = ("labels", "started_at", "first_chunk_at", "status")
+
+    def __init__(self, labels: Tuple[str, str, str]):
+        self.labels = labels
+        self.started_at = time.monotonic()
+        self.first_chunk_at: Optional[float] = None
+        self.status = "ok"
+
+    def chunk(self, count: int = 1) -> None:
+        """记录向调用方输出的数据块，第一次调用时记录首块延迟"""
+        if self.first_chunk_at is None:
+            self.first_chunk_at = time.monotonic()
+            RUN_TTFT.labels(*self.labels).observe(self.first_chunk_at - self.started_at)
+        RUN_CHUNKS.labels(*self.labels).inc(count)
+
+    def fail(self) -> None:
+        """标记运行失败（执行器把异常转换为错误消息、没有向上抛出时调用）"""
+        self.status = "error"
+
+
+@contextmanager
+def track_run(kind: str, name: str, transport: str) -> Iterator[RunTimer]:
+    """
+    统计一次agent/team运行：进行中数量、耗时、结果，以及上下文中的首块延迟和数据块数
+
+    在上下文中创建的asyncio任务继承当前运行，可以通过record_chunk()/fail_run()记录。
+
+    Args:
+        kind: "agent"或"team"
+        name: agent/team名称
+        transport: 运行入口："a2a"或"api"
+    """
+    labels = (kind, name or kind, transport)
+    in_flight = RUNS_IN_FLIGHT.labels(*labels)
+    in_flight.inc()
+    timer = RunTimer(labels)
+    token = _current_run.set(timer)
+    try:
+        yield timer
+    except BaseException as e:
+        timer.status = _outcome(e)
+        raise
+    finally:
+        _current_run.reset(token)
+        in_flight.dec()
+        RUN_DURATION.labels(*labels).observe(time.monotonic() - timer.started_at)
+        RUNS.labels(*labels, timer.status).inc()
+
+
+def record_chunk(count: int = 1) -> None:
+    """当前运行向调用方输出了数据块（不在运行中时忽略）"""
+    timer = _current_run.get()
+    if timer is not None:
+        timer.chunk(count)
+
+
+def fail_run() -> None:
+    """把当前运行标记为失败（不在运行中时忽略）"""
+    timer = _current_run.get()
+    if timer is not None:
+        timer.fail()
+
+
+class ClientCallTimer:
+    """一次A2A客户端调用的计时"""
+
+    __slots__ = ("remote", "method", "started_at", "first_byte_at", "error")
+
+    def __init__(self, remote: str, method: str):
+        self.remote = remote
+        self.method = method
+        self.started_at = time.monotonic()
+        self.first_byte_at: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def mark_first_byte(self) -> None:
+        """流式调用收到首个数据块时调用"""
+        if self.first_byte_at is None:
+            self.first_byte_at = time.monotonic()
+            CLIENT_TTFT.labels(self.remote, self.method).observe(self.first_byte_at - self.started_at)
+
+    def check(self, response: Any) -> None:
+        """远程服务返回JSON-RPC错误（没有抛出异常）时记为失败，错误标签为jsonrpc_<错误码>"""
+        error = getattr(getattr(response, "root", None), "error", None)
+        if error is not None:
+            self.error = f"jsonrpc_{getattr(error, 'code', '')}"
+
+
+def error_label(error: BaseException) -> str:
+    """错误的标签值：HTTP错误为http_<状态码>，其他为异常类名"""
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return f"http_{status}"
+    return type(error).__name__
+
+
+@contextmanager
+def track_client_call(remote: str, method: str) -> Iterator[ClientCallTimer]:
+    """
+    统计一次A2A客户端调用（每次重试单独统计）
+
+    Args:
+        remote: 远程服务的base_url
+        method: JSON-RPC方法，例如message/send
+    """
+    timer = ClientCallTimer(remote, method)
+    outcome = "ok"
+    try:
+        yield timer
+    except BaseException as e:
+        outcome = _outcome(e)
+        if outcome == "error":
+            timer.error = error_label(e)
+        raise
+    finally:
+        if timer.error is not None:
+            outcome = "error"
+            CLIENT_ERRORS.labels(remote, method, timer.error).inc()
+        CLIENT_REQUEST_DURATION.labels(remote, method).observe(time.monotonic() - timer.started_at)
+        CLIENT_REQUESTS.labels(remote, method, outcome).inc()
+
+
+def timed_db_operation(db: str, operation: Optional[str] = None) -> Callable:
+    """
+    统计存储/记忆数据库操作耗时的方法装饰器（表名取self.table_name）
+
+    Args:
+        db: 数据库类型标签，例如mysql_storage
+        operation: 操作名，默认使用方法名
+    """
+
+    def decorator(func: Callable) -> Callable:
+        name = operation or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(self, *args: Any, **kwargs: Any) -> Any:
+            table = getattr(self, "table_name", "")
+            started_at = time.monotonic()
+            try:
+                return func(self, *args, **kwargs)
+            except Exception:
+                DB_ERRORS.labels(db, table, name).inc()
+                raise
+            finally:
+                DB_QUERY_DURATION.labels(db, table, name).observe(time.monotonic() - started_at)
+
+        return wrapper
+
+    return decorator
+
+
+class ToolCallTimer:
+    """一次MCP工具调用的结果"""
+
+    __slots__ = ("status",)
+
+    def __init__(self):
+        self.status = "ok"
+
+    def fail(self) -> None:
+        """标记调用失败（工具以返回值而不是异常报告错误时调用）"""
+        self.status = "error"
+
+
+@contextmanager
+def track_tool_call(server: str, tool: str) -> Iterator[ToolCallTimer]:
+    """
+    统计一次MCP工具调用
+
+    Args:
+        server: MCP服务地址
+        tool: 工具名称
+    """
+    started_at = time.monotonic()
+    call = ToolCallTimer()
+    try:
+        yield call
+    except BaseException as e:
+        call.status = _outcome(e)
+        raise
+    finally:
+        MCP_TOOL_CALL_DURATION.labels(server, tool).observe(time.monotonic() - started_at)
+        MCP_TOOL_CALLS.labels(server, tool, call.status).inc()
@@ -0,0 +1,198 @@
+# agno_a2a_ext/observability/tracing.py
+from __future__ import annotations
+
+import logging
+import os
+import random
+import sys
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Mapping, Optional
+
+from agno.utils.log import logger as agno_logger
+
+DEBUG = logging.DEBUG
+INFO = logging.INFO
+WARNING = logging.WARNING
+ERROR = logging.ERROR
+
+# 请求级调试开关与请求ID的HTTP头
+DEBUG_HEADER = "X-A2A-Debug"
+REQUEST_ID_HEADER = "X-Request-ID"
+
+_LEVEL_NAMES = {"DEBUG": DEBUG, "INFO": INFO, "WARNING": WARNING, "ERROR": ERROR}
+
+# 当前请求是否开启调试输出，以及当前请求的ID
+_request_debug: ContextVar[bool] = ContextVar("a2a_request_debug", default=False)
+_request_id: ContextVar[Optional[str]] = ContextVar("a2a_request_id", default=None)
+
+
+def _parse_level(value: Any) -> int:
+    if isinstance(value, int):
+        return value
+    return _LEVEL_NAMES.get(str(value).upper(), INFO)
+
+
+class _TraceConfig:
+    """进程级的追踪配置"""
+
+    def __init__(self):
+        self.level = _parse_level(os.environ.get("AGNO_A2A_TRACE_LEVEL", "INFO"))
+        self.sample_rate = float(os.environ.get("AGNO_A2A_TRACE_SAMPLE_RATE", "0") or 0)
+
+
+_config = _TraceConfig()
+
+
+class Tracer:
+    """
+    分级的结构化追踪器
+
+    - 消息使用%格式化和参数，只有在日志会被输出时才格式化；未开启时只有一次级别比较的开销
+    - 关键字参数作为结构化字段附加在消息末尾（key=value）
+    - DEBUG级别在全局级别之外，还可以通过请求级开关（请求头或采样）为单个请求开启
+    - 输出通过agno的日志处理器，与agno自身的日志格式一致
+    """
+
+    __slots__ = ("name",)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def enabled(self, level: int = DEBUG) -> bool:
+        """该级别的日志是否会被输出，用于包裹需要额外计算的调试代码块"""
+        return level >= _config.level or (level >= DEBUG and _request_debug.get())
+
+    def debug(self, msg: str, *args: Any, **fields: Any) -> None:
+        if DEBUG >= _config.level or _request_debug.get():
+            self._emit(DEBUG, msg, args, fields)
+
+    def info(self, msg: str, *args: Any, **fields: Any) -> None:
+        if INFO >= _config.level or _request_debug.get():
+            self._emit(INFO, msg, args, fields)
+
+    def warning(self, msg: str, *args: Any, **fields: Any) -> None:
+        if WARNING >= _config.level or _request_debug.get():
+            self._emit(WARNING, msg, args, fields)
+
+    def error(self, msg: str, *args: Any, exc_info: bool = False, **fields: Any) -> None:
+        if ERROR >= _config.level or _request_debug.get():
+            self._emit(ERROR, msg, args, fields, exc_info=exc_info)
+
+    def exception(self, msg: str, *args: Any, **fields: Any) -> None:
+        """记录错误并附带当前异常的堆栈"""
+        self.error(msg, *args, exc_info=True, **fields)
+
+    def _emit(self, level: int, msg: str, args: tuple, fields: Dict[str, Any], exc_info: bool = False) -> None:
+        request_id = _request_id.get()
+        if request_id is not None:
+            fields.setdefault("request_id", request_id)
+        if fields:
+            msg = msg + " | " + " ".join(f"{key}=%s" for key in fields)
+            args = args + tuple(fields.values())
+        record = agno_logger.makeRecord(
+            self.name, level, "(unknown file)", 0, msg, args,
+            exc_info=sys.exc_info() if exc_info else None,
+        )
+        # 绕过agno logger自身的级别，由追踪配置决定是否输出
+        agno_logger.handle(record)
+
+
+_tracers: Dict[str, Tracer] = {}
+_tracers_lock = threading.Lock()
+
+
+def get_tracer(name: str) -> Tracer:
+    """
+    获取指定名称的追踪器（通常使用模块的__name__）
+
+    Args:
+        name: 追踪器名称
+
+    Returns:
+        Tracer: 追踪器
+    """
+    tracer = _tracers.get(name)
+    if tracer is None:
+        with _tracers_lock:
+            tracer = _tracers.setdefault(name, Tracer(name))
+    return tracer
+
+
+def set_trace_level(level: Any) -> None:
+    """
+    设置全局追踪级别
+
+    Args:
+        level: 日志级别，可以是logging级别数值或"DEBUG"/"INFO"/"WARNING"/"ERROR"
+    """
+    _config.level = _parse_level(level)
+
+
+def set_sample_rate(rate: float) -> None:
+    """
+    设置请求级调试的采样率
+
+    Args:
+        rate: 0~1之间的采样率，被采样的请求会输出DEBUG级别的追踪信息
+    """
+    _config.sample_rate = max(0.0, min(1.0, rate))
+
+
+def is_request_debug() -> bool:
+    """当前请求是否开启了调试输出"""
+    return _request_debug.get()
+
+
+def current_request_id() -> Optional[str]:
+    """当前请求的ID"""
+    return _request_id.get()
+
+
+def should_debug(headers: Optional[Mapping[str, str]] = None) -> bool:
+    """
+    判断一个请求是否应开启调试输出：请求头显式开启，或被采样命中
+
+    Args:
+        headers: 请求头（键为小写）
+    """
+    if headers is not None:
+        value = headers.get(DEBUG_HEADER.lower())
+        if value is not None:
+            return value.strip().lower() in ("1", "true", "yes", "on")
+    return _config.sample_rate > 0 and random.random() < _config.sample_rate
+
+
+@contextmanager
+def trace_request(debug: bool = False, request_id: Optional[str] = None) -> Iterator[None]:
+    """
+    在上下文中设置请求级的调试开关和请求ID（对其中创建的asyncio任务同样生效）
+
+    Args:
+        debug: 是否为该请求输出DEBUG级别的追踪信息
+        request_id: 请求ID，会附加到该请求的所有追踪记录中
+    """
+    debug_token = _request_debug.set(debug)
+    id_token = _request_id.set(request_id)
+    try:
+        yield
+    finally:
+        _request_id.reset(id_token)
+        _request_debug.reset(debug_token)
+
+
+def propagation_headers() -> Dict[str, str]:
+    """
+    向下游A2A服务传播的追踪请求头，使下游对同一请求也输出调试信息
+
+    Returns:
+        Dict[str, str]: 未开启请求级调试且没有请求ID时为空字典
+    """
+    headers = {}
+    if _request_debug.get():
+        headers[DEBUG_HEADER] = "1"
+    request_id = _request_id.get()
+    if request_id is not None:
+        headers[REQUEST_ID_HEADER] = request_id
+    return headers
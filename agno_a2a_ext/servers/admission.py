@@ -0,0 +1,399 @@
+# agent_server/servers/admission.py
+import asyncio
+import json
+import math
+import time
+import weakref
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Optional
+
+from a2a.types import JSONRPCError, JSONRPCErrorResponse
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+from agno_a2a_ext.agent.a2a.deadline import current_deadline, deadline_from_metadata, remaining
+from agno_a2a_ext.observability.metrics import (
+    ADMISSION_IN_FLIGHT,
+    ADMISSION_QUEUE_DEPTH,
+    ADMISSION_REJECTED,
+    get_registry,
+)
+from agno_a2a_ext.observability.tracing import get_tracer
+from agno_a2a_ext.servers.cancellation import run_until_disconnected
+from agno_a2a_ext.servers.encoding import NegotiatingA2AFastAPIApplication
+from agno_a2a_ext.servers.middleware import run_route
+
+tracer = get_tracer(__name__)
+
+# 请求的Starlette request.state中保存准入名额的属性名，请求处理器据此把名额交给执行任务
+ADMISSION_STATE_KEY = "admission_ticket"
+
+# 需要准入的JSON-RPC方法（会启动一次agent/team运行）
+ADMISSION_METHODS = ("message/send", "message/stream")
+
+# 被拒绝时返回的JSON-RPC错误码（-32000~-32099为实现自定义的服务端错误）
+OVERLOADED_ERROR_CODE = -32000
+
+REJECTED_QUEUE_FULL = "queue_full"
+REJECTED_TIMEOUT = "queue_timeout"
+
+@dataclass
+class AdmissionOptions:
+    """
+    准入控制参数（每个agent/team一组名额，多进程模式下每个工作进程各自计数）
+
+    Attributes:
+        max_concurrent: 同时执行的运行数上限
+        max_queue: 等待名额的请求数上限，队列已满时立即拒绝；0表示不排队
+        queue_timeout: 排队等待的最长时间（秒），同时受请求截止时间约束
+        retry_after: 拒绝响应中Retry-After的最小值（秒），实际值按排队情况估算
+    """
+    max_concurrent: int = 16
+    max_queue: int = 32
+    queue_timeout: float = 10.0
+    retry_after: float = 1.0
+
+    def __post_init__(self):
+        if self.max_concurrent < 1:
+            raise ValueError("max_concurrent must be at least 1")
+        if self.max_queue < 0:
+            raise ValueError("max_queue must not be negative")
+
+
+class AdmissionRejected(Exception):
+    """请求未获得执行名额（队列已满或排队超时）"""
+
+    def __init__(self, message: str, reason: str, retry_after: int):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionTicket:
+    """
+    一个执行名额，release可重复调用（只归还一次）
+
+    A2A请求的名额由请求处理器交给执行任务（handoff），执行结束时归还；
+    非阻塞的message/send在响应返回后仍占用名额，直到后台运行结束。
+    """
+
+    def __init__(self, controller: "AdmissionController"):
+        self._controller = controller
+        self._started_at = time.monotonic()
+        self._claimed = False
+        self._released = False
+
+    def handoff(self, task: asyncio.Future) -> None:
+        """名额改由执行任务持有，任务结束时归还"""
+        self._claimed = True
+        task.add_done_callback(lambda _: self.release())
+
+    def release(self) -> None:
+        """归还名额"""
+        if self._released:
+            return
+        self._released = True
+        self._controller._release(time.monotonic() - self._started_at)
+
+    def release_unclaimed(self) -> None:
+        """请求结束时归还未交给执行任务的名额（例如请求参数错误，没有启动运行）"""
+        if not self._claimed:
+            self.release()
+
+
+class AdmissionController:
+    """
+    单个agent/team的准入控制
+
+    - 同时执行的运行数不超过max_concurrent，超出的请求按到达顺序排队
+    - 队列已满时立即拒绝，排队超过queue_timeout（或请求截止时间）时拒绝，
+      不再接受注定超时的工作：过载时客户端很快收到503和Retry-After，已接受的运行保持正常延迟
+    - Retry-After按队列长度和平均运行时间估算排空时间
+
+    只在服务的事件循环中使用，不需要加锁。
+    """
+
+    def __init__(self, name: str, options: Optional[AdmissionOptions] = None):
+        """
+        初始化准入控制
+
+        Args:
+            name: agent/team名称，用于日志
+            options: 准入控制参数
+        """
+        self.name = name
+        self.options = options or AdmissionOptions()
+
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        # 平滑的运行时间（秒），用于估算Retry-After
+        self._smoothed_duration: Optional[float] = None
+
+        self._admitted = 0
+        self._queued = 0
+        self._rejected: Dict[str, int] = {REJECTED_QUEUE_FULL: 0, REJECTED_TIMEOUT: 0}
+        _controllers.add(self)
+
+    @property
+    def in_flight(self) -> int:
+        """正在执行的运行数"""
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """排队等待的请求数"""
+        return len(self._waiters)
+
+    async def admit(self, deadline: Optional[float] = None) -> AdmissionTicket:
+        """
+        获取执行名额，必要时排队等待
+
+        Args:
+            deadline: 请求自身的截止时间（time.monotonic()时钟），与当前上下文的截止时间取较早者
+
+        Returns:
+            AdmissionTicket: 执行名额，运行结束后需要归还
+
+        Raises:
+            AdmissionRejected: 队列已满或排队超时
+        """
+        ticket = self.try_admit()
+        if ticket is not None:
+            return ticket
+        if len(self._waiters) >= self.options.max_queue:
+            raise self._reject(REJECTED_QUEUE_FULL, "等待队列已满")
+
+        timeout = self.options.queue_timeout
+        deadlines = [value for value in (deadline, current_deadline()) if value is not None]
+        if deadlines:
+            timeout = min(timeout, remaining(min(deadlines)))
+
+        self._queued += 1
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except asyncio.TimeoutError:
+            if not waiter.done() or waiter.cancelled():
+                raise self._reject(REJECTED_TIMEOUT, f"排队等待超过 {timeout:.1f} 秒")
+            # 超时与交付同时发生，名额已经交给了本请求
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # 取消与交付同时发生，名额转交下一个等待者
+                self._release(None)
+            raise
+        finally:
+            waiter.cancel()
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+        self._admitted += 1
+        return AdmissionTicket(self)
+
+    def try_admit(self) -> Optional[AdmissionTicket]:
+        """有空闲名额且无人排队时立即获取，否则返回None（不排队）"""
+        if self._waiters or self._in_flight >= self.options.max_concurrent:
+            return None
+        self._in_flight += 1
+        self._admitted += 1
+        return AdmissionTicket(self)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取当前状态
+
+        Returns:
+            Dict: 名额上限、执行中数量、队列长度以及累计准入/排队/拒绝次数（按原因）
+        """
+        return {
+            "max_concurrent": self.options.max_concurrent,
+            "max_queue": self.options.max_queue,
+            "in_flight": self._in_flight,
+            "queue_depth": len(self._waiters),
+            "admitted": self._admitted,
+            "queued": self._queued,
+            "rejected": dict(self._rejected),
+            "smoothed_duration": self._smoothed_duration,
+        }
+
+    def retry_after(self) -> int:
+        """建议客户端重试前等待的秒数（Retry-After只接受整数秒）"""
+        estimate = self.options.retry_after
+        if self._smoothed_duration is not None:
+            # 当前队列按max_concurrent路并行排空所需的时间
+            batches = (len(self._waiters) + 1) / self.options.max_concurrent
+            estimate = max(estimate, self._smoothed_duration * batches)
+        return max(1, math.ceil(estimate))
+
+    def _release(self, duration: Optional[float]) -> None:
+        """归还名额，直接交给第一个等待者"""
+        if duration is not None:
+            self._smoothed_duration = duration if self._smoothed_duration is None \
+                else 0.8 * self._smoothed_duration + 0.2 * duration
+        for waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+
+    def _reject(self, reason: str, message: str) -> AdmissionRejected:
+        self._rejected[reason] += 1
+        ADMISSION_REJECTED.labels(self.name, reason).inc()
+        retry_after = self.retry_after()
+        tracer.warning("%s过载，拒绝请求: %s（执行中 %s，排队 %s）",
+                       self.name, message, self._in_flight, len(self._waiters))
+        return AdmissionRejected(f"{self.name}过载: {message}", reason, retry_after)
+
+
+# 进程中的准入控制，/metrics导出前刷新它们的执行中数量和队列长度
+_controllers: "weakref.WeakSet[AdmissionController]" = weakref.WeakSet()
+
+
+def _export_metrics() -> None:
+    for controller in list(_controllers):
+        ADMISSION_IN_FLIGHT.labels(controller.name).set(controller.in_flight)
+        ADMISSION_QUEUE_DEPTH.labels(controller.name).set(controller.queue_depth)
+
+
+get_registry().register_collector(_export_metrics)
+
+
+class _AdmittedResponse(Response):
+    """响应发送完毕（或客户端断开）后归还未交给执行任务的名额"""
+
+    def __init__(self, response: Response, ticket: AdmissionTicket):
+        self.response = response
+        self.ticket = ticket
+        self.status_code = response.status_code
+        self.background = response.background
+
+    async def __call__(self, scope, receive, send):
+        self.response.background = self.background
+        try:
+            await self.response(scope, receive, send)
+        finally:
+            self.ticket.release_unclaimed()
+
+
+class AdmissionControlledA2AApplication(NegotiatingA2AFastAPIApplication):
+    """
+    带准入控制的A2A应用
+
+    message/send和message/stream需要先获得执行名额；被拒绝时返回HTTP 503、Retry-After请求头
+    和JSON-RPC错误（data中包含reason和retry_after），不启动运行。A2AAgent把503视为远程过载，
+    按重试策略退避（遵守Retry-After）并降低自身的并发限制。其他方法（tasks/get等）不受限制。
+    """
+
+    def __init__(self, *args: Any, admission: Optional[AdmissionController] = None, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.admission = admission
+
+    async def _handle_requests(self, request: Request) -> Response:
+        if self.admission is None:
+            return await super()._handle_requests(request)
+        try:
+            # 请求体被缓存，父类再次读取时不会重复解析
+            body = await request.json()
+        except Exception:
+            return await super()._handle_requests(request)
+        if not isinstance(body, dict) or body.get("method") not in ADMISSION_METHODS:
+            return await super()._handle_requests(request)
+
+        params = body.get("params")
+        message = params.get("message") if isinstance(params, dict) else None
+        metadata = message.get("metadata") if isinstance(message, dict) else None
+        ticket = self.admission.try_admit()
+        if ticket is None:
+            try:
+                # 请求体已读完，排队期间客户端断开时放弃排队，不为已离开的调用方启动运行
+                ticket = await run_until_disconnected(request, self.admission.admit(deadline_from_metadata(metadata)))
+            except AdmissionRejected as e:
+                return overloaded_jsonrpc_response(body.get("id"), e)
+
+        setattr(request.state, ADMISSION_STATE_KEY, ticket)
+        try:
+            response = await super()._handle_requests(request)
+        except BaseException:
+            ticket.release_unclaimed()
+            raise
+        return _AdmittedResponse(response, ticket)
+
+
+def overloaded_jsonrpc_response(request_id: Any, error: AdmissionRejected) -> Response:
+    """
+    构造过载的JSON-RPC错误响应
+
+    Args:
+        request_id: JSON-RPC请求ID
+        error: 拒绝原因
+
+    Returns:
+        Response: HTTP 503，携带Retry-After
+    """
+    response = JSONRPCErrorResponse(
+        id=request_id if isinstance(request_id, (str, int)) else None,
+        error=JSONRPCError(
+            code=OVERLOADED_ERROR_CODE,
+            message=str(error),
+            data={"reason": error.reason, "retry_after": error.retry_after},
+        ),
+    )
+    return JSONResponse(
+        response.model_dump(mode="json", exclude_none=True),
+        status_code=503,
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
+
+class AdmissionMiddleware:
+    """
+    ServerAPI运行路由的准入控制ASGI中间件
+
+    /v1/agents/{id}/run、/v1/agents/{id}/stream、/v1/playground/agents/{id}/runs以及对应的团队路由
+    按agent_id/team_id分别限制并发，名额在响应（包括流式响应）结束或客户端断开后归还；
+    被拒绝时返回HTTP 503和Retry-After。未知的ID直接交给路由处理（返回404）。
+    """
+
+    def __init__(self, app, controller: Callable[[str, str], Optional[AdmissionController]]):
+        """
+        初始化中间件
+
+        Args:
+            app: 下游ASGI应用
+            controller: 按(类型, ID)查找准入控制的函数，类型为agents或teams，找不到时返回None
+        """
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        route = run_route(scope)
+        controller = self.controller(*route) if route else None
+        if controller is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            ticket = await controller.admit()
+        except AdmissionRejected as e:
+            await _send_overloaded(send, e)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            ticket.release()
+
+
+async def _send_overloaded(send, error: AdmissionRejected) -> None:
+    body = json.dumps(
+        {"detail": str(error), "reason": error.reason, "retry_after": error.retry_after},
+        ensure_ascii=False,
+    ).encode("utf-8")
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode("latin-1")),
+        (b"retry-after", str(error.retry_after).encode("latin-1")),
+    ]
+    await send({"type": "http.response.start", "status": 503, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
@@ -1,196 +1,237 @@
+from typing import Optional, Tuple
 from uuid import uuid4
-import traceback
 
 from a2a.server.agent_execution.agent_executor import AgentExecutor
+from a2a.server.tasks.task_store import TaskStore
 from a2a.types import AgentCard
 from a2a.types import Message, Role, Part, TextPart
 from agno.agent.agent import Agent
 
+from agno_a2a_ext.agent.a2a.deadline import deadline_from_metadata, run_with_deadline
+from agno_a2a_ext.observability.metrics import fail_run
+from agno_a2a_ext.observability.tracing import get_tracer
+from agno_a2a_ext.servers.admission import AdmissionOptions
 from agno_a2a_ext.servers.base import BaseServer
+from agno_a2a_ext.servers.executor import CancellableExecutor
+from agno_a2a_ext.servers.pool import InstancePool
+from agno_a2a_ext.servers.workers import ServingOptions
+from agno_a2a_ext.servers.streaming import (
+    DEFAULT_CHUNK_CHARS,
+    DEFAULT_FLUSH_INTERVAL,
+    RunStreamPublisher,
+    is_streaming_request,
+)
 
+tracer = get_tracer(__name__)
 
-class AgentExecutorWrapper(AgentExecutor):
+
+class AgentExecutorWrapper(CancellableExecutor):
     """Wrapper to convert Agent to A2A executor"""
 
-    def __init__(self, agent: Agent):
+    def __init__(
+            self,
+            agent: Agent,
+            chunk_chars: int = DEFAULT_CHUNK_CHARS,
+            flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+            tool_events: bool = False,
+            pool: Optional[InstancePool] = None
+    ):
         """
         Initialize executor
         
         Args:
             agent: Agent instance to wrap
+            chunk_chars: Streaming: target size (characters) of a coalesced chunk
+            flush_interval: Streaming: max time (seconds) buffered text waits before it is sent
+            tool_events: Streaming: publish tool call started/completed events as working status updates
+            pool: Pool of Agent instances to run requests on; None runs every request on `agent` itself
         """
+        super().__init__()
         self.agent = agent
+        self.chunk_chars = chunk_chars
+        self.flush_interval = flush_interval
+        self.tool_events = tool_events
+        self.pool = pool
 
-    async def execute(self, context, event_queue):
+    def run_labels(self) -> Tuple[str, str]:
+        """Kind and name of the wrapped agent in run metrics"""
+        return "agent", self.agent.name or "agent"
+
+    async def run(self, context, event_queue):
         """
         Execute Agent and put results into event queue
         
+        With a pool, the request waits for a free instance, runs on it exclusively and returns it afterwards.
+
         Args:
             context: Request context
             event_queue: Event queue
         """
+        if self.pool is None:
+            await self._run(self.agent, context, event_queue)
+            return
+        async with self.pool.acquire() as agent:
+            await self._run(agent, context, event_queue)
+
+    async def _run(self, agent, context, event_queue):
+        """
+        Execute the given Agent instance and put results into event queue
+
+        Args:
+            agent: Agent instance serving this request
+            context: Request context
+            event_queue: Event queue
+        """
 
         try:
             # Extract message from request
             message = ""
-            session_id = None
+            # The caller's session travels as the message context_id
+            session_id = self.session_id_of(context)
+            tracer.debug("AgentExecutorWrapper: session_id = %s", session_id)
             stream = True  # Enable streaming by default
 
             # Try to get information from context, handle different structures
             if hasattr(context, "request") and context.request:
-                print(f"DEBUG AgentExecutorWrapper: Getting info from context.request, request type={type(context.request)}")
+                tracer.debug("AgentExecutorWrapper: Getting info from context.request, request type=%s", type(context.request))
                 if hasattr(context.request, "message") and context.request.message:
-                    print(f"DEBUG AgentExecutorWrapper: Found message, type={type(context.request.message)}")
-                    print(f"DEBUG AgentExecutorWrapper: message attributes={dir(context.request.message)}")
+                    tracer.debug("AgentExecutorWrapper: Found message, type=%s", type(context.request.message))
                     # Extract text from message parts
                     if hasattr(context.request.message, "parts"):
-                        print(f"DEBUG AgentExecutorWrapper: Found parts, count={len(context.request.message.parts)}")
+                        tracer.debug("AgentExecutorWrapper: Found parts, count=%s", len(context.request.message.parts))
                         for i, part in enumerate(context.request.message.parts):
-                            print(f"DEBUG AgentExecutorWrapper: Processing part[{i}], type={type(part)}, attributes={dir(part)}")
+                            tracer.debug("AgentExecutorWrapper: Processing part[%s], type=%s", i, type(part))
                             if hasattr(part, "root") and hasattr(part.root, "text"):
-                                print(f"DEBUG AgentExecutorWrapper: Getting text from part.root.text: '{part.root.text}'")
+                                tracer.debug("AgentExecutorWrapper: Getting text from part.root.text: '%s'", part.root.text)
                                 message += part.root.text
                             elif hasattr(part, "text"):
-                                print(f"DEBUG AgentExecutorWrapper: Getting text from part.text: '{part.text}'")
+                                tracer.debug("AgentExecutorWrapper: Getting text from part.text: '%s'", part.text)
                                 message += part.text
                             else:
-                                print(f"DEBUG AgentExecutorWrapper: Cannot get text from part")
-                if hasattr(context.request, "configuration") and context.request.configuration:
-                    print(f"DEBUG AgentExecutorWrapper: Found configuration")
-                    session_id = context.request.configuration.sessionId
-                    print(f"DEBUG AgentExecutorWrapper: session_id = {session_id}")
+                                tracer.debug("AgentExecutorWrapper: Cannot get text from part")
             elif hasattr(context, "params") and context.params:
-                print(f"DEBUG AgentExecutorWrapper: Getting info from context.params, params type={type(context.params)}")
+                tracer.debug("AgentExecutorWrapper: Getting info from context.params, params type=%s", type(context.params))
                 # Try to get information from params
                 if hasattr(context.params, "message") and context.params.message:
-                    print(f"DEBUG AgentExecutorWrapper: Found message, type={type(context.params.message)}")
+                    tracer.debug("AgentExecutorWrapper: Found message, type=%s", type(context.params.message))
                     # Extract text from message parts
                     if hasattr(context.params.message, "parts"):
-                        print(f"DEBUG AgentExecutorWrapper: Found parts, count={len(context.params.message.parts)}")
+                        tracer.debug("AgentExecutorWrapper: Found parts, count=%s", len(context.params.message.parts))
                         for i, part in enumerate(context.params.message.parts):
-                            print(f"DEBUG AgentExecutorWrapper: Processing part[{i}], type={type(part)}, attributes={dir(part)}")
+                            tracer.debug("AgentExecutorWrapper: Processing part[%s], type=%s", i, type(part))
                             if hasattr(part, "root") and hasattr(part.root, "text"):
-                                print(f"DEBUG AgentExecutorWrapper: Getting text from part.root.text: '{part.root.text}'")
+                                tracer.debug("AgentExecutorWrapper: Getting text from part.root.text: '%s'", part.root.text)
                                 message += part.root.text
                             elif hasattr(part, "text"):
-                                print(f"DEBUG AgentExecutorWrapper: Getting text from part.text: '{part.text}'")
+                                tracer.debug("AgentExecutorWrapper: Getting text from part.text: '%s'", part.text)
                                 message += part.text
                             else:
-                                print(f"DEBUG AgentExecutorWrapper: Cannot get text from part")
-                if hasattr(context.params, "configuration") and context.params.configuration:
-                    print(f"DEBUG AgentExecutorWrapper: Found configuration")
-                    session_id = context.params.configuration.sessionId
-                    print(f"DEBUG AgentExecutorWrapper: session_id = {session_id}")
+                                tracer.debug("AgentExecutorWrapper: Cannot get text from part")
 
             # Try to extract message directly from context
             if not message and hasattr(context, "message"):
-                print(f"DEBUG AgentExecutorWrapper: Trying to get info from context.message, type={type(context.message)}")
+                tracer.debug("AgentExecutorWrapper: Trying to get info from context.message, type=%s", type(context.message))
                 if context.message:
-                    print(f"DEBUG AgentExecutorWrapper: context.message={context.message}")
+                    tracer.debug("AgentExecutorWrapper: context.message=%s", context.message)
                     if isinstance(context.message, str):
                         message = context.message
-                        print(f"DEBUG AgentExecutorWrapper: Directly getting string message: '{message}'")
+                        tracer.debug("AgentExecutorWrapper: Directly getting string message: '%s'", message)
                     elif hasattr(context.message, "parts") and context.message.parts:
-                        print(
-                            f"DEBUG AgentExecutorWrapper: Extracting from context.message.parts, count={len(context.message.parts)}")
+                        tracer.debug("AgentExecutorWrapper: Extracting from context.message.parts, count=%s", len(context.message.parts))
                         for i, part in enumerate(context.message.parts):
                             if hasattr(part, "root") and hasattr(part.root, "text"):
                                 message += part.root.text
-                                print(
-                                    f"DEBUG AgentExecutorWrapper: Extracting from message.parts[{i}].root.text: '{part.root.text}'")
+                                tracer.debug("AgentExecutorWrapper: Extracting from message.parts[%s].root.text: '%s'", i, part.root.text)
 
             # If no message extracted, try alternative methods
             if not message:
-                print(f"DEBUG AgentExecutorWrapper: Primary methods failed to extract message, trying fallback methods")
+                tracer.debug("AgentExecutorWrapper: Primary methods failed to extract message, trying fallback methods")
                 if hasattr(context, "request") and hasattr(context.request, "text"):
-                    print(f"DEBUG AgentExecutorWrapper: Getting text from context.request.text")
+                    tracer.debug("AgentExecutorWrapper: Getting text from context.request.text")
                     message = context.request.text
                 elif hasattr(context, "params") and hasattr(context.params, "text"):
-                    print(f"DEBUG AgentExecutorWrapper: Getting text from context.params.text")
+                    tracer.debug("AgentExecutorWrapper: Getting text from context.params.text")
                     message = context.params.text
 
                 # Try to get user input
                 elif hasattr(context, "get_user_input") and callable(context.get_user_input):
                     try:
-                        print(f"DEBUG AgentExecutorWrapper: Trying to call context.get_user_input()")
+                        tracer.debug("AgentExecutorWrapper: Trying to call context.get_user_input()")
                         user_input = context.get_user_input()
-                        print(f"DEBUG AgentExecutorWrapper: Got user input: {user_input}")
+                        tracer.debug("AgentExecutorWrapper: Got user input: %s", user_input)
                         if user_input:
                             message = user_input
                     except Exception as e:
-                        print(f"DEBUG AgentExecutorWrapper: Failed to call get_user_input: {str(e)}")
+                        tracer.debug("AgentExecutorWrapper: Failed to call get_user_input: %s", e)
 
                 # Try to get from call_context
                 elif hasattr(context, "call_context") and context.call_context:
-                    print(f"DEBUG AgentExecutorWrapper: Checking call_context, type={type(context.call_context)}")
-                    print(f"DEBUG AgentExecutorWrapper: call_context attributes={dir(context.call_context)}")
+                    tracer.debug("AgentExecutorWrapper: Checking call_context, type=%s", type(context.call_context))
                     if hasattr(context.call_context, "request") and context.call_context.request:
                         if hasattr(context.call_context.request, "params") and hasattr(
                                 context.call_context.request.params, "message"):
                             user_msg = context.call_context.request.params.message
-                            print(
-                                f"DEBUG AgentExecutorWrapper: Getting from call_context.request.params.message, type={type(user_msg)}")
+                            tracer.debug("AgentExecutorWrapper: Getting from call_context.request.params.message, type=%s", type(user_msg))
                             if hasattr(user_msg, "parts") and user_msg.parts:
                                 for part in user_msg.parts:
                                     if hasattr(part, "root") and hasattr(part.root, "text"):
                                         message += part.root.text
-                                        print(f"DEBUG AgentExecutorWrapper: Extracted message from call_context: '{part.root.text}'")
+                                        tracer.debug("AgentExecutorWrapper: Extracted message from call_context: '%s'", part.root.text)
 
                 # Output complete context content for further analysis
-                print(f"DEBUG AgentExecutorWrapper: Complete context content:")
-                for key in dir(context):
-                    if not key.startswith("_") and key not in ["call_context", "get_user_input"]:
-                        try:
-                            value = getattr(context, key)
-                            print(f"DEBUG AgentExecutorWrapper: context.{key} = {value}")
-                        except Exception as e:
-                            print(f"DEBUG AgentExecutorWrapper: Cannot get context.{key}: {e}")
+                if tracer.enabled():
+                    tracer.debug("AgentExecutorWrapper: Complete context content:")
+                    for key in dir(context):
+                        if not key.startswith("_") and key not in ["call_context", "get_user_input"]:
+                            try:
+                                value = getattr(context, key)
+                                tracer.debug("AgentExecutorWrapper: context.%s = %s", key, value)
+                            except Exception as e:
+                                tracer.debug("AgentExecutorWrapper: Cannot get context.%s: %s", key, e)
 
             # Execute Agent logic
             if message:
-                print(f"DEBUG AgentExecutorWrapper: Successfully extracted message: '{message}'")
+                tracer.debug("AgentExecutorWrapper: Successfully extracted message: '%s'", message)
+                # Honor the caller's deadline: stop once the budget propagated by the upstream hop runs out
+                deadline = deadline_from_metadata(getattr(getattr(context, "message", None), "metadata", None))
+                if is_streaming_request(context):
+                    await self._run_streaming(agent, context, event_queue, message, session_id, deadline)
+                    return
                 try:
                     # Use Agent to execute message
                     try:
-                        print(
-                            f"DEBUG AgentExecutorWrapper: Preparing to call Agent.arun, Agent type: {type(self.agent).__name__}, message: {message[:50]}...")
-                        print(f"DEBUG AgentExecutorWrapper: Agent object info: attributes={dir(self.agent)}")
-                        print(
-                            f"DEBUG AgentExecutorWrapper: Call parameters: message={message}, session_id={session_id}, stream=False")
-
-                        run_response = await self.agent.arun(
-                            message=message,
-                            session_id=session_id,
-                            stream=False
+                        tracer.debug("AgentExecutorWrapper: Preparing to call Agent.arun, Agent type: %s, message: %s...", type(agent).__name__, message[:50])
+                        tracer.debug("AgentExecutorWrapper: Call parameters: message=%s, session_id=%s, stream=False", message, session_id)
+
+                        run_response = await run_with_deadline(
+                            lambda: agent.arun(
+                                message=message,
+                                session_id=session_id,
+                                stream=False
+                            ),
+                            deadline
                         )
-                        print(f"DEBUG AgentExecutorWrapper: Agent.arun call successful")
+                        tracer.debug("AgentExecutorWrapper: Agent.arun call successful")
 
                         # Extract content from Agent response
-                        print(
-                            f"DEBUG AgentExecutorWrapper: run_response type={type(run_response)}, attributes={dir(run_response)}")
+                        tracer.debug("AgentExecutorWrapper: run_response type=%s", type(run_response))
                         if run_response and hasattr(run_response, "content"):
                             response_text = run_response.content
-                            print(f"DEBUG AgentExecutorWrapper: Extracted content: '{response_text}'")
+                            tracer.debug("AgentExecutorWrapper: Extracted content: '%s'", response_text)
                         else:
                             response_text = f"Received message: {message}"
-                            print(f"DEBUG AgentExecutorWrapper: No content extracted, using default reply: '{response_text}'")
+                            tracer.debug("AgentExecutorWrapper: No content extracted, using default reply: '%s'", response_text)
                     except Exception as e:
-                        print(f"DEBUG AgentExecutorWrapper: Agent.arun call failed: {str(e)}")
-                        traceback.print_exc()
-                        # If Agent execution fails, create an error message
+                        tracer.exception("AgentExecutorWrapper: Agent.arun call failed: %s", e)
+                        fail_run()
+                        # If Agent execution fails, report the task as failed
                         error_text = f"Execution error: {str(e)}"
-                        print(f"DEBUG AgentExecutorWrapper: Creating error message: '{error_text}'")
-                        response_message = Message(
-                            messageId=str(uuid4()),
-                            role=Role.agent,
-                            parts=[Part(root=TextPart(text=error_text))]
-                        )
-                        print(f"DEBUG AgentExecutorWrapper: Enqueuing error message and returning")
-                        await event_queue.enqueue_event(response_message)
+                        tracer.debug("AgentExecutorWrapper: Publishing failed status: '%s'", error_text)
+                        await self.publish_failure(context, event_queue, error_text)
                         return
 
                     # Create response message
-                    print(f"DEBUG AgentExecutorWrapper: Creating normal response message: '{response_text}'")
+                    tracer.debug("AgentExecutorWrapper: Creating normal response message: '%s'", response_text)
                     response_message = Message(
                         messageId=str(uuid4()),
                         role=Role.agent,
@@ -198,26 +239,21 @@ class AgentExecutorWrapper(AgentExecutor):
                     )
 
                     # Enqueue response message
-                    print(f"DEBUG AgentExecutorWrapper: Enqueuing response message and returning")
+                    tracer.debug("AgentExecutorWrapper: Enqueuing response message and returning")
                     await event_queue.enqueue_event(response_message)
                     return
                 except Exception as e:
-                    # If Agent execution fails, create an error message
-                    print(f"DEBUG AgentExecutorWrapper: Execution error (outer exception): {str(e)}")
+                    # If Agent execution fails, report the task as failed
+                    tracer.exception("AgentExecutorWrapper: Execution error (outer exception): %s", e)
+                    fail_run()
                     error_text = f"Execution error: {str(e)}"
-                    print(f"DEBUG AgentExecutorWrapper: Creating error message: '{error_text}'")
-                    response_message = Message(
-                        messageId=str(uuid4()),
-                        role=Role.agent,
-                        parts=[Part(root=TextPart(text=error_text))]
-                    )
-                    print(f"DEBUG AgentExecutorWrapper: Enqueuing error message and returning")
-                    await event_queue.enqueue_event(response_message)
+                    tracer.debug("AgentExecutorWrapper: Publishing failed status: '%s'", error_text)
+                    await self.publish_failure(context, event_queue, error_text)
                     return
 
             # If no message or execution failed, create a default response
             default_text = "Received empty message"
-            print(f"DEBUG AgentExecutorWrapper: No message extracted or execution failed, returning default message: '{default_text}'")
+            tracer.debug("AgentExecutorWrapper: No message extracted or execution failed, returning default message: '%s'", default_text)
             response_message = Message(
                 messageId=str(uuid4()),
                 role=Role.agent,
@@ -225,42 +261,53 @@ class AgentExecutorWrapper(AgentExecutor):
             )
 
             # Enqueue response message
-            print(f"DEBUG AgentExecutorWrapper: Enqueuing default response message")
+            tracer.debug("AgentExecutorWrapper: Enqueuing default response message")
             await event_queue.enqueue_event(response_message)
 
         except Exception as e:
-            # Create error message
-            print(f"DEBUG AgentExecutorWrapper: Outermost exception: {str(e)}")
-
-            traceback.print_exc()
-            error_message = Message(
-                messageId=str(uuid4()),
-                role=Role.agent,
-                parts=[Part(root=TextPart(text=f"Execution error: {str(e)}"))]
-            )
-
-            # Enqueue error message
-            print(f"DEBUG AgentExecutorWrapper: Enqueuing outermost error message")
-            await event_queue.enqueue_event(error_message)
+            # Report the task as failed
+            tracer.exception("AgentExecutorWrapper: Outermost exception: %s", e)
+            fail_run()
+            tracer.debug("AgentExecutorWrapper: Publishing outermost failed status")
+            await self.publish_failure(context, event_queue, f"Execution error: {str(e)}")
 
-    async def cancel(self, context, event_queue):
+    async def _run_streaming(self, agent, context, event_queue, message, session_id, deadline):
         """
-        Cancel the currently executing task
-        
+        Run Agent in streaming mode and publish its output as task events (message/stream requests)
+
         Args:
+            agent: Agent instance serving this request
             context: Request context
             event_queue: Event queue
+            message: Extracted user message
+            session_id: Session ID
+            deadline: Caller's deadline (time.monotonic() clock), None for no limit
         """
-
-        # Create cancel message
-        cancel_message = Message(
-            messageId=str(uuid4()),
-            role=Role.agent,
-            parts=[Part(root=TextPart(text="Task has been cancelled by user"))]
+        publisher = RunStreamPublisher(
+            event_queue,
+            context.task_id,
+            context.context_id,
+            chunk_chars=self.chunk_chars,
+            flush_interval=self.flush_interval,
+            tool_events=self.tool_events
         )
+        # Publish the task before the model starts, so the caller gets the task id (and can cancel) right away
+        await publisher.start()
+
+        async def stream():
+            run_output = await agent.arun(
+                message=message,
+                session_id=session_id,
+                stream=True,
+                stream_intermediate_steps=self.tool_events
+            )
+            await publisher.publish(run_output)
 
-        # Enqueue cancel message
-        await event_queue.enqueue_event(cancel_message)
+        try:
+            await run_with_deadline(stream, deadline)
+        except Exception as e:
+            tracer.exception("AgentExecutorWrapper: Streaming Agent.arun failed: %s", e)
+            await publisher.fail(f"Execution error: {str(e)}")
 
 
 class AgentServer(BaseServer):
@@ -270,7 +317,17 @@ class AgentServer(BaseServer):
             self,
             agent: Agent,
             host: str = "0.0.0.0",
-            port: int = 8000
+            port: int = 8000,
+            stream_chunk_chars: int = DEFAULT_CHUNK_CHARS,
+            stream_flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+            stream_tool_events: bool = False,
+            pool_size: Optional[int] = None,
+            pool_max_size: Optional[int] = None,
+            pool_autoscale: bool = False,
+            pool_idle_timeout: float = 60.0,
+            task_store: Optional[TaskStore] = None,
+            serving: Optional[ServingOptions] = None,
+            admission: Optional[AdmissionOptions] = None
     ):
         """
         Initialize AgentServer
@@ -279,14 +336,42 @@ class AgentServer(BaseServer):
             agent: Agent instance to serve
             host: Server host
             port: Server port
+            stream_chunk_chars: message/stream: text is coalesced into chunks of about this many characters
+            stream_flush_interval: message/stream: max time (seconds) buffered text waits before it is sent;
+                the first chunk is always sent immediately
+            stream_tool_events: message/stream: also publish tool call events as working status updates
+            pool_size: Serve requests from a pool of this many pre-initialized copies of the agent, each
+                handling one request at a time (concurrent throughput scales with the pool size);
+                None runs all requests on the agent instance itself
+            pool_max_size: Upper bound of the pool when autoscaling (defaults to pool_size)
+            pool_autoscale: Grow the pool while requests are queueing for an instance, shrink it when idle
+            pool_idle_timeout: Seconds an extra (autoscaled) instance may stay idle before it is dropped
+            task_store: Where A2A tasks are kept; defaults to a bounded in-memory store,
+                use SqlTaskStore to keep tasks across restarts
+            serving: Worker processes, event loop / HTTP implementation, connection tuning and an extra
+                unix socket to listen on; defaults to a single in-process server
+            admission: Admission control: max concurrent runs, wait queue length and queue timeout; requests
+                beyond that get a fast 503 with Retry-After instead of starting a run (counted per worker
+                process); None admits every request
         """
         super().__init__(
             host=host,
             port=port,
             name=agent.name or "Agent Server",
-            description=agent.description or "A2A Agent Protocol Server"
+            description=agent.description or "A2A Agent Protocol Server",
+            task_store=task_store,
+            serving=serving,
+            admission=admission
         )
         self.agent = agent
+        self.stream_chunk_chars = stream_chunk_chars
+        self.stream_flush_interval = stream_flush_interval
+        self.stream_tool_events = stream_tool_events
+        self.pool_size = pool_size
+        self.pool_max_size = pool_max_size
+        self.pool_autoscale = pool_autoscale
+        self.pool_idle_timeout = pool_idle_timeout
+        self.pool: Optional[InstancePool] = None
 
     def create_agent_card(self) -> AgentCard:
         """
@@ -343,7 +428,7 @@ class AgentServer(BaseServer):
             capabilities={
                 # "streaming": self.agent.is_streamable,
                 "streaming": True,
-                "pushNotifications": False
+                "pushNotifications": True
             },
             skills=skills
         )
@@ -355,7 +440,21 @@ class AgentServer(BaseServer):
         Returns:
             AgentExecutor: Executor wrapping the Agent
         """
-        return AgentExecutorWrapper(self.agent)
+        if self.pool_size:
+            self.pool = InstancePool(
+                self.agent,
+                size=self.pool_size,
+                max_size=self.pool_max_size,
+                autoscale=self.pool_autoscale,
+                idle_timeout=self.pool_idle_timeout
+            )
+        return AgentExecutorWrapper(
+            self.agent,
+            chunk_chars=self.stream_chunk_chars,
+            flush_interval=self.stream_flush_interval,
+            tool_events=self.stream_tool_events,
+            pool=self.pool
+        )
 
 
 async def main():
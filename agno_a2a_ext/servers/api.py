@@ -5,7 +5,6 @@ from time import time
 from typing import Dict, Optional, Any, List, AsyncGenerator, cast
 from uuid import uuid4
 from io import BytesIO
-import traceback
 
 import uvicorn
 from fastapi import FastAPI, Request, HTTPException, File, Form, Query, UploadFile, APIRouter
@@ -23,6 +22,7 @@ from agno.storage.session.team import TeamSession
 from agno.team.team import Team
 
 from agno_a2a_ext.apis.playground.operator import get_session_title_from_team_session, get_session_title
+from agno_a2a_ext.observability.tracing import REQUEST_ID_HEADER, get_tracer
 from agno_a2a_ext.servers.schemas import (
     AgentGetResponse,
     AgentModel,
@@ -34,6 +34,19 @@ from agno_a2a_ext.servers.schemas import (
     TeamSessionResponse
 )
 from agno_a2a_ext.servers.utils import process_audio, process_document, process_image, process_video, format_tools
+from agno_a2a_ext.servers.admission import AdmissionController, AdmissionMiddleware, AdmissionOptions
+from agno_a2a_ext.servers.cancellation import run_until_disconnected, stream_until_disconnected
+from agno_a2a_ext.servers.encoding import CompressionMiddleware
+from agno_a2a_ext.servers.middleware import (
+    DeadlineMiddleware,
+    HTTPMetricsMiddleware,
+    RunMetricsMiddleware,
+    TracingMiddleware,
+    metrics_endpoint,
+)
+from agno_a2a_ext.servers.workers import ServingOptions, WorkerSupervisor, bind_sockets, close_sockets
+
+tracer = get_tracer(__name__)
 
 
 async def chat_response_streamer(
@@ -47,7 +60,7 @@ async def chat_response_streamer(
 ) -> AsyncGenerator:
     import json  # Import json module
     try:
-        print(f"DEBUG: Starting streaming request, agent={agent.name}, message='{message}'")
+        tracer.debug("Starting streaming request, agent=%s, message='%s'", agent.name, message)
         run_response = await agent.arun(
             message=message,
             session_id=session_id,
@@ -60,11 +73,11 @@ async def chat_response_streamer(
         )
 
         if hasattr(run_response, "__aiter__"):
-            print(f"DEBUG: agent.arun returned async iterator")
+            tracer.debug("agent.arun returned async iterator")
             chunk_count = 0
             async for run_response_chunk in run_response:
                 chunk_count += 1
-                print(f"DEBUG: Received streaming response chunk #{chunk_count}, type={type(run_response_chunk).__name__}")
+                tracer.debug("Received streaming response chunk #%s, type=%s", chunk_count, type(run_response_chunk).__name__)
 
                 # Ensure we have a dictionary
                 response_dict = {}
@@ -111,12 +124,12 @@ async def chat_response_streamer(
 
                 # 序列化并发送
                 json_str = json.dumps(response_dict)
-                print(f"DEBUG: 发送JSON块: {json_str[:100]}...")
+                tracer.debug("发送JSON块: %.100s...", json_str)
                 yield f"data: {json_str}\n\n"
 
-            print(f"DEBUG: 流式响应完成，共发送 {chunk_count} 个块")
+            tracer.debug("流式响应完成，共发送 %s 个块", chunk_count)
         else:
-            print(f"DEBUG: agent.arun返回了非流式响应")
+            tracer.debug("agent.arun返回了非流式响应")
             # 处理非流式响应
             response_dict = {}
             if hasattr(run_response, "to_dict"):
@@ -147,12 +160,11 @@ async def chat_response_streamer(
 
             # 序列化并发送
             json_str = json.dumps(response_dict)
-            print(f"DEBUG: 发送非流式JSON响应: {json_str[:100]}...")
+            tracer.debug("发送非流式JSON响应: %.100s...", json_str)
             yield f"data: {json_str}\n\n"
 
     except Exception as e:
-        print(f"ERROR: 流式处理错误: {str(e)}")
-        traceback.print_exc()
+        tracer.exception("流式处理错误: %s", e)
 
         # 创建错误响应
         import time
@@ -169,7 +181,7 @@ async def chat_response_streamer(
 
         # 序列化并发送
         json_str = json.dumps(error_dict)
-        print(f"DEBUG: 发送错误JSON响应: {json_str[:100]}...")
+        tracer.debug("发送错误JSON响应: %.100s...", json_str)
         yield f"data: {json_str}\n\n"
 
 
@@ -185,7 +197,7 @@ async def team_chat_response_streamer(
 ) -> AsyncGenerator:
     import json  # 导入json模块
     try:
-        print(f"DEBUG: 开始团队流式请求，team={team.name}, message='{message}'")
+        tracer.debug("开始团队流式请求，team=%s, message='%s'", team.name, message)
 
         # 设置流式参数
         stream_params = {
@@ -217,7 +229,7 @@ async def team_chat_response_streamer(
 
         async for run_response_chunk in run_response_stream:
             chunk_count += 1
-            print(f"DEBUG: 接收流式响应块 #{chunk_count}, 类型={type(run_response_chunk).__name__}")
+            tracer.debug("接收流式响应块 #%s, 类型=%s", chunk_count, type(run_response_chunk).__name__)
 
             # 准备响应字典
             response_dict = {}
@@ -225,10 +237,10 @@ async def team_chat_response_streamer(
             # 如果有to_dict方法，使用它
             if hasattr(run_response_chunk, "to_dict"):
                 response_dict = run_response_chunk.to_dict()
-                print(f"DEBUG: 使用to_dict()方法提取响应内容")
+                tracer.debug("使用to_dict()方法提取响应内容")
             else:
                 # 手动提取属性
-                print(f"DEBUG: 手动提取响应属性")
+                tracer.debug("手动提取响应属性")
                 for attr in ["content", "content_type", "status", "images", "videos", "audio", "created_at", "team_id",
                              "team_name"]:
                     if hasattr(run_response_chunk, attr):
@@ -245,7 +257,7 @@ async def team_chat_response_streamer(
                 else:
                     # 根据对象类型确定事件类型
                     event_type = type(run_response_chunk).__name__
-                    print(f"DEBUG: 根据类型确定事件: {event_type}")
+                    tracer.debug("根据类型确定事件: %s", event_type)
 
                     if "RunResponseStarted" in event_type or "RunStarted" in event_type:
                         response_dict["event"] = "TeamRunStarted"
@@ -294,7 +306,7 @@ async def team_chat_response_streamer(
             if event == "TeamRunStarted":
                 # 直接发送开始事件
                 json_str = json.dumps(response_dict)
-                print(f"DEBUG: 发送开始事件: {json_str[:100]}...")
+                tracer.debug("发送开始事件: %.100s...", json_str)
                 yield f"data: {json_str}\n\n"
                 continue
 
@@ -306,20 +318,20 @@ async def team_chat_response_streamer(
                     buffer_response["event"] = "TeamRunResponseContent"
                     buffer_response["content"] = buffer
                     json_str = json.dumps(buffer_response)
-                    print(f"DEBUG: 发送最终缓冲区内容: {json_str[:100]}...")
+                    tracer.debug("发送最终缓冲区内容: %.100s...", json_str)
                     yield f"data: {json_str}\n\n"
                     buffer = ""
 
                 # 发送完成事件
                 json_str = json.dumps(response_dict)
-                print(f"DEBUG: 发送完成事件: {json_str[:100]}...")
+                tracer.debug("发送完成事件: %.100s...", json_str)
                 yield f"data: {json_str}\n\n"
                 continue
 
             elif event == "TeamRunError":
                 # 直接发送错误事件
                 json_str = json.dumps(response_dict)
-                print(f"DEBUG: 发送错误事件: {json_str[:100]}...")
+                tracer.debug("发送错误事件: %.100s...", json_str)
                 yield f"data: {json_str}\n\n"
                 continue
 
@@ -342,16 +354,15 @@ async def team_chat_response_streamer(
                         buffer_response = last_response_dict.copy()
                         buffer_response["content"] = buffer
                         json_str = json.dumps(buffer_response)
-                        print(f"DEBUG: 发送缓冲区内容: {json_str[:100]}...")
+                        tracer.debug("发送缓冲区内容: %.100s...", json_str)
                         yield f"data: {json_str}\n\n"
                         buffer = ""
                         content_chunks_count = 0
 
-        print(f"DEBUG: 团队流式响应完成，共接收 {chunk_count} 个块")
+        tracer.debug("团队流式响应完成，共接收 %s 个块", chunk_count)
 
     except Exception as e:
-        print(f"ERROR: 团队流式处理错误: {str(e)}")
-        traceback.print_exc()
+        tracer.exception("团队流式处理错误: %s", e)
 
         # 创建错误响应
         import time
@@ -370,7 +381,7 @@ async def team_chat_response_streamer(
 
         # 序列化并发送
         json_str = json.dumps(error_dict)
-        print(f"DEBUG: 发送错误JSON响应: {json_str[:100]}...")
+        tracer.debug("发送错误JSON响应: %.100s...", json_str)
         yield f"data: {json_str}\n\n"
 
 
@@ -386,7 +397,10 @@ class ServerAPI:
             port: int = 8080,
             title: str = "Agent API",
             description: str = "Agent and Team API",
-            cors_origins: List[str] = None
+            cors_origins: List[str] = None,
+            request_timeout: Optional[float] = None,
+            serving: Optional[ServingOptions] = None,
+            admission: Optional[AdmissionOptions] = None
     ):
         """
         初始化ServerAPI
@@ -400,6 +414,11 @@ class ServerAPI:
             title: API标题
             description: API描述
             cors_origins: CORS允许的源列表
+            request_timeout: 请求未通过X-A2A-Timeout声明预算时的默认预算（秒），向下游A2A调用传播
+            serving: 运行参数（工作进程数、事件循环/HTTP实现、backlog、并发上限、保活时间、
+                同时监听的unix socket等），默认在当前事件循环中单进程运行
+            admission: 准入控制，每个agent/team分别限制并发运行数、等待队列长度和排队超时，
+                超出时快速返回503和Retry-After，默认不限制；多进程模式下每个工作进程分别计数
         """
         # 将列表转换为字典，使用对象自身的ID作为键
         self.agents = {}
@@ -410,13 +429,13 @@ class ServerAPI:
                     agent_id = str(uuid4())  # 始终使用UUID格式的agent_id
                     setattr(agent, "agent_id", agent_id)  # 设置agent_id属性
                 self.agents[agent_id] = agent
-                print(f"DEBUG ServerAPI初始化: 注册agent id={agent_id}, name={agent.name}, 类型={type(agent).__name__}")
+                tracer.debug("ServerAPI初始化: 注册agent id=%s, name=%s, 类型=%s", agent_id, agent.name, type(agent).__name__)
 
         self.teams = {}
         if teams:
             for team in teams:
                 team_id = getattr(team, "team_id", None) or team.name
-                print(f"team_id: {team_id}")
+                tracer.debug("ServerAPI初始化: 注册team id=%s", team_id)
                 self.teams[team_id] = team
 
         self.workflows = workflows or {}
@@ -425,27 +444,49 @@ class ServerAPI:
         self.title = title
         self.description = description
         self.cors_origins = cors_origins or ["*"]
+        self.request_timeout = request_timeout
+        self.serving = serving or ServingOptions()
+        self.admission = admission
+        # (agents|teams, ID) -> 准入控制，在create_app中创建
+        self.admission_controllers: Dict[tuple, AdmissionController] = {}
 
         self._server = None
         self._task = None
         self._app = None
+        self._supervisor: Optional[WorkerSupervisor] = None
+        self._sockets = []
+
+    def admission_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        获取各agent/team的准入控制状态（当前进程）
+
+        Returns:
+            Dict: "agents/ID"或"teams/ID" -> 执行中数量、队列长度、准入/拒绝次数等
+        """
+        return {f"{kind}/{key}": controller.stats() for (kind, key), controller in self.admission_controllers.items()}
+
+    def _run_name(self, kind: str, key: str) -> Optional[str]:
+        """运行指标中agent/team的名称，未知的ID返回None"""
+        entity = (self.agents if kind == "agents" else self.teams).get(key)
+        if entity is None:
+            return None
+        return entity.name or key
 
     def get_agent(self, agent_id: str) -> Agent:
         """获取代理，如果不存在则抛出异常"""
-        print(f"DEBUG 尝试获取agent_id={agent_id}, 可用agents={list(self.agents.keys())}")
+        tracer.debug("尝试获取agent_id=%s, 可用agents=%s", agent_id, list(self.agents.keys()))
         if agent_id not in self.agents:
             raise HTTPException(
                 status_code=404,
                 detail=f"Agent {agent_id} not found"
             )
         agent = self.agents[agent_id]
-        print(f"DEBUG 找到agent: {agent.name}, 类型={type(agent).__name__}")
+        tracer.debug("找到agent: %s, 类型=%s", agent.name, type(agent).__name__)
         return agent
 
     def get_team(self, team_id: str) -> Team:
         """获取团队，如果不存在则抛出异常"""
-        print(self.teams)
-        print(team_id)
+        tracer.debug("尝试获取team_id=%s, 可用teams=%s", team_id, list(self.teams.keys()))
         if team_id not in self.teams:
             raise HTTPException(
                 status_code=404,
@@ -474,14 +515,43 @@ class ServerAPI:
             description=self.description
         )
 
+        # 运行指标（位于准入控制之内：被拒绝的请求不计为运行）
+        if self.serving.metrics:
+            app.add_middleware(RunMetricsMiddleware, name_of=self._run_name)
+
+        # 准入控制：运行路由按agent/team限制并发，排满时快速返回503
+        if self.admission is not None:
+            self.admission_controllers = {
+                **{("agents", agent_id): AdmissionController(agent.name or agent_id, self.admission)
+                   for agent_id, agent in self.agents.items()},
+                **{("teams", team_id): AdmissionController(team.name or team_id, self.admission)
+                   for team_id, team in self.teams.items()},
+            }
+            app.add_middleware(
+                AdmissionMiddleware,
+                controller=lambda kind, key: self.admission_controllers.get((kind, key))
+            )
+
         # 添加CORS中间件
         app.add_middleware(
             CORSMiddleware,
             allow_origins=self.cors_origins,
             allow_credentials=True,
             allow_methods=["*"],
-            allow_headers=["*"]
+            allow_headers=["*"],
+            expose_headers=[REQUEST_ID_HEADER]
         )
+        # 按Accept-Encoding压缩响应，SSE逐事件压缩
+        if self.serving.compression:
+            app.add_middleware(CompressionMiddleware, minimum_size=self.serving.compression_min_size)
+        # 按请求头开启单个请求的调试日志，并透传请求ID
+        app.add_middleware(TracingMiddleware)
+        # 设置请求的截止时间，剩余预算随A2A调用传给下游
+        app.add_middleware(DeadlineMiddleware, default_timeout=self.request_timeout)
+        # 请求指标（最外层，包括被拒绝和排队的请求），GET /metrics以Prometheus文本格式导出
+        if self.serving.metrics:
+            app.add_middleware(HTTPMetricsMiddleware, server=self.title)
+            app.add_api_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
 
         v1_router = APIRouter(prefix="/v1")
 
@@ -499,7 +569,8 @@ class ServerAPI:
                 "status": "available",
                 "agent": len(self.agents),
                 "teams": len(self.teams),
-                "workflows": len(self.workflows)
+                "workflows": len(self.workflows),
+                "admission": self.admission_stats()
             }
 
         # Playground状态
@@ -572,6 +643,7 @@ class ServerAPI:
 
         @v1_router.post("/playground/agents/{agent_id}/runs")
         async def create_agent_run(
+                request: Request,
                 agent_id: str,
                 message: str = Form(...),
                 stream: bool = Form(True),
@@ -581,9 +653,9 @@ class ServerAPI:
                 files: Optional[List[UploadFile]] = File(None),
         ):
             """运行代理"""
-            print(f"DEBUG /playground/agent/{agent_id}/runs: 收到请求，message={message}")
+            tracer.debug("/playground/agent/%s/runs: 收到请求，message=%s", agent_id, message)
             agent = self.get_agent(agent_id)
-            print(f"DEBUG 已找到agent: {agent.name}, 类型={type(agent).__name__}")
+            tracer.debug("已找到agent: %s, 类型=%s", agent.name, type(agent).__name__)
 
             if not session_id:
                 session_id = str(uuid4())
@@ -666,7 +738,7 @@ class ServerAPI:
             # 运行代理
             if stream and hasattr(agent, 'is_streamable') and agent.is_streamable:
                 return StreamingResponse(
-                    chat_response_streamer(
+                    stream_until_disconnected(request, chat_response_streamer(
                         agent,
                         message,
                         session_id=session_id,
@@ -674,13 +746,13 @@ class ServerAPI:
                         images=base64_images if base64_images else None,
                         audio=base64_audios if base64_audios else None,
                         videos=base64_videos if base64_videos else None,
-                    ),
+                    )),
                     media_type="text/event-stream",
                 )
             else:
                 run_response = cast(
                     RunResponse,
-                    await agent.arun(
+                    await run_until_disconnected(request, agent.arun(
                         message=message,
                         session_id=session_id,
                         user_id=user_id,
@@ -688,7 +760,7 @@ class ServerAPI:
                         audio=base64_audios if base64_audios else None,
                         videos=base64_videos if base64_videos else None,
                         stream=False,
-                    ),
+                    )),
                 )
                 return run_response.to_dict()
 
@@ -815,6 +887,7 @@ class ServerAPI:
 
         @v1_router.post("/playground/teams/{team_id}/runs")
         async def create_team_run(
+                request: Request,
                 team_id: str,
                 message: str = Form(...),
                 stream: bool = Form(True),
@@ -883,25 +956,25 @@ class ServerAPI:
                     except Exception as e:
                         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
 
-            print(f"DEBUG: 尝试使用流式响应，stream={stream}")
+            tracer.debug("尝试使用流式响应，stream=%s", stream)
 
             try:
                 # 尝试流式响应
                 if stream:
                     return StreamingResponse(
-                        team_chat_response_streamer(
+                        stream_until_disconnected(request, team_chat_response_streamer(
                             team, message, session_id=session_id, user_id=user_id,
                             images=base64_images, audio=base64_audios, videos=base64_videos, files=document_files
-                        ),
+                        )),
                         media_type="text/event-stream",
                     )
                 else:
                     # 非流式响应
-                    run_response = await team.arun(
+                    run_response = await run_until_disconnected(request, team.arun(
                         message=message, session_id=session_id, user_id=user_id,
                         images=base64_images, audio=base64_audios, videos=base64_videos, files=document_files,
                         stream=False
-                    )
+                    ))
 
                     # 确保有正确的响应格式
                     response_dict = {}
@@ -938,22 +1011,26 @@ class ServerAPI:
 
                     return response_dict
 
+            except HTTPException:
+                # 客户端已断开（499）等，不回退
+                raise
             except Exception as e:
-                print(f"ERROR: 团队运行错误: {str(e)}")
-                traceback.print_exc()
+                tracer.exception("团队运行错误: %s", e)
 
                 # 如果流式响应失败，尝试非流式响应
                 if stream:
-                    print("尝试回退到非流式响应")
+                    tracer.info("尝试回退到非流式响应")
                     try:
-                        run_response = await team.arun(
+                        run_response = await run_until_disconnected(request, team.arun(
                             message=message, session_id=session_id, user_id=user_id,
                             images=base64_images, audio=base64_audios, videos=base64_videos, files=document_files,
                             stream=False
-                        )
+                        ))
                         return run_response.to_dict()
+                    except HTTPException:
+                        raise
                     except Exception as e2:
-                        print(f"非流式响应也失败: {str(e2)}")
+                        tracer.error("非流式响应也失败: %s", e2)
                         raise HTTPException(status_code=500, detail=f"Team run failed: {str(e2)}")
 
                 raise HTTPException(status_code=500, detail=f"Team run failed: {str(e)}")
@@ -1088,23 +1165,22 @@ class ServerAPI:
         @v1_router.post("/agents/{agent_id}/run")
         async def run_agent(agent_id: str, request: Request):
             """运行代理（非流式）"""
-            print(f"DEBUG ServerAPI: 收到agent_id={agent_id}的运行请求")
+            tracer.debug("ServerAPI: 收到agent_id=%s的运行请求", agent_id)
             agent = self.get_agent(agent_id)
-            print(f"DEBUG ServerAPI: 已获取agent，类型={type(agent).__name__}")
+            tracer.debug("ServerAPI: 已获取agent，类型=%s", type(agent).__name__)
             data = await request.json()
 
             message = data.get("message", "")
             session_id = data.get("session_id", str(uuid4()))
-            print(f"DEBUG ServerAPI: 将运行agent，消息='{message}'")
+            tracer.debug("ServerAPI: 将运行agent，消息='%s'", message)
 
             try:
-                response = await agent.arun(
+                response = await run_until_disconnected(request, agent.arun(
                     message=message,
                     session_id=session_id,
                     stream=False
-                )
-                print(
-                    f"DEBUG ServerAPI: agent.arun完成，响应内容='{response.content if hasattr(response, 'content') else None}'")
+                ))
+                tracer.debug("ServerAPI: agent.arun完成，响应内容='%s'", response.content if hasattr(response, 'content') else None)
 
                 # 返回完整的RunResponse格式
                 if hasattr(response, 'to_dict'):
@@ -1128,9 +1204,10 @@ class ServerAPI:
                     }
 
                 return result
+            except HTTPException:
+                raise
             except Exception as e:
-                print(f"DEBUG ServerAPI: agent.arun出错: {str(e)}")
-                traceback.print_exc()
+                tracer.exception("ServerAPI: agent.arun出错: %s", e)
                 return {
                     "content": f"处理请求时出错: {str(e)}",
                     "error": str(e),
@@ -1159,7 +1236,7 @@ class ServerAPI:
                         yield f"data: {json.dumps({'content': chunk.content})}\n\n"
 
             return StreamingResponse(
-                generate(),
+                stream_until_disconnected(request, generate()),
                 media_type="text/event-stream"
             )
 
@@ -1183,11 +1260,11 @@ class ServerAPI:
             session_id = data.get("session_id", str(uuid4()))
 
             try:
-                response = await team.arun(
+                response = await run_until_disconnected(request, team.arun(
                     message=message,
                     session_id=session_id,
                     stream=False
-                )
+                ))
 
                 # 返回完整的RunResponse格式
                 if hasattr(response, 'to_dict'):
@@ -1221,9 +1298,10 @@ class ServerAPI:
                     ]
 
                 return result
+            except HTTPException:
+                raise
             except Exception as e:
-                print(f"DEBUG ServerAPI: team.arun出错: {str(e)}")
-                traceback.print_exc()
+                tracer.exception("ServerAPI: team.arun出错: %s", e)
                 return {
                     "content": f"处理请求时出错: {str(e)}",
                     "error": str(e),
@@ -1252,7 +1330,7 @@ class ServerAPI:
                         yield f"data: {json.dumps({'content': chunk.content})}\n\n"
 
             return StreamingResponse(
-                generate(),
+                stream_until_disconnected(request, generate()),
                 media_type="text/event-stream"
             )
 
@@ -1262,23 +1340,37 @@ class ServerAPI:
         return app
 
     async def start(self):
-        """Start server"""
+        """Start server (serving.workers > 1 starts that many worker processes sharing the port)"""
+        if self.serving.multiprocess:
+            self._check_shared_state()
+            self._supervisor = WorkerSupervisor(self.create_app, self.host, self.port, self.serving)
+            self._supervisor.start()
+            tracer.info("ServerAPI started: http://%s:%s (%s workers)", self.host, self.port, self.serving.workers)
+            return
+
         app = self.create_app()
 
-        config = uvicorn.Config(
-            app=app,
-            host=self.host,
-            port=self.port
-        )
+        config = self.serving.uvicorn_config(app, self.host, self.port)
 
         server = uvicorn.Server(config)
         self._server = server
 
-        self._task = asyncio.create_task(server.serve())
-        print(f"ServerAPI started: http://{self.host}:{self.port}")
+        if self.serving.uds:
+            # Listen on the unix socket in addition to the TCP port
+            self._sockets = bind_sockets(self.host, self.port, self.serving)
+            self._task = asyncio.create_task(server.serve(sockets=self._sockets))
+        else:
+            self._task = asyncio.create_task(server.serve())
+        tracer.info("ServerAPI started: http://%s:%s%s", self.host, self.port,
+                    f", unix://{self.serving.uds}" if self.serving.uds else "")
 
     async def stop(self):
         """Stop server"""
+        if self._supervisor:
+            await self._supervisor.stop()
+            self._supervisor = None
+            tracer.info("ServerAPI stopped")
+
         if self._server:
             self._server.should_exit = True
 
@@ -1288,7 +1380,21 @@ class ServerAPI:
             self._server = None
             self._task = None
             self._app = None
-            print("ServerAPI stopped")
+            close_sockets(self._sockets, self.serving)
+            self._sockets = []
+            tracer.info("ServerAPI stopped")
+
+    def _check_shared_state(self):
+        """
+        多进程模式：会话需要在工作进程之间共享
+
+        注册的agent/team随fork复制到每个工作进程；会话历史只有保存在存储（例如MySqlStorage）中时，
+        同一会话的后续请求落到其他工作进程上才能读到。
+        """
+        for kind, registry in (("agent", self.agents), ("team", self.teams)):
+            for instance_id, instance in registry.items():
+                if getattr(instance, "storage", None) is None:
+                    tracer.warning("多进程模式下%s %s未配置storage，会话历史不在工作进程之间共享", kind, instance_id)
 
 
 async def main():
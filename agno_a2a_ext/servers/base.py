@@ -1,16 +1,40 @@
 # agent_server/servers/base.py
 import asyncio
+import os
+import tempfile
 from abc import ABC, abstractmethod
+from typing import Optional
 
+import httpx
 import uvicorn
 from fastapi import FastAPI
 
-from a2a.server.apps.jsonrpc.fastapi_app import A2AFastAPIApplication
 from a2a.server.agent_execution.agent_executor import AgentExecutor
-from a2a.server.request_handlers.default_request_handler import DefaultRequestHandler
+from a2a.server.tasks.base_push_notification_sender import BasePushNotificationSender
+from a2a.server.tasks.inmemory_push_notification_config_store import InMemoryPushNotificationConfigStore
 from a2a.server.tasks.inmemory_task_store import InMemoryTaskStore
+from a2a.server.tasks.task_store import TaskStore
 from a2a.types import AgentCard
 
+from agno_a2a_ext.agent.a2a.local_transport import local_urls, register_local_app, unregister_local_app
+from agno_a2a_ext.observability.tracing import get_tracer
+from agno_a2a_ext.servers.admission import AdmissionControlledA2AApplication, AdmissionController, AdmissionOptions
+from agno_a2a_ext.servers.encoding import CompressionMiddleware
+from agno_a2a_ext.servers.handler import BackgroundRequestHandler, DisconnectAwareContextBuilder
+from agno_a2a_ext.servers.middleware import (
+    AgentCardETagMiddleware,
+    HTTPMetricsMiddleware,
+    TracingMiddleware,
+    metrics_endpoint,
+)
+from agno_a2a_ext.servers.task_store import BoundedInMemoryTaskStore
+from agno_a2a_ext.servers.workers import ServingOptions, WorkerSupervisor, bind_sockets, close_sockets
+
+tracer = get_tracer(__name__)
+
+# 多进程模式下默认共享任务存储的保留时间（秒）
+SHARED_TASK_RETENTION = 24 * 3600
+
 
 class BaseServer(ABC):
     """A2A协议服务器基类"""
@@ -20,7 +44,11 @@ class BaseServer(ABC):
         host: str = "0.0.0.0",
         port: int = 9000,
         name: str = "A2A Server",
-        description: str = "A2A Protocol Server"
+        description: str = "A2A Protocol Server",
+        push_timeout: float = 10.0,
+        task_store: Optional[TaskStore] = None,
+        serving: Optional[ServingOptions] = None,
+        admission: Optional[AdmissionOptions] = None
     ):
         """
         初始化基础服务器
@@ -30,13 +58,28 @@ class BaseServer(ABC):
             port: 服务器端口
             name: 服务器名称
             description: 服务器描述
+            push_timeout: 发送推送通知的超时时间（秒）
+            task_store: 任务存储，默认使用有上限的进程内存储（BoundedInMemoryTaskStore）；
+                需要在重启后保留任务时使用SqlTaskStore
+            serving: 运行参数（工作进程数、事件循环/HTTP实现、backlog、并发上限、保活时间、
+                同时监听的unix socket等），默认在当前事件循环中单进程运行
+            admission: 准入控制（并发运行数上限、等待队列长度和排队超时），超出时快速返回503，
+                默认不限制；多进程模式下每个工作进程分别计数
         """
         self.host = host
         self.port = port
         self.name = name
         self.description = description
+        self.push_timeout = push_timeout
+        self.task_store = task_store
+        self.serving = serving or ServingOptions()
+        self.admission = admission
+        self.admission_controller: Optional[AdmissionController] = None
         self._server = None
         self._task = None
+        self._supervisor: Optional[WorkerSupervisor] = None
+        self._app = None
+        self._sockets = []
     
     @abstractmethod
     def create_agent_card(self) -> AgentCard:
@@ -71,41 +114,93 @@ class BaseServer(ABC):
         # 创建执行器
         executor = self.create_executor()
         
-        # 创建任务存储
-        task_store = InMemoryTaskStore()
+        # 创建任务存储（未指定时按数量淘汰最久未使用的任务，内存占用有上限）
+        if self.task_store is None:
+            self.task_store = BoundedInMemoryTaskStore()
+        task_store = self.task_store
         
-        # 创建请求处理器
-        handler = DefaultRequestHandler(
+        # 推送通知：非阻塞提交的任务结束后回调客户端的webhook
+        push_config_store = InMemoryPushNotificationConfigStore()
+        push_sender = BasePushNotificationSender(
+            httpx.AsyncClient(timeout=self.push_timeout),
+            config_store=push_config_store
+        )
+
+        # 创建请求处理器（支持blocking=False的后台执行）
+        handler = BackgroundRequestHandler(
             agent_executor=executor,
-            task_store=task_store
+            task_store=task_store,
+            push_config_store=push_config_store,
+            push_sender=push_sender
         )
         
-        # 创建A2A应用
-        app = A2AFastAPIApplication(
+        # 准入控制：限制同时执行的运行数，排满时快速拒绝
+        if self.admission is not None:
+            self.admission_controller = AdmissionController(self.name, self.admission)
+
+        # 创建A2A应用（客户端接受时以msgpack返回非流式结果）
+        app = AdmissionControlledA2AApplication(
             agent_card=agent_card,
-            http_handler=handler
+            http_handler=handler,
+            context_builder=DisconnectAwareContextBuilder(),
+            admission=self.admission_controller
         ).build()
+
+        # AgentCard端点支持ETag，客户端缓存过期后可通过条件请求重新验证
+        app.add_middleware(AgentCardETagMiddleware, agent_card=agent_card)
+        # 按Accept-Encoding压缩响应，SSE逐事件压缩
+        if self.serving.compression:
+            app.add_middleware(CompressionMiddleware, minimum_size=self.serving.compression_min_size)
+        # 按请求头开启单个请求的调试日志，并透传请求ID
+        app.add_middleware(TracingMiddleware)
+        # 请求/运行指标，GET /metrics以Prometheus文本格式导出
+        if self.serving.metrics:
+            app.add_api_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
+            app.add_middleware(HTTPMetricsMiddleware, server=self.name, paths=["/.well-known/agent.json"])
         
         return app
     
     async def start(self):
-        """启动服务器"""
+        """启动服务器（serving.workers大于1时启动多个工作进程）"""
+        if self.serving.multiprocess:
+            self._prepare_shared_state()
+            self._supervisor = WorkerSupervisor(self.create_app, self.host, self.port, self.serving)
+            self._supervisor.start()
+            tracer.info("%s已启动：http://%s:%s（%s个工作进程）%s",
+                        self.__class__.__name__, self.host, self.port, self.serving.workers, self._uds_note())
+            return
+
         app = self.create_app()
         
-        config = uvicorn.Config(
-            app=app,
-            host=self.host,
-            port=self.port
-        )
+        config = self.serving.uvicorn_config(app, self.host, self.port)
         
         server = uvicorn.Server(config)
         self._server = server
         
-        self._task = asyncio.create_task(server.serve())
-        print(f"{self.__class__.__name__}已启动：http://{self.host}:{self.port}")
+        if self.serving.uds:
+            # 同时监听TCP端口和unix socket
+            self._sockets = bind_sockets(self.host, self.port, self.serving)
+            self._task = asyncio.create_task(server.serve(sockets=self._sockets))
+        else:
+            self._task = asyncio.create_task(server.serve())
+        # 同一进程中的A2AAgent不经网络直接调用该应用（见agent/a2a/local_transport.py）
+        self._app = app
+        for url in local_urls(self.host, self.port, self.serving.uds):
+            register_local_app(url, app)
+        tracer.info("%s已启动：http://%s:%s%s", self.__class__.__name__, self.host, self.port, self._uds_note())
     
     async def stop(self):
         """停止服务器"""
+        if self._supervisor:
+            await self._supervisor.stop()
+            self._supervisor = None
+            tracer.info("%s已停止", self.__class__.__name__)
+
+        if self._app is not None:
+            for url in local_urls(self.host, self.port, self.serving.uds):
+                unregister_local_app(url, self._app)
+            self._app = None
+
         if self._server:
             self._server.should_exit = True
             
@@ -114,4 +209,26 @@ class BaseServer(ABC):
                 
             self._server = None
             self._task = None
-            print(f"{self.__class__.__name__}已停止") 
\ No newline at end of file
+            close_sockets(self._sockets, self.serving)
+            self._sockets = []
+            tracer.info("%s已停止", self.__class__.__name__) 
+
+    def _uds_note(self) -> str:
+        """启动日志中的unix socket地址"""
+        return f"，unix://{self.serving.uds}" if self.serving.uds else ""
+
+    def _prepare_shared_state(self):
+        """
+        多进程模式：任务需要在工作进程之间共享
+
+        tasks/get、tasks/resubscribe等请求可能落到与执行任务不同的工作进程上，进程内的任务存储查不到，
+        未指定时在临时目录下使用SQLite任务存储。
+        """
+        if self.task_store is None:
+            from agno_a2a_ext.servers.sql_task_store import SqlTaskStore
+
+            db_file = os.path.join(tempfile.gettempdir(), f"agno_a2a_tasks_{self.port}.db")
+            self.task_store = SqlTaskStore(db_file=db_file, retention=SHARED_TASK_RETENTION)
+            tracer.info("多进程模式使用共享任务存储: %s", db_file)
+        elif isinstance(self.task_store, (InMemoryTaskStore, BoundedInMemoryTaskStore)):
+            tracer.warning("多进程模式下进程内任务存储不在工作进程之间共享，建议使用SqlTaskStore")
@@ -0,0 +1,112 @@
+# agent_server/servers/cancellation.py
+import asyncio
+from typing import AsyncIterator, Awaitable, TypeVar
+
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from agno_a2a_ext.observability.tracing import get_tracer
+
+tracer = get_tracer(__name__)
+
+T = TypeVar("T")
+
+# 客户端在响应返回前断开时使用的状态码（沿用nginx的约定，实际不会被客户端收到）
+CLIENT_CLOSED_REQUEST = 499
+
+_END = object()
+
+
+async def wait_for_disconnect(request: Request) -> None:
+    """
+    等待客户端断开连接
+
+    请求体已被读取后，ASGI的receive只会在客户端断开时返回http.disconnect，因此可以一直等待。
+    """
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def run_until_disconnected(request: Request, awaitable: Awaitable[T]) -> T:
+    """
+    执行调用（例如agent.arun），客户端断开时取消
+
+    Args:
+        request: 当前HTTP请求
+        awaitable: 待执行的调用
+
+    Returns:
+        调用结果
+
+    Raises:
+        HTTPException: 客户端已断开（499）
+    """
+    work = asyncio.ensure_future(awaitable)
+    disconnected = asyncio.ensure_future(wait_for_disconnect(request))
+    try:
+        await asyncio.wait({work, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        disconnected.cancel()
+        if not work.done():
+            work.cancel()
+            # 等待运行处理完取消（释放下游连接等）
+            await asyncio.wait({work})
+    if work.cancelled():
+        tracer.info("客户端已断开，已取消运行: %s", request.url.path)
+        raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
+    return work.result()
+
+
+async def stream_until_disconnected(request: Request, stream: AsyncIterator[T]) -> AsyncIterator[T]:
+    """
+    转发流式响应，客户端断开时取消产生数据的运行
+
+    数据流在独立任务中消费（经过容量为1的队列保持背压），客户端断开时立即取消该任务，
+    不需要等到下一个数据块写入失败才发现断开；正在进行的agent/team运行及其下游A2A调用随之取消。
+
+    Args:
+        request: 当前HTTP请求
+        stream: 原始数据流（例如chat_response_streamer）
+
+    Yields:
+        原始数据流的数据块
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+
+    async def pump():
+        try:
+            async for item in stream:
+                await queue.put((item, None))
+        except Exception as e:
+            await queue.put((_END, e))
+        else:
+            await queue.put((_END, None))
+        finally:
+            # 被取消时数据流可能停在yield处，显式关闭以结束其中的运行
+            aclose = getattr(stream, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    producer = asyncio.ensure_future(pump())
+    disconnected = asyncio.ensure_future(wait_for_disconnect(request))
+    getter = None
+    try:
+        while True:
+            getter = asyncio.ensure_future(queue.get())
+            await asyncio.wait({getter, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if not getter.done():
+                tracer.info("客户端已断开，已取消流式运行: %s", request.url.path)
+                return
+            item, error = getter.result()
+            if item is _END:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        if getter is not None:
+            getter.cancel()
+        disconnected.cancel()
+        producer.cancel()
@@ -0,0 +1,303 @@
+# agent_server/servers/encoding.py
+import zlib
+from collections.abc import AsyncGenerator
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from a2a.server.apps.jsonrpc.fastapi_app import A2AFastAPIApplication
+from a2a.types import JSONRPCErrorResponse
+from starlette.requests import Request
+from starlette.responses import Response
+
+from agno_a2a_ext.agent.a2a.wire import MSGPACK_MEDIA_TYPE, accepts_media_type, import_msgpack, msgpack_available
+
+# 服务端按此顺序选择客户端接受的压缩算法
+DEFAULT_ENCODINGS = ("zstd", "br", "gzip")
+# 小于该大小（字节）的完整响应不压缩，压缩收益抵不过开销
+DEFAULT_MINIMUM_SIZE = 1024
+
+# 可压缩的响应类型（text/*之外）
+_COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    MSGPACK_MEDIA_TYPE,
+}
+
+# 当前A2A请求是否以msgpack返回结果
+_msgpack_response: ContextVar[bool] = ContextVar("a2a_msgpack_response", default=False)
+
+
+class _GzipEncoder:
+    def __init__(self):
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        # Z_SYNC_FLUSH：已写入的数据立即可被解压，压缩上下文保留给后续数据
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliEncoder:
+    def __init__(self):
+        import brotli
+
+        # 默认质量11只适合离线压缩，5在速度与压缩率之间较均衡
+        self._compressor = brotli.Compressor(quality=5)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdEncoder:
+    def __init__(self):
+        import zstandard
+
+        self._flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        self._compressor = zstandard.ZstdCompressor(level=3).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(self._flush_block)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+_ENCODERS = {"gzip": _GzipEncoder, "br": _BrotliEncoder, "zstd": _ZstdEncoder}
+_ENCODER_MODULES = {"br": "brotli", "zstd": "zstandard"}
+
+
+def available_encodings(encodings: Sequence[str] = DEFAULT_ENCODINGS) -> List[str]:
+    """
+    过滤出已安装依赖的压缩算法（gzip总是可用，br需要brotli，zstd需要zstandard）
+
+    Args:
+        encodings: 按优先级排列的压缩算法
+
+    Returns:
+        List[str]: 可用的压缩算法
+    """
+    result = []
+    for encoding in encodings:
+        if encoding not in _ENCODERS:
+            raise ValueError(f"不支持的压缩算法: {encoding}")
+        module = _ENCODER_MODULES.get(encoding)
+        if module is not None:
+            try:
+                __import__(module)
+            except ImportError:
+                continue
+        result.append(encoding)
+    return result
+
+
+def select_encoding(accept_encoding: str, encodings: Sequence[str]) -> Optional[str]:
+    """
+    按服务端优先级选择客户端接受的压缩算法
+
+    Args:
+        accept_encoding: Accept-Encoding请求头
+        encodings: 服务端支持的压缩算法（按优先级）
+
+    Returns:
+        Optional[str]: 选中的算法，客户端不接受任何一种时返回None
+    """
+    accepted: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, *params = [part.strip() for part in item.split(";")]
+        if not name:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name.lower()] = quality
+    for encoding in encodings:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > 0:
+            return encoding
+    return None
+
+
+def _is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";")[0].strip().lower()
+    return media_type.startswith("text/") or media_type in _COMPRESSIBLE_TYPES \
+        or media_type.endswith("+json") or media_type.endswith("+xml")
+
+
+class CompressionMiddleware:
+    """
+    按Accept-Encoding协商压缩响应的ASGI中间件（zstd、br、gzip）
+
+    - 完整响应：小于minimum_size时原样返回，否则整体压缩并更新Content-Length
+    - 流式响应（SSE、StreamingResponse）：使用同一个压缩上下文，每个数据块写入后立即flush，
+      客户端收到每个事件即可解压，不需要等待响应结束；后续事件共享前文的压缩字典，重复的字段名几乎不占带宽
+    - 已经编码的响应、不可压缩的类型（图片等）、HEAD请求和不接受压缩的客户端不受影响
+    """
+
+    def __init__(self, app, minimum_size: int = DEFAULT_MINIMUM_SIZE, encodings: Sequence[str] = DEFAULT_ENCODINGS):
+        """
+        初始化中间件
+
+        Args:
+            app: 下游ASGI应用
+            minimum_size: 完整响应压缩的最小大小（字节）
+            encodings: 按优先级排列的压缩算法，未安装依赖的算法自动跳过
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = available_encodings(encodings)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for name, value in scope.get("headers", []):
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = select_encoding(accept_encoding, self.encodings) if accept_encoding else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressingResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    """压缩单个响应"""
+
+    def __init__(self, send, encoding: str, minimum_size: int):
+        self._send = send
+        self._encoding = encoding
+        self._minimum_size = minimum_size
+        self._start: Optional[dict] = None
+        self._encoder: Any = None
+        # None：尚未决定；True：压缩；False：原样转发
+        self._compress: Optional[bool] = None
+
+    async def send(self, message: dict) -> None:
+        if message["type"] == "http.response.start":
+            self._start = message
+            headers = _header_dict(message.get("headers", []))
+            status = message["status"]
+            if "content-encoding" in headers or status < 200 or status in (204, 304) \
+                    or not _is_compressible(headers.get("content-type", "")):
+                self._compress = False
+                await self._send(message)
+            elif headers.get("content-type", "").startswith("text/event-stream"):
+                # SSE必须立即开始响应
+                await self._start_compressed()
+            return
+
+        if message["type"] != "http.response.body" or self._compress is False:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self._compress is None:
+            if not more_body:
+                # 完整响应：按大小决定是否压缩
+                if len(body) < self._minimum_size:
+                    self._compress = False
+                    await self._send(self._start)
+                    await self._send(message)
+                    return
+                encoder = _ENCODERS[self._encoding]()
+                compressed = encoder.compress(body) + encoder.finish()
+                self._compress = True
+                await self._send(self._with_encoding(self._start, content_length=len(compressed)))
+                await self._send({"type": "http.response.body", "body": compressed})
+                return
+            await self._start_compressed()
+
+        if more_body:
+            data = self._encoder.compress(body) + self._encoder.flush() if body else b""
+        else:
+            data = self._encoder.compress(body) + self._encoder.finish()
+        await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+    async def _start_compressed(self) -> None:
+        self._compress = True
+        self._encoder = _ENCODERS[self._encoding]()
+        await self._send(self._with_encoding(self._start))
+
+    def _with_encoding(self, start: dict, content_length: Optional[int] = None) -> dict:
+        headers: List[Tuple[bytes, bytes]] = []
+        vary = None
+        for name, value in start.get("headers", []):
+            if name == b"content-length":
+                continue
+            if name == b"vary":
+                vary = value
+                continue
+            if name == b"etag" and value.startswith(b'"'):
+                # 压缩后的内容与原始内容不同，强ETag改为弱ETag
+                value = b"W/" + value
+            headers.append((name, value))
+        headers.append((b"content-encoding", self._encoding.encode("latin-1")))
+        headers.append((b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"))
+        if content_length is not None:
+            headers.append((b"content-length", str(content_length).encode("latin-1")))
+        return {**start, "headers": headers}
+
+
+def _header_dict(headers) -> Dict[str, str]:
+    return {name.decode("latin-1").lower(): value.decode("latin-1") for name, value in headers}
+
+
+class _MsgpackJSONRPCResponse(Response):
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return import_msgpack().packb(content)
+
+
+class NegotiatingA2AFastAPIApplication(A2AFastAPIApplication):
+    """
+    按Accept协商结果编码的A2A应用
+
+    客户端在Accept中明确接受application/msgpack时（WireFormatClient），非流式JSON-RPC结果以msgpack返回，
+    其余情况（包括未安装msgpack、SSE、请求解析错误）与A2AFastAPIApplication完全一致，返回JSON。
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.msgpack_enabled = msgpack_available()
+
+    async def _handle_requests(self, request: Request) -> Response:
+        wants_msgpack = self.msgpack_enabled and accepts_media_type(request.headers.get("accept"), MSGPACK_MEDIA_TYPE)
+        token = _msgpack_response.set(wants_msgpack)
+        try:
+            return await super()._handle_requests(request)
+        finally:
+            _msgpack_response.reset(token)
+
+    def _create_response(self, handler_result: Any) -> Response:
+        if not _msgpack_response.get() or isinstance(handler_result, AsyncGenerator):
+            return super()._create_response(handler_result)
+        model = handler_result if isinstance(handler_result, JSONRPCErrorResponse) else handler_result.root
+        return _MsgpackJSONRPCResponse(model.model_dump(mode="json", exclude_none=True))
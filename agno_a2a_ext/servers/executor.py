@@ -0,0 +1,164 @@
+# agent_server/servers/executor.py
+import asyncio
+from abc import abstractmethod
+from datetime import datetime, timezone
+from typing import Dict, Optional, Set, Tuple
+from uuid import uuid4
+
+from a2a.server.agent_execution.agent_executor import AgentExecutor
+from a2a.server.tasks.task_updater import TaskUpdater
+from a2a.types import Message, Part, Role, TaskState, TaskStatus, TaskStatusUpdateEvent, TextPart
+
+from agno_a2a_ext.observability.metrics import track_run
+from agno_a2a_ext.observability.tracing import get_tracer
+
+tracer = get_tracer(__name__)
+
+
+class CancellableExecutor(AgentExecutor):
+    """
+    可真正取消的执行器基类
+
+    子类在run中实现执行逻辑。execute把run放到独立的asyncio任务中执行并按task_id登记，
+    cancel/abort会取消该任务：正在进行的agent/team运行及其发出的下游A2A调用随之取消，
+    执行器随后发布canceled状态（final）的事件，请求处理器和事件队列按正常结束流程清理。
+    """
+
+    # 取消后状态消息中的文本
+    cancel_message_text = "Task has been cancelled by user"
+
+    def __init__(self):
+        # task_id -> (正在执行的run任务, context_id)
+        self._runs: Dict[str, Tuple[asyncio.Task, Optional[str]]] = {}
+        self._cancel_requested: Set[str] = set()
+
+    @abstractmethod
+    async def run(self, context, event_queue) -> None:
+        """
+        执行请求并把结果放入事件队列
+
+        Args:
+            context: 请求上下文
+            event_queue: 事件队列
+        """
+        pass
+
+    def run_labels(self) -> Tuple[str, str]:
+        """
+        运行指标中的类型与名称，子类按包装的agent/team覆盖
+
+        Returns:
+            Tuple[str, str]: ("agent"或"team", 名称)
+        """
+        return "agent", type(self).__name__
+
+    @staticmethod
+    def session_id_of(context) -> Optional[str]:
+        """
+        请求携带的会话ID
+
+        A2AAgent把session_id作为消息的context_id发送；没有携带时请求上下文会生成新的context_id，
+        即新会话。
+
+        Args:
+            context: 请求上下文
+
+        Returns:
+            Optional[str]: 会话ID
+        """
+        message = getattr(context, "message", None)
+        return getattr(message, "context_id", None) or getattr(context, "context_id", None)
+
+    @staticmethod
+    async def publish_failure(context, event_queue, error_text: str) -> None:
+        """
+        把执行失败发布为任务的failed状态（final）
+
+        失败不能作为普通的agent消息返回：调用方会把它当作成功的回复（写入响应缓存、后台任务标记为completed）。
+
+        Args:
+            context: 请求上下文
+            event_queue: 事件队列
+            error_text: 错误说明
+        """
+        updater = TaskUpdater(event_queue, context.task_id, context.context_id)
+        await updater.failed(updater.new_agent_message([Part(root=TextPart(text=error_text))]))
+
+    async def execute(self, context, event_queue):
+        """
+        执行请求，被cancel/abort取消时发布canceled状态
+
+        运行计入/metrics的运行指标，run中（包括其创建的任务）输出的数据块计入首块延迟和数据块数。
+
+        Args:
+            context: 请求上下文
+            event_queue: 事件队列
+        """
+        task_id = context.task_id
+        with track_run(*self.run_labels(), "a2a") as timer:
+            run = asyncio.ensure_future(self.run(context, event_queue))
+            self._runs[task_id] = (run, context.context_id)
+            try:
+                await run
+            except asyncio.CancelledError:
+                if task_id not in self._cancel_requested:
+                    raise
+                timer.status = "cancelled"
+                tracer.info("%s: 任务已取消", type(self).__name__, task_id=task_id)
+                await event_queue.enqueue_event(self._canceled_event(task_id, context.context_id))
+            finally:
+                self._runs.pop(task_id, None)
+                self._cancel_requested.discard(task_id)
+
+    async def cancel(self, context, event_queue):
+        """
+        取消正在执行的任务
+
+        任务仍在执行时，由execute在run结束后发布canceled状态；否则直接发布canceled状态。
+
+        Args:
+            context: 请求上下文
+            event_queue: 事件队列
+        """
+        if not self.abort(context.task_id):
+            await event_queue.enqueue_event(self._canceled_event(context.task_id, context.context_id))
+
+    def abort(self, task_id: Optional[str]) -> bool:
+        """
+        取消正在执行的任务（同步调用，可以在已被取消的协程中使用）
+
+        Args:
+            task_id: 任务ID
+
+        Returns:
+            bool: 是否有正在执行的任务被取消
+        """
+        entry = self._runs.get(task_id) if task_id else None
+        if entry is None or entry[0].done():
+            return False
+        self._cancel_requested.add(task_id)
+        entry[0].cancel()
+        return True
+
+    def context_id_of(self, task_id: str) -> Optional[str]:
+        """正在执行的任务所属的context_id"""
+        entry = self._runs.get(task_id)
+        return entry[1] if entry else None
+
+    def _canceled_event(self, task_id: str, context_id: Optional[str]) -> TaskStatusUpdateEvent:
+        return TaskStatusUpdateEvent(
+            task_id=task_id,
+            context_id=context_id,
+            status=TaskStatus(
+                state=TaskState.canceled,
+                message=Message(
+                    message_id=str(uuid4()),
+                    role=Role.agent,
+                    parts=[Part(root=TextPart(text=self.cancel_message_text))],
+                    task_id=task_id,
+                    context_id=context_id,
+                ),
+                timestamp=datetime.now(timezone.utc).isoformat(),
+            ),
+            final=True,
+        )
@@ -0,0 +1,332 @@
+# agent_server/servers/handler.py
+import asyncio
+from datetime import datetime, timezone
+from typing import AsyncGenerator, Dict, Optional, Set
+from uuid import uuid4
+
+from a2a.server.apps.jsonrpc.jsonrpc_app import DefaultCallContextBuilder
+from a2a.server.context import ServerCallContext
+from a2a.server.events import EventConsumer
+from a2a.server.request_handlers.default_request_handler import TERMINAL_TASK_STATES, DefaultRequestHandler
+from a2a.server.tasks.task_manager import TaskManager
+from a2a.types import (
+    Artifact,
+    Message,
+    MessageSendParams,
+    Part,
+    Role,
+    Task,
+    TaskIdParams,
+    TaskNotCancelableError,
+    TaskNotFoundError,
+    TaskState,
+    TaskStatus,
+    TextPart,
+)
+from a2a.utils.errors import ServerError
+from starlette.requests import Request
+
+from agno_a2a_ext.observability.tracing import get_tracer
+from agno_a2a_ext.servers.admission import ADMISSION_STATE_KEY
+from agno_a2a_ext.servers.cancellation import wait_for_disconnect
+from agno_a2a_ext.servers.executor import CancellableExecutor
+from agno_a2a_ext.servers.streaming import STREAMING_STATE_KEY
+
+tracer = get_tracer(__name__)
+
+# ServerCallContext.state中保存原始HTTP请求的键，请求处理器据此检测客户端断开
+HTTP_REQUEST_STATE_KEY = "http_request"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class DisconnectAwareContextBuilder(DefaultCallContextBuilder):
+    """在调用上下文中保存原始HTTP请求，使请求处理器可以检测客户端断开"""
+
+    def build(self, request: Request) -> ServerCallContext:
+        context = super().build(request)
+        context.state[HTTP_REQUEST_STATE_KEY] = request
+        return context
+
+
+class BackgroundRequestHandler(DefaultRequestHandler):
+    """
+    支持提交后通知（submit-and-notify）的请求处理器
+
+    message/send的configuration.blocking为False时，不再等待执行完成：
+        - 立即保存并返回submitted状态的Task
+        - 执行器在后台运行，结束后把结果写入任务存储（客户端可以通过tasks/get轮询）
+        - 请求中带有pushNotificationConfig时，任务结束后向该webhook推送最终的Task
+
+    执行器返回Message时，会转换为completed状态的Task（Message同时作为状态消息和结果artifact），
+    保证后台任务总能通过tasks/get查询到结果。执行失败不会以Message返回：执行器发布failed状态
+    （CancellableExecutor.publish_failure）时按原样保存，执行器抛出异常时保存为failed状态，
+    轮询和推送通知得到的都是failed。
+
+    取消（执行器为CancellableExecutor时）：
+        - 阻塞的message/send和message/stream的客户端断开时，中止对应的执行
+        - tasks/cancel中止正在执行的任务（包括只返回Message、尚未保存Task的执行）；
+          任务由其他工作进程执行（多进程共享任务存储）时返回TaskNotCancelableError
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 持有后台任务的引用，避免执行中被垃圾回收
+        self._background_tasks: Set[asyncio.Task] = set()
+        # 执行中的请求：message_id -> task_id
+        self._executions: Dict[str, str] = {}
+
+    async def on_message_send(
+            self,
+            params: MessageSendParams,
+            context: Optional[ServerCallContext] = None,
+    ):
+        if params.configuration is None or params.configuration.blocking is not False:
+            return await self._send_until_disconnected(params, context)
+
+        # 预先确定context_id，以便在执行器产生事件之前就保存任务
+        if not params.message.context_id:
+            params.message.context_id = str(uuid4())
+
+        (
+            task_manager,
+            task_id,
+            queue,
+            result_aggregator,
+            producer_task,
+        ) = await self._setup_message_execution(params, context)
+
+        consumer = EventConsumer(queue)
+        producer_task.add_done_callback(consumer.agent_task_callback)
+
+        task = await task_manager.get_task()
+        if task is None:
+            task = Task(
+                id=task_id,
+                context_id=params.message.context_id,
+                status=TaskStatus(state=TaskState.submitted, timestamp=_now()),
+                history=[params.message],
+            )
+            await task_manager.save_task_event(task)
+
+        self._spawn(self._run_in_background(task_manager, task_id, consumer, result_aggregator, producer_task))
+        tracer.debug("BackgroundRequestHandler: 任务已提交，后台执行", task_id=task_id)
+        return task
+
+    async def on_message_send_stream(
+            self,
+            params: MessageSendParams,
+            context: Optional[ServerCallContext] = None,
+    ) -> AsyncGenerator:
+        # 告知执行器调用方在等待流式事件，执行器据此逐块发布输出
+        context = context or ServerCallContext()
+        context.state[STREAMING_STATE_KEY] = True
+        task_manager, task_id, queue, result_aggregator, producer_task = await self._setup_message_execution(
+            params, context
+        )
+        completed = False
+        try:
+            consumer = EventConsumer(queue)
+            producer_task.add_done_callback(consumer.agent_task_callback)
+            async for event in result_aggregator.consume_and_emit(consumer):
+                if isinstance(event, Task):
+                    self._validate_task_id_match(task_id, event.id)
+                await self._send_push_notification_if_needed(task_id, result_aggregator)
+                yield event
+            completed = True
+        finally:
+            if completed:
+                await self._cleanup_producer(producer_task, task_id)
+            else:
+                # 客户端断开（SSE响应被取消）：当前协程处于取消状态，在这里等待执行结束会把取消直接传给执行任务，
+                # 因此先同步中止执行，再在独立任务中消费其剩余事件（包括canceled状态）并清理
+                self._abort(task_id)
+                self._spawn(self._drain_abandoned(queue, result_aggregator, producer_task, task_id))
+
+    async def on_cancel_task(
+            self,
+            params: TaskIdParams,
+            context: Optional[ServerCallContext] = None,
+    ) -> Optional[Task]:
+        if not isinstance(self.agent_executor, CancellableExecutor):
+            return await super().on_cancel_task(params, context)
+
+        task = await self.task_store.get(params.id)
+        if task is not None and task.status.state in TERMINAL_TASK_STATES:
+            raise ServerError(error=TaskNotCancelableError())
+        producer = self._running_agents.get(params.id)
+        context_id = self.agent_executor.context_id_of(params.id)
+        if self.agent_executor.abort(params.id):
+            tracer.info("BackgroundRequestHandler: 收到tasks/cancel，已中止执行", task_id=params.id)
+            # 执行器发布canceled状态后结束，等待其完成以返回最终状态
+            if producer is not None:
+                await asyncio.wait({producer})
+            task = await self.task_store.get(params.id)
+        elif task is None:
+            raise ServerError(error=TaskNotFoundError())
+        else:
+            # 未结束的任务不在本进程执行（多进程共享任务存储时由其他工作进程执行）：无法中止，
+            # 直接标记为canceled会在执行结束时被覆盖，因此拒绝取消
+            tracer.info("BackgroundRequestHandler: 任务不在本进程执行，无法取消", task_id=params.id)
+            raise ServerError(error=TaskNotCancelableError(
+                message="Task is not running in this process and cannot be canceled here"))
+
+        if task is None:
+            # 只返回Message的执行没有保存过Task
+            task = Task(id=params.id, context_id=context_id or str(uuid4()), status=TaskStatus(state=TaskState.canceled))
+        if task.status.state != TaskState.canceled:
+            task.status = TaskStatus(state=TaskState.canceled, timestamp=_now())
+            await self.task_store.save(task)
+        return task
+
+    async def _setup_message_execution(self, params: MessageSendParams, context: Optional[ServerCallContext] = None):
+        result = await super()._setup_message_execution(params, context)
+        task_id, producer_task = result[1], result[4]
+        message_id = params.message.message_id
+        self._executions[message_id] = task_id
+        producer_task.add_done_callback(lambda _: self._executions.pop(message_id, None))
+        # 准入控制分配的执行名额由执行任务持有，运行结束（包括后台运行）时归还
+        request = context.state.get(HTTP_REQUEST_STATE_KEY) if context is not None else None
+        ticket = getattr(request.state, ADMISSION_STATE_KEY, None) if request is not None else None
+        if ticket is not None:
+            ticket.handoff(producer_task)
+        return result
+
+    async def _send_until_disconnected(self, params: MessageSendParams, context: Optional[ServerCallContext]):
+        """阻塞的message/send：客户端在结果返回前断开时中止执行"""
+        request = context.state.get(HTTP_REQUEST_STATE_KEY) if context is not None else None
+        if request is None:
+            return await super().on_message_send(params, context)
+
+        send = asyncio.ensure_future(super().on_message_send(params, context))
+        disconnected = asyncio.ensure_future(wait_for_disconnect(request))
+        try:
+            await asyncio.wait({send, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            disconnected.cancel()
+            if not send.done():
+                # 执行器发布canceled状态后，send按正常流程结束并清理
+                self._abort(self._executions.get(params.message.message_id))
+        return await send
+
+    def _abort(self, task_id: Optional[str]) -> None:
+        """中止客户端已断开的执行（同步调用，可以在已被取消的协程中使用）"""
+        if task_id is None:
+            return
+        tracer.info("BackgroundRequestHandler: 客户端已断开，中止执行", task_id=task_id)
+        if isinstance(self.agent_executor, CancellableExecutor):
+            self.agent_executor.abort(task_id)
+        else:
+            producer = self._running_agents.get(task_id)
+            if producer is not None:
+                producer.cancel()
+
+    async def _drain_abandoned(self, queue, result_aggregator, producer_task: asyncio.Task, task_id: str) -> None:
+        """
+        消费被客户端放弃的执行剩余的事件并保存最终状态，执行结束后清理队列和执行登记
+
+        事件队列关闭时会等待所有事件被消费，无人消费时执行任务无法结束。
+        """
+        try:
+            consumer = EventConsumer(queue)
+            producer_task.add_done_callback(consumer.agent_task_callback)
+            await result_aggregator.consume_all(consumer)
+        except Exception as e:
+            tracer.debug("BackgroundRequestHandler: 消费剩余事件时出错: %s", e, task_id=task_id)
+        await asyncio.wait({producer_task})
+        try:
+            await self._cleanup_producer(producer_task, task_id)
+        except BaseException as e:
+            tracer.debug("BackgroundRequestHandler: 清理执行时出错: %r", e, task_id=task_id)
+
+    def _spawn(self, coro) -> asyncio.Task:
+        """启动后台任务并持有其引用"""
+        task = asyncio.get_running_loop().create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+    async def _run_in_background(self, task_manager: TaskManager, task_id: str, consumer, result_aggregator,
+                                 producer_task: asyncio.Task) -> None:
+        """消费执行器事件直到结束，保存最终结果并发送推送通知，任务结束后删除其推送配置"""
+        try:
+            try:
+                result = await result_aggregator.consume_all(consumer)
+                task = await self._finalize(task_manager, result)
+            except Exception as e:
+                tracer.exception("BackgroundRequestHandler: 后台任务执行失败: %s", e, task_id=task_id)
+                task = await self._finalize(
+                    task_manager,
+                    None,
+                    TaskStatus(
+                        state=TaskState.failed,
+                        message=self._agent_message(f"Execution error: {str(e)}", task_manager),
+                        timestamp=_now(),
+                    ),
+                )
+            if self._push_sender is not None and task is not None:
+                await self._push_sender.send_notification(task)
+            if task is not None and task.status.state in TERMINAL_TASK_STATES:
+                await self._delete_push_configs(task.id)
+        finally:
+            try:
+                await self._cleanup_producer(producer_task, task_id)
+            except Exception as e:
+                tracer.debug("BackgroundRequestHandler: 清理后台任务时出错: %s", e, task_id=task_id)
+
+    async def _finalize(
+            self,
+            task_manager: TaskManager,
+            result,
+            status: Optional[TaskStatus] = None,
+    ) -> Optional[Task]:
+        """
+        把执行结果合并到任务中并保存
+
+        Message结果（执行成功的回复）保存为completed；执行器已发布最终状态（例如failed）时按原样返回；
+        status用于记录执行器抛出异常时的failed状态。
+        """
+        task = await task_manager.get_task()
+        if task is None:
+            if not isinstance(result, Message) and status is None:
+                return None
+            # 任务记录已不在存储中（例如被清理），按请求重建，保证最终结果被保存并推送
+            tracer.warning("BackgroundRequestHandler: 任务记录已丢失，重建后保存结果", task_id=task_manager.task_id)
+            task = Task(
+                id=task_manager.task_id,
+                context_id=task_manager.context_id or str(uuid4()),
+                status=TaskStatus(state=TaskState.working, timestamp=_now()),
+            )
+        if isinstance(result, Message):
+            status = TaskStatus(state=TaskState.completed, message=result, timestamp=_now())
+            task.artifacts = (task.artifacts or []) + [
+                Artifact(artifact_id=str(uuid4()), name="result", parts=result.parts)
+            ]
+        elif status is None:
+            # 执行器自己维护任务状态（例如通过TaskUpdater），已经保存过
+            return task
+        task.status = status
+        await task_manager.save_task_event(task)
+        return task
+
+    async def _delete_push_configs(self, task_id: str) -> None:
+        """任务结束并已推送后删除其推送配置，避免配置存储随任务数无限增长"""
+        if self._push_config_store is None:
+            return
+        try:
+            for config in list(await self._push_config_store.get_info(task_id)):
+                await self._push_config_store.delete_info(task_id, config.id)
+        except Exception as e:
+            tracer.debug("BackgroundRequestHandler: 删除推送配置时出错: %s", e, task_id=task_id)
+
+    @staticmethod
+    def _agent_message(text: str, task_manager: TaskManager) -> Message:
+        return Message(
+            message_id=str(uuid4()),
+            role=Role.agent,
+            parts=[Part(root=TextPart(text=text))],
+            task_id=task_manager.task_id,
+            context_id=task_manager.context_id,
+        )
@@ -0,0 +1,201 @@
+# agent_server/servers/isolation.py
+import copy
+import threading
+from typing import Any, Dict, Type
+
+from agno.memory.v2 import Memory
+from agno.run.team import TeamRunResponse
+from agno.team.team import Team
+
+from agno_a2a_ext.observability.tracing import get_tracer
+
+tracer = get_tracer(__name__)
+
+# 每次运行都会原地修改的字典状态，副本各持一份
+_RUN_STATE_DICTS = ("session_state", "team_session_state", "workflow_session_state", "extra_data")
+
+# 运行期间累积的媒体
+_MEDIA_FIELDS = ("images", "videos", "audio")
+
+# 副本与模板共享的持久化组件
+_SHARED_FIELDS = ("memory", "storage")
+
+# 运行期间会被写入工具等配置的模型，副本各持一份
+_MODEL_FIELDS = ("model", "reasoning_model", "parser_model")
+
+_guarded_classes: Dict[type, type] = {}
+_guarded_lock = threading.Lock()
+
+
+class _GuardedTeamRunResponse(TeamRunResponse):
+    """跳过空成员结果的TeamRunResponse（成员运行失败时没有run_response）"""
+
+    def add_member_run(self, run_response) -> None:
+        if run_response is None:
+            tracer.warning("Skipping add_member_run for None run_response")
+            return
+        super().add_member_run(run_response)
+
+
+def _guarded_team_class(team_class: Type[Team]) -> Type[Team]:
+    """
+    为Team类生成跳过空成员结果的子类（按类缓存）
+
+    替代对Team._update_team_media和TeamRunResponse.add_member_run的类级别临时替换：
+    只作用于该子类的实例，并发请求之间互不影响。
+    """
+    with _guarded_lock:
+        guarded = _guarded_classes.get(team_class)
+        if guarded is not None:
+            return guarded
+
+        def _update_team_media(self, run_response) -> None:
+            if run_response is None:
+                tracer.warning("Skipping media update for None run_response")
+                return
+            team_class._update_team_media(self, run_response)
+
+        def _get_run_response(self):
+            return self.__dict__.get("run_response")
+
+        def _set_run_response(self, value) -> None:
+            # Team在每次运行开始时创建TeamRunResponse，换成跳过空成员结果的子类
+            if type(value) is TeamRunResponse:
+                value.__class__ = _GuardedTeamRunResponse
+            self.__dict__["run_response"] = value
+
+        guarded = type(team_class.__name__, (team_class,), {
+            "__module__": team_class.__module__,
+            "__qualname__": team_class.__qualname__,
+            "_update_team_media": _update_team_media,
+            "run_response": property(_get_run_response, _set_run_response),
+        })
+        _guarded_classes[team_class] = guarded
+        return guarded
+
+
+def prepare_template(template: Any) -> None:
+    """
+    为复制做准备：提前创建默认的记忆
+
+    Agent/Team在首次运行时才创建默认记忆，副本各自创建会丢失跨请求的会话历史，
+    因此在复制前创建一次，由所有副本共享。
+
+    Args:
+        template: 作为模板的Agent或Team
+    """
+    if getattr(template, "memory", "") is None:
+        template.memory = Memory()
+    for member in getattr(template, "members", None) or []:
+        prepare_template(member)
+
+
+def clone_instance(template: Any) -> Any:
+    """
+    复制Agent或Team，副本持有独立的运行状态
+
+    Args:
+        template: 作为模板的Agent或Team
+
+    Returns:
+        独立的实例
+    """
+    return clone_member(template)
+
+
+def reset_instance(instance: Any, template: Any) -> None:
+    """
+    把用过的副本恢复到模板的初始状态（实例池归还时使用）
+
+    清除运行状态和会话状态，模型、工具、已建立的客户端连接等保留，下次运行无需重新初始化。
+
+    Args:
+        instance: clone_instance创建的副本
+        template: 创建该副本的模板
+    """
+    if isinstance(instance, Team):
+        instance._reset_run_state()
+        instance._reset_session()
+        for member, member_template in zip(instance.members, template.members):
+            reset_instance(member, member_template)
+    else:
+        reset_run_state = getattr(instance, "reset_run_state", None)
+        if callable(reset_run_state):
+            reset_run_state()
+        reset_session = getattr(instance, "reset_session", None)
+        if callable(reset_session):
+            reset_session()
+    if hasattr(template, "session_id"):
+        instance.session_id = template.session_id
+    _restore_state(instance, template)
+
+
+def clone_member(member: Any) -> Any:
+    """
+    复制团队成员用于单次运行
+
+    Args:
+        member: Agent或嵌套的Team
+
+    Returns:
+        独立的成员实例
+    """
+    if isinstance(member, Team):
+        return clone_team(member)
+    deep_copy = getattr(member, "deep_copy", None)
+    clone = deep_copy() if callable(deep_copy) else copy.copy(member)
+    # Agent.deep_copy会复制记忆和存储，改为与模板共享，会话历史在所有副本间累积
+    for name in _SHARED_FIELDS:
+        if hasattr(member, name):
+            setattr(clone, name, getattr(member, name))
+    return clone
+
+
+def clone_team(team: Team) -> Team:
+    """
+    复制Team用于单次运行（每个请求一个实例）
+
+    Team和成员把运行状态（run_response、run_id、会话状态、媒体、模型上的工具等）保存在实例上，
+    同一实例上的并发运行会相互覆盖。副本持有独立的运行状态、模型和成员；
+    记忆、存储和知识库等持久化组件与原实例共享，会话历史照常累积。
+
+    Args:
+        team: 作为模板的Team（自身不会被运行）
+
+    Returns:
+        Team: 独立的Team实例
+    """
+    clone = copy.copy(team)
+    clone.__class__ = _guarded_team_class(type(team))
+    clone.members = [clone_member(member) for member in team.members]
+    clone._reset_run_state()
+    _restore_state(clone, team)
+    for name in _MODEL_FIELDS:
+        value = getattr(team, name, None)
+        if value is not None:
+            setattr(clone, name, _copy_model(value))
+    return clone
+
+
+def _restore_state(instance: Any, template: Any) -> None:
+    """从模板复制会话状态字典和媒体列表"""
+    for name in _RUN_STATE_DICTS:
+        value = getattr(template, name, None)
+        if value is not None or getattr(instance, name, None) is not None:
+            setattr(instance, name, copy.deepcopy(value))
+    for name in _MEDIA_FIELDS:
+        value = getattr(template, name, None)
+        if value is not None or getattr(instance, name, None) is not None:
+            setattr(instance, name, list(value) if value is not None else None)
+
+
+def _copy_model(model: Any) -> Any:
+    """与Agent.deep_copy一致：优先深拷贝，失败时浅拷贝"""
+    try:
+        return copy.deepcopy(model)
+    except Exception:
+        try:
+            return copy.copy(model)
+        except Exception as e:
+            tracer.warning("Failed to copy model %s: %s", type(model).__name__, e)
+            return model
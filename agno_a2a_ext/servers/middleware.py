@@ -0,0 +1,275 @@
+# agent_server/servers/middleware.py
+import hashlib
+import json
+import re
+import time
+from typing import Callable, Optional, Sequence, Tuple
+from uuid import uuid4
+
+from a2a.types import AgentCard
+from starlette.requests import Request
+from starlette.responses import Response
+
+from agno_a2a_ext.agent.a2a.deadline import DEADLINE_HEADER, deadline_from_header, deadline_scope
+from agno_a2a_ext.observability.metrics import (
+    CONTENT_TYPE,
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS,
+    get_registry,
+    track_run,
+)
+from agno_a2a_ext.observability.tracing import REQUEST_ID_HEADER, should_debug, trace_request
+
+# ServerAPI中启动运行的路由：/v1/agents/{id}/run、/v1/playground/teams/{id}/runs等
+_RUN_PATH = re.compile(r"^/v1/(?:playground/)?(agents|teams)/([^/]+)/(?:run|runs|stream)$")
+
+# 没有匹配到路由的请求（404、由中间件直接处理的请求）在指标中的路由标签，避免任意路径产生无限多的时间序列
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def run_route(scope) -> Optional[Tuple[str, str]]:
+    """
+    ServerAPI中启动运行的请求
+
+    Args:
+        scope: ASGI scope
+
+    Returns:
+        Optional[Tuple[str, str]]: POST到运行路由时为(agents或teams, ID)，其他请求为None
+    """
+    if scope["type"] != "http" or scope["method"] != "POST":
+        return None
+    match = _RUN_PATH.match(scope["path"])
+    return (match.group(1), match.group(2)) if match else None
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    """GET /metrics：Prometheus文本格式的指标（多进程模式下合并所有工作进程）"""
+    return Response(get_registry().render(), media_type=CONTENT_TYPE)
+
+
+class AgentCardETagMiddleware:
+    """
+    为AgentCard端点提供ETag和条件请求支持的ASGI中间件
+
+    AgentCard在服务器生命周期内不变，因此预先序列化并计算ETag，
+    客户端携带匹配的If-None-Match时直接返回304，不再传输卡片内容。
+    """
+
+    def __init__(self, app, agent_card: AgentCard, path: str = "/.well-known/agent.json", max_age: int = 60):
+        """
+        初始化中间件
+
+        Args:
+            app: 下游ASGI应用
+            agent_card: 服务器的AgentCard
+            path: AgentCard端点路径
+            max_age: Cache-Control中的max-age（秒）
+        """
+        self.app = app
+        self.path = path
+        self.body = json.dumps(
+            agent_card.model_dump(mode="json", exclude_none=True),
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+        self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:32] + '"'
+        self.cache_control = f"max-age={max_age}"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or scope["path"] != self.path:
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = None
+        for name, value in scope.get("headers", []):
+            if name == b"if-none-match":
+                if_none_match = value.decode("latin-1")
+                break
+
+        headers = [
+            (b"etag", self.etag.encode("latin-1")),
+            (b"cache-control", self.cache_control.encode("latin-1")),
+        ]
+        # 弱比较：经过压缩的响应携带弱ETag（W/前缀），内容相同
+        if if_none_match and self.etag in [tag.strip().replace("W/", "", 1) for tag in if_none_match.split(",")]:
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        headers.append((b"content-type", b"application/json"))
+        headers.append((b"content-length", str(len(self.body)).encode("latin-1")))
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": self.body})
+
+
+class TracingMiddleware:
+    """
+    为每个请求设置追踪上下文的ASGI中间件
+
+    - 请求头X-A2A-Debug为真，或命中采样率时，为该请求开启DEBUG级别的追踪输出
+    - 沿用请求头中的X-Request-ID（没有时生成一个），附加到该请求的所有追踪记录并写回响应头
+    """
+
+    def __init__(self, app):
+        """
+        初始化中间件
+
+        Args:
+            app: 下游ASGI应用
+        """
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = {}
+        for name, value in scope.get("headers", []):
+            if name in (b"x-a2a-debug", b"x-request-id"):
+                headers[name.decode("latin-1")] = value.decode("latin-1")
+        request_id = headers.get("x-request-id") or uuid4().hex
+        request_id_header = (REQUEST_ID_HEADER.lower().encode("latin-1"), request_id.encode("latin-1"))
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [request_id_header]
+            await send(message)
+
+        with trace_request(debug=should_debug(headers), request_id=request_id):
+            await self.app(scope, receive, send_with_request_id)
+
+
+class DeadlineMiddleware:
+    """
+    为入口请求设置截止时间的ASGI中间件
+
+    请求头X-A2A-Timeout声明调用方愿意等待的剩余秒数（没有时使用default_timeout）；
+    请求内发起的A2A调用（包括Team成员）会把剩余预算传给下游，预算用完后下游停止执行。
+    """
+
+    def __init__(self, app, default_timeout: Optional[float] = None):
+        """
+        初始化中间件
+
+        Args:
+            app: 下游ASGI应用
+            default_timeout: 请求未声明预算时的默认预算（秒），None表示不限制
+        """
+        self.app = app
+        self.default_timeout = default_timeout
+        self.header = DEADLINE_HEADER.lower().encode("latin-1")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        deadline = None
+        for name, value in scope.get("headers", []):
+            if name == self.header:
+                deadline = deadline_from_header(value.decode("latin-1"))
+                break
+
+        with deadline_scope(timeout=self.default_timeout, deadline=deadline):
+            await self.app(scope, receive, send)
+
+
+class HTTPMetricsMiddleware:
+    """
+    统计HTTP请求数与耗时的ASGI中间件（按路由模板、方法和状态码）
+
+    路由标签使用路由模板（例如/v1/agents/{agent_id}/run），不会因路径参数产生大量时间序列；
+    耗时到响应体发送完毕为止，流式响应包括整个流。
+    """
+
+    def __init__(self, app, server: str, paths: Sequence[str] = ()):
+        """
+        初始化中间件
+
+        Args:
+            app: 下游ASGI应用
+            server: 服务名称（指标中的server标签）
+            paths: 由其他中间件直接处理、没有路由的固定路径（例如AgentCard端点），按路径本身统计
+        """
+        self.app = app
+        self.server = server
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.monotonic()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get("route"), "path", None)
+            if route is None:
+                route = scope["path"] if scope["path"] in self.paths else UNMATCHED_ROUTE
+            method = scope["method"]
+            HTTP_REQUESTS.labels(self.server, route, method, status).inc()
+            HTTP_REQUEST_DURATION.labels(self.server, route, method).observe(time.monotonic() - started_at)
+
+
+class RunMetricsMiddleware:
+    """
+    统计ServerAPI运行路由的ASGI中间件
+
+    与A2A服务的执行器记录同一组运行指标（transport标签为api）：进行中数量、耗时、结果，
+    流式响应的首块延迟和数据块数。位于准入控制之内，被拒绝的请求不计为运行，排队时间也不计入运行耗时。
+    """
+
+    def __init__(self, app, name_of: Callable[[str, str], Optional[str]]):
+        """
+        初始化中间件
+
+        Args:
+            app: 下游ASGI应用
+            name_of: 按(类型, ID)查找agent/team名称的函数，类型为agents或teams，未知的ID返回None
+        """
+        self.app = app
+        self.name_of = name_of
+
+    async def __call__(self, scope, receive, send):
+        route = run_route(scope)
+        name = self.name_of(*route) if route else None
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        kind = "agent" if route[0] == "agents" else "team"
+        finished = False
+        with track_run(kind, name, "api") as run:
+
+            async def receive_tracking():
+                message = await receive()
+                if message["type"] == "http.disconnect" and not finished:
+                    run.status = "cancelled"
+                return message
+
+            async def send_tracking(message):
+                nonlocal finished
+                if message["type"] == "http.response.start":
+                    if message["status"] >= 400:
+                        run.fail()
+                elif message["type"] == "http.response.body":
+                    more_body = message.get("more_body", False)
+                    # 流式响应的每个数据块（完整响应不计）
+                    if more_body and message.get("body"):
+                        run.chunk()
+                    finished = not more_body
+                await send(message)
+
+            await self.app(scope, receive_tracking, send_tracking)
@@ -0,0 +1,207 @@
+# agent_server/servers/pool.py
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional, Tuple
+
+from agno_a2a_ext.observability.tracing import get_tracer
+from agno_a2a_ext.servers.isolation import clone_instance, prepare_template, reset_instance
+
+tracer = get_tracer(__name__)
+
+# 运行期间会调用的模型字段
+_MODEL_FIELDS = ("model", "reasoning_model", "parser_model")
+
+
+class InstancePool:
+    """
+    预先初始化的Agent/Team实例池
+
+    每个实例同一时间只服务一个请求：请求开始时借出，结束后重置为模板的初始状态并归还，
+    并发吞吐量随池大小线性增长。实例在创建时完成初始化并建立模型客户端（复用连接），
+    请求路径上不再有初始化和建连的开销。
+
+    开启自动扩容后，排队的请求数达到scale_up_queue_depth时新建实例（不超过max_size），
+    空闲超过idle_timeout秒的多余实例会被回收（不少于size）。
+    """
+
+    def __init__(
+            self,
+            template: Any,
+            size: int = 4,
+            max_size: Optional[int] = None,
+            autoscale: bool = False,
+            scale_up_queue_depth: int = 1,
+            idle_timeout: float = 60.0,
+            factory: Optional[Callable[[Any], Any]] = None,
+    ):
+        """
+        初始化实例池，并预先创建size个实例
+
+        Args:
+            template: 作为模板的Agent或Team（自身不会被运行）
+            size: 预先创建的实例数，也是自动缩容的下限
+            max_size: 实例数上限，默认等于size；大于size时需开启autoscale才会扩容
+            autoscale: 是否按排队深度自动扩缩容
+            scale_up_queue_depth: 排队的请求数达到该值时扩容一个实例
+            idle_timeout: 多余实例空闲多久（秒）后回收
+            factory: 从模板创建实例的函数，默认使用clone_instance
+        """
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        if max_size is not None and max_size < size:
+            raise ValueError("max_size must not be smaller than size")
+        self.template = template
+        self.size = size
+        self.max_size = max_size or size
+        self.autoscale = autoscale
+        self.scale_up_queue_depth = max(1, scale_up_queue_depth)
+        self.idle_timeout = idle_timeout
+        self.factory = factory or clone_instance
+
+        # 与模板共享的记忆需要在复制前创建
+        prepare_template(template)
+        # 空闲实例及其归还时间，后进先出（最近用过的实例缓存和连接最热）
+        self._idle: Deque[Tuple[Any, float]] = deque()
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._total = 0
+        self._checkouts = 0
+        self._waited = 0
+        for _ in range(size):
+            self._idle.append((self._create(), time.monotonic()))
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[Any]:
+        """
+        借出一个实例，退出时归还
+
+        所有实例都在使用时排队等待（先到先得）；等待期间被取消不会占用实例。
+
+        Yields:
+            独占的Agent或Team实例
+        """
+        instance = await self._checkout()
+        try:
+            yield instance
+        finally:
+            self._checkin(instance)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        池的当前状态
+
+        Returns:
+            Dict[str, int]: 实例总数、空闲数、使用中数量、排队数以及累计借出/排队次数
+        """
+        return {
+            "size": self._total,
+            "idle": len(self._idle),
+            "in_use": self._total - len(self._idle),
+            "waiting": len(self._waiters),
+            "max_size": self.max_size,
+            "checkouts": self._checkouts,
+            "waited": self._waited,
+        }
+
+    async def _checkout(self) -> Any:
+        self._checkouts += 1
+        self._shrink()
+        if self._idle:
+            return self._idle.pop()[0]
+        if self.autoscale and self._total < self.max_size \
+                and len(self._waiters) + 1 >= self.scale_up_queue_depth:
+            tracer.info("实例池扩容: %s -> %s", self._total, self._total + 1)
+            return self._create()
+
+        self._waited += 1
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            return await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # 取消与交接同时发生，实例已经交给了本请求，转交下一个等待者
+                self._release(waiter.result())
+            raise
+        finally:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+
+    def _checkin(self, instance: Any) -> None:
+        try:
+            reset_instance(instance, self.template)
+        except Exception as e:
+            # 无法恢复到初始状态的实例不再复用，需要时重新创建
+            tracer.warning("实例重置失败，已丢弃: %s", e)
+            self._total -= 1
+            self._replace()
+            return
+        self._release(instance)
+
+    def _release(self, instance: Any) -> None:
+        """把已重置的实例交给第一个等待者，没有等待者时放回空闲队列"""
+        for waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_result(instance)
+                return
+        self._idle.append((instance, time.monotonic()))
+
+    def _replace(self) -> None:
+        """丢弃实例后，如有请求在等待则补充一个新实例"""
+        if any(not waiter.done() for waiter in self._waiters) or self._total < self.size:
+            self._release(self._create())
+
+    def _shrink(self) -> None:
+        """回收空闲过久的多余实例（最早归还的在队首）"""
+        if not self.autoscale:
+            return
+        now = time.monotonic()
+        while self._total > self.size and self._idle and now - self._idle[0][1] >= self.idle_timeout:
+            self._idle.popleft()
+            self._total -= 1
+            tracer.info("实例池缩容: %s -> %s", self._total + 1, self._total)
+
+    def _create(self) -> Any:
+        instance = self.factory(self.template)
+        _warm(instance)
+        self._total += 1
+        return instance
+
+
+def _warm(instance: Any) -> None:
+    """
+    预先初始化实例：设置默认值、ID、模型等，并为模型建立可复用的异步客户端
+
+    部分模型（例如OpenAIChat）在每次调用时都会新建HTTP客户端和连接；池中的实例会被反复使用，
+    为其模型固定一个客户端，后续调用复用同一个连接池。
+    """
+    for initialize in ("initialize_agent", "initialize_team"):
+        method = getattr(instance, initialize, None)
+        if callable(method):
+            try:
+                method()
+            except Exception as e:
+                tracer.warning("预初始化%s失败，将在首次运行时初始化: %s", type(instance).__name__, e)
+            break
+
+    for name in _MODEL_FIELDS:
+        model = getattr(instance, name, None)
+        if model is not None:
+            _pin_async_client(model)
+    for member in getattr(instance, "members", None) or []:
+        _warm(member)
+
+
+def _pin_async_client(model: Any) -> None:
+    """为模型实例固定异步客户端（只影响该实例，模板和其他副本不受影响）"""
+    get_async_client = getattr(model, "get_async_client", None)
+    if not callable(get_async_client) or "get_async_client" in getattr(model, "__dict__", {}):
+        return
+    try:
+        client = get_async_client()
+        model.get_async_client = lambda: client
+    except Exception as e:
+        tracer.debug("模型%s的客户端未预先建立: %s", type(model).__name__, e)
@@ -0,0 +1,239 @@
+# agent_server/servers/streaming.py
+import asyncio
+from typing import Any, AsyncIterator, Callable, List, Optional, Tuple
+from uuid import uuid4
+
+from a2a.server.tasks.task_updater import TaskUpdater
+from a2a.types import Message, Part, Role, TextPart
+
+from agno_a2a_ext.observability.metrics import fail_run, record_chunk
+from agno_a2a_ext.observability.tracing import get_tracer
+
+tracer = get_tracer(__name__)
+
+# ServerCallContext.state中标记message/stream请求的键，执行器据此决定是否逐块发布输出
+STREAMING_STATE_KEY = "streaming"
+
+# 默认的合并阈值：累计字符数达到该值，或距上次发送超过该时间（秒）时发送一个数据块
+DEFAULT_CHUNK_CHARS = 64
+DEFAULT_FLUSH_INTERVAL = 0.05
+
+# agno流式输出的事件类型
+_CONTENT_EVENTS = {"RunResponseContent", "RunResponse"}
+_COMPLETED_EVENTS = {"RunCompleted"}
+_ERROR_EVENTS = {"RunError"}
+_TOOL_EVENTS = {"ToolCallStarted", "ToolCallCompleted"}
+
+
+def is_streaming_request(context) -> bool:
+    """
+    请求是否来自message/stream
+
+    Args:
+        context: 执行器收到的请求上下文
+
+    Returns:
+        bool: 调用方是否在等待流式事件
+    """
+    call_context = getattr(context, "call_context", None)
+    state = getattr(call_context, "state", None) or {}
+    return bool(state.get(STREAMING_STATE_KEY))
+
+
+def event_name(event: Any) -> Optional[str]:
+    """agno流式事件的类型名"""
+    name = getattr(event, "event", None)
+    return getattr(name, "value", name)
+
+
+async def coalesce_text(
+        items: AsyncIterator[Any],
+        text_of: Callable[[Any], Optional[str]],
+        max_chars: int = DEFAULT_CHUNK_CHARS,
+        max_delay: float = DEFAULT_FLUSH_INTERVAL,
+) -> AsyncIterator[Tuple[Optional[str], Any]]:
+    """
+    把细碎的文本增量合并为较大的数据块
+
+    第一段文本立即发送（不增加首字延迟），之后累计到max_chars个字符或距上次发送超过max_delay秒时发送；
+    等待下一个增量期间计时照常进行，模型停顿时已缓冲的文本不会滞留。非文本项原样透传，透传前先发送已缓冲的文本。
+
+    Args:
+        items: 原始流
+        text_of: 提取文本增量的函数，返回None表示该项不是文本
+        max_chars: 单个数据块的目标字符数
+        max_delay: 缓冲文本的最长停留时间（秒）
+
+    Yields:
+        Tuple[Optional[str], Any]: (合并后的文本, None) 或 (None, 非文本项)
+    """
+    loop = asyncio.get_running_loop()
+    iterator = items.__aiter__()
+    parts: List[str] = []
+    size = 0
+    last_flush: Optional[float] = None
+    pending: Optional[asyncio.Future] = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            timeout = None
+            if parts:
+                timeout = 0 if last_flush is None else max(0.0, last_flush + max_delay - loop.time())
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if not done:
+                yield "".join(parts), None
+                parts, size, last_flush = [], 0, loop.time()
+                continue
+
+            finished, pending = pending, None
+            try:
+                item = finished.result()
+            except StopAsyncIteration:
+                break
+            text = text_of(item)
+            if text is None:
+                if parts:
+                    yield "".join(parts), None
+                    parts, size, last_flush = [], 0, loop.time()
+                yield None, item
+                continue
+            if text:
+                parts.append(text)
+                size += len(text)
+            if size >= max_chars:
+                yield "".join(parts), None
+                parts, size, last_flush = [], 0, loop.time()
+
+        if parts:
+            yield "".join(parts), None
+    finally:
+        if pending is not None:
+            pending.cancel()
+            await asyncio.wait({pending})
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+class RunStreamPublisher:
+    """
+    把agent的流式输出发布为A2A任务事件
+
+    先发布working状态（调用方立即拿到task_id，可以据此取消），文本增量合并后作为同一个artifact的
+    追加块发布，结束时发布completed状态；运行出错时发布failed状态。工具调用事件可选地作为working状态发布。
+    """
+
+    # 流式结果的artifact名称
+    artifact_name = "response"
+
+    def __init__(
+            self,
+            event_queue,
+            task_id: str,
+            context_id: str,
+            chunk_chars: int = DEFAULT_CHUNK_CHARS,
+            flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+            tool_events: bool = False,
+    ):
+        """
+        初始化发布器
+
+        Args:
+            event_queue: 事件队列
+            task_id: 任务ID
+            context_id: 上下文ID
+            chunk_chars: 合并后单个数据块的目标字符数
+            flush_interval: 缓冲文本的最长停留时间（秒）
+            tool_events: 是否发布工具调用的开始/结束事件
+        """
+        self.updater = TaskUpdater(event_queue, task_id, context_id)
+        self.chunk_chars = chunk_chars
+        self.flush_interval = flush_interval
+        self.tool_events = tool_events
+        self._artifact_id = str(uuid4())
+        self._chunks = 0
+
+    async def start(self) -> None:
+        """发布working状态"""
+        await self.updater.start_work()
+
+    async def publish(self, run_output: Any) -> None:
+        """
+        发布一次运行的输出直到结束
+
+        Args:
+            run_output: agent.arun(stream=True)的返回值（流式事件的异步迭代器，或不支持流式时的完整响应）
+        """
+        if not hasattr(run_output, "__aiter__"):
+            await self._add_text(getattr(run_output, "content", None) or "")
+            await self.updater.complete()
+            return
+
+        completed_content = None
+        async for text, event in coalesce_text(run_output, self._text_of, self.chunk_chars, self.flush_interval):
+            if text is not None:
+                await self._add_text(text)
+                continue
+            name = event_name(event)
+            if name in _ERROR_EVENTS:
+                await self.fail(str(getattr(event, "content", None) or "Agent run failed"))
+                return
+            if name in _COMPLETED_EVENTS:
+                completed_content = getattr(event, "content", None)
+            elif name in _TOOL_EVENTS and self.tool_events:
+                await self._publish_tool_event(name, event)
+
+        # 没有逐块输出的运行（例如模型不支持流式），以完成事件中的内容作为结果
+        if not self._chunks and completed_content:
+            await self._add_text(str(completed_content))
+        await self.updater.complete()
+
+    async def fail(self, error_text: str) -> None:
+        """发布failed状态"""
+        fail_run()
+        await self.updater.failed(self._message(error_text))
+
+    @staticmethod
+    def _text_of(event: Any) -> Optional[str]:
+        if isinstance(event, str):
+            return event
+        if event_name(event) not in _CONTENT_EVENTS:
+            return None
+        content = getattr(event, "content", None)
+        if content is None:
+            return ""
+        return content if isinstance(content, str) else str(content)
+
+    async def _add_text(self, text: str) -> None:
+        if not text:
+            return
+        await self.updater.add_artifact(
+            [Part(root=TextPart(text=text))],
+            artifact_id=self._artifact_id,
+            name=self.artifact_name,
+            append=self._chunks > 0,
+        )
+        self._chunks += 1
+        # 计入当前运行的首块延迟和数据块数
+        record_chunk()
+
+    async def _publish_tool_event(self, name: str, event: Any) -> None:
+        tool = getattr(event, "tool", None)
+        tool_name = getattr(tool, "tool_name", None) or "tool"
+        text = f"Calling {tool_name}" if name == "ToolCallStarted" else f"{tool_name} finished"
+        metadata = {"event": name, "tool_name": tool_name}
+        tool_args = getattr(tool, "tool_args", None)
+        if tool_args:
+            metadata["tool_args"] = tool_args
+        await self.updater.start_work(self._message(text, metadata))
+
+    def _message(self, text: str, metadata: Optional[dict] = None) -> Message:
+        return Message(
+            message_id=str(uuid4()),
+            role=Role.agent,
+            parts=[Part(root=TextPart(text=text))],
+            task_id=self.updater.task_id,
+            context_id=self.updater.context_id,
+            metadata=metadata,
+        )
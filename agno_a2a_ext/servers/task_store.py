@@ -0,0 +1,132 @@
+# agent_server/servers/task_store.py
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from a2a.server.request_handlers.default_request_handler import TERMINAL_TASK_STATES
+from a2a.server.tasks.task_store import TaskStore
+from a2a.types import Task
+
+from agno_a2a_ext.observability.tracing import get_tracer
+
+tracer = get_tracer(__name__)
+
+# 默认最多保留的任务数
+DEFAULT_MAX_TASKS = 10000
+
+
+class BoundedInMemoryTaskStore(TaskStore):
+    """
+    有上限的进程内任务存储
+
+    InMemoryTaskStore从不删除任务，长期运行的服务内存会持续增长。这里按最近使用顺序保存任务：
+    超过max_tasks时淘汰最久未使用的已结束任务，超过ttl秒未读写的已结束任务过期。
+    未结束的任务（执行中、等待输入等）从不淘汰，否则后台执行结束时找不到任务，结果和推送通知都会丢失；
+    因此进行中的任务很多时，任务数可以暂时超过max_tasks。
+    """
+
+    def __init__(self, max_tasks: int = DEFAULT_MAX_TASKS, ttl: Optional[float] = None):
+        """
+        初始化任务存储
+
+        Args:
+            max_tasks: 最多保留的任务数
+            ttl: 任务在最后一次读写后保留的时间（秒），None表示只按数量淘汰
+        """
+        if max_tasks < 1:
+            raise ValueError("max_tasks必须大于0")
+        self.max_tasks = max_tasks
+        self.ttl = ttl
+        # task_id -> (任务, 最后读写时间)，顺序即最近使用顺序
+        self._tasks: "OrderedDict[str, Tuple[Task, float]]" = OrderedDict()
+        self._lock = asyncio.Lock()
+        self._evictions = 0
+        self._expirations = 0
+
+    async def save(self, task: Task) -> None:
+        """保存或更新任务"""
+        async with self._lock:
+            now = time.monotonic()
+            self._tasks[task.id] = (task, now)
+            self._tasks.move_to_end(task.id)
+            self._expire(now)
+            self._evict(keep=task.id)
+
+    async def get(self, task_id: str) -> Optional[Task]:
+        """按ID读取任务，并标记为最近使用"""
+        async with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            entry = self._tasks.get(task_id)
+            if entry is None:
+                return None
+            self._tasks[task_id] = (entry[0], now)
+            self._tasks.move_to_end(task_id)
+            return entry[0]
+
+    async def delete(self, task_id: str) -> None:
+        """按ID删除任务"""
+        async with self._lock:
+            self._tasks.pop(task_id, None)
+
+    async def list_by_context(self, context_id: str) -> List[Task]:
+        """
+        读取同一上下文（会话）下的任务
+
+        Args:
+            context_id: 上下文ID
+
+        Returns:
+            List[Task]: 按最近使用顺序排列的任务
+        """
+        async with self._lock:
+            self._expire(time.monotonic())
+            return [task for task, _ in self._tasks.values() if task.context_id == context_id]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取存储统计
+
+        Returns:
+            Dict: 任务数与淘汰/过期计数
+        """
+        return {
+            "tasks": len(self._tasks),
+            "max_tasks": self.max_tasks,
+            "evictions": self._evictions,
+            "expirations": self._expirations,
+        }
+
+    def _evict(self, keep: str) -> None:
+        """从最久未使用的一端淘汰已结束的任务（刚保存的任务除外），直到任务数回到上限以内"""
+        excess = len(self._tasks) - self.max_tasks
+        if excess <= 0:
+            return
+        victims = []
+        for task_id, (task, _) in self._tasks.items():
+            if len(victims) >= excess:
+                break
+            if task_id != keep and _is_terminal(task):
+                victims.append(task_id)
+        for task_id in victims:
+            del self._tasks[task_id]
+        self._evictions += len(victims)
+
+    def _expire(self, now: float) -> None:
+        """删除过期的已结束任务（最久未使用的在队首，遇到未过期的即可停止）"""
+        if self.ttl is None:
+            return
+        expired = []
+        for task_id, (task, touched_at) in self._tasks.items():
+            if now - touched_at < self.ttl:
+                break
+            if _is_terminal(task):
+                expired.append(task_id)
+        for task_id in expired:
+            del self._tasks[task_id]
+        self._expirations += len(expired)
+
+
+def _is_terminal(task: Task) -> bool:
+    return task.status is not None and task.status.state in TERMINAL_TASK_STATES
@@ -1,174 +1,170 @@
 # agent_server/servers/team.py
-import json
+from typing import Optional, Tuple
 from uuid import uuid4
-import traceback
 
 from a2a.server.agent_execution.agent_executor import AgentExecutor
+from a2a.server.tasks.task_store import TaskStore
 from a2a.types import AgentCard
 from a2a.types import Message, Role, Part
 from agno.run.team import TeamRunResponse
 from agno.run.response import RunStatus
 from agno.team.team import Team
 
+from agno_a2a_ext.agent.a2a.deadline import deadline_from_metadata, run_with_deadline
+from agno_a2a_ext.observability.metrics import fail_run
+from agno_a2a_ext.observability.tracing import get_tracer
+from agno_a2a_ext.servers.admission import AdmissionOptions
 from agno_a2a_ext.servers.base import BaseServer
+from agno_a2a_ext.servers.executor import CancellableExecutor
+from agno_a2a_ext.servers.isolation import clone_team, prepare_template
+from agno_a2a_ext.servers.pool import InstancePool
+from agno_a2a_ext.servers.workers import ServingOptions
 
+tracer = get_tracer(__name__)
 
-class TeamExecutorWrapper(AgentExecutor):
+
+class TeamExecutorWrapper(CancellableExecutor):
     """Wrap Team as an A2A executor"""
+
+    cancel_message_text = "Team task has been cancelled by user"
     
-    def __init__(self, team: Team):
+    def __init__(self, team: Team, pool: Optional[InstancePool] = None):
         """
         Initialize executor
         
         Args:
-            team: Team instance to wrap
+            team: Team instance to wrap; used as a template, each request runs on its own copy
+            pool: Pool of pre-initialized Team copies to run requests on; None copies the team per request
         """
+        super().__init__()
         self.team = team
+        self.pool = pool
+        # Create the shared memory up front so per-request copies keep accumulating session history
+        prepare_template(team)
     
-    async def execute(self, context, event_queue):
+    def run_labels(self) -> Tuple[str, str]:
+        """Kind and name of the wrapped team in run metrics"""
+        return "team", self.team.name or "team"
+
+    async def run(self, context, event_queue):
         """
         Execute Team and put results into event queue
         
+        Team and its members keep run state on the instance, so every request runs on its own copy
+        (which also skips None member run responses, see servers/isolation.py): a pooled copy that is
+        reset when returned, or a fresh copy without a pool.
+
         Args:
             context: Request context
             event_queue: Event queue
         """
+        if self.pool is None:
+            await self._run(clone_team(self.team), context, event_queue)
+            return
+        async with self.pool.acquire() as team:
+            await self._run(team, context, event_queue)
+
+    async def _run(self, team: Team, context, event_queue):
+        """
+        Execute the given Team copy and put results into event queue
+
+        Args:
+            team: Team copy serving this request
+            context: Request context
+            event_queue: Event queue
+        """
         try:
             # Extract message and session ID
             message = ""
-            session_id = None
+            # The caller's session travels as the message context_id
+            session_id = self.session_id_of(context)
             
             # Log context structure for debugging
-            print(f"DEBUG TeamExecutorWrapper: Received request, context type={type(context).__name__}")
-            
-            # Try to get more info directly from context
-            if hasattr(context, "__dict__"):
-                print(f"DEBUG TeamExecutorWrapper: context attributes={list(context.__dict__.keys())}")
+            tracer.debug("TeamExecutorWrapper: Received request, context type=%s", type(context).__name__)
             
             # If context is RequestContext, analyze in detail
             if type(context).__name__ == "RequestContext":
-                print("DEBUG TeamExecutorWrapper: Handling RequestContext type")
+                tracer.debug("TeamExecutorWrapper: Handling RequestContext type")
                 
                 # Try to get info from context.message
                 if hasattr(context, "message"):
                     message_obj = context.message
-                    print(f"DEBUG TeamExecutorWrapper: context.message type={type(message_obj).__name__}")
+                    tracer.debug("TeamExecutorWrapper: context.message type=%s", type(message_obj).__name__)
                     
-                    if hasattr(message_obj, "__dict__"):
-                        print(f"DEBUG TeamExecutorWrapper: context.message attributes={list(message_obj.__dict__.keys())}")
-                    
-                    print(f"DEBUG TeamExecutorWrapper: context.message={context.message}")
+                    tracer.debug("TeamExecutorWrapper: context.message=%s", context.message)
                     
                     # If message has parts attribute
                     if hasattr(message_obj, "parts") and message_obj.parts:
-                        print(f"DEBUG TeamExecutorWrapper: context.message.parts count={len(message_obj.parts)}")
+                        tracer.debug("TeamExecutorWrapper: context.message.parts count=%s", len(message_obj.parts))
                         
                         # Iterate parts
                         for i, part in enumerate(message_obj.parts):
-                            print(f"DEBUG TeamExecutorWrapper: part[{i}] type={type(part).__name__}")
-                            
-                            # Print all attributes of part
-                            if hasattr(part, "__dict__"):
-                                print(f"DEBUG TeamExecutorWrapper: part[{i}] attributes={list(part.__dict__.keys())}")
+                            tracer.debug("TeamExecutorWrapper: part[%s] type=%s", i, type(part).__name__)
                             
                             # Try to extract from part.root.text
                             if hasattr(part, "root") and part.root:
-                                print(f"DEBUG TeamExecutorWrapper: part[{i}].root type={type(part.root).__name__}")
-                                if hasattr(part.root, "__dict__"):
-                                    print(f"DEBUG TeamExecutorWrapper: part[{i}].root attributes={list(part.root.__dict__.keys())}")
+                                tracer.debug("TeamExecutorWrapper: part[%s].root type=%s", i, type(part.root).__name__)
                                 if hasattr(part.root, "text"):
                                     part_text = part.root.text
                                     message += part_text
-                                    print(f"DEBUG TeamExecutorWrapper: Extracted from part[{i}].root.text: '{part_text}'")
+                                    tracer.debug("TeamExecutorWrapper: Extracted from part[%s].root.text: '%s'", i, part_text)
                             # Try to extract from part.text
                             elif hasattr(part, "text"):
                                 part_text = part.text
                                 message += part_text
-                                print(f"DEBUG TeamExecutorWrapper: Extracted from part[{i}].text: '{part_text}'")
+                                tracer.debug("TeamExecutorWrapper: Extracted from part[%s].text: '%s'", i, part_text)
                             # If neither, try to print full structure
                             else:
-                                try:
-                                    print(f"DEBUG TeamExecutorWrapper: part[{i}] structure={json.dumps(part, default=str)}")
-                                except:
-                                    print(f"DEBUG TeamExecutorWrapper: part[{i}] cannot be serialized to JSON")
+                                tracer.debug("TeamExecutorWrapper: part[%s] structure=%r", i, part)
             # If not extracted from context.message, try from request.params
             if not message and hasattr(context, "request") and context.request:
-                print(f"DEBUG TeamExecutorWrapper: context.request type={type(context.request).__name__}")
-                if hasattr(context.request, "__dict__"):
-                    print(f"DEBUG TeamExecutorWrapper: context.request attributes={list(context.request.__dict__.keys())}")
+                tracer.debug("TeamExecutorWrapper: context.request type=%s", type(context.request).__name__)
                 if hasattr(context.request, "params") and context.request.params:
                     params = context.request.params
-                    print(f"DEBUG TeamExecutorWrapper: params type={type(params).__name__}")
-                    if hasattr(params, "__dict__"):
-                        print(f"DEBUG TeamExecutorWrapper: params attributes={list(params.__dict__.keys())}")
+                    tracer.debug("TeamExecutorWrapper: params type=%s", type(params).__name__)
                     # Extract message
                     if hasattr(params, "message") and params.message:
                         message_obj = params.message
-                        print(f"DEBUG TeamExecutorWrapper: params.message type={type(message_obj).__name__}")
-                        if hasattr(message_obj, "__dict__"):
-                            print(f"DEBUG TeamExecutorWrapper: params.message attributes={list(message_obj.__dict__.keys())}")
+                        tracer.debug("TeamExecutorWrapper: params.message type=%s", type(message_obj).__name__)
                         if isinstance(message_obj, str):
                             message = message_obj
-                            print(f"DEBUG TeamExecutorWrapper: Extracted string from params.message: '{message}'")
+                            tracer.debug("TeamExecutorWrapper: Extracted string from params.message: '%s'", message)
                         elif hasattr(message_obj, "parts") and message_obj.parts:
-                            print(f"DEBUG TeamExecutorWrapper: params.message.parts count={len(message_obj.parts)}")
+                            tracer.debug("TeamExecutorWrapper: params.message.parts count=%s", len(message_obj.parts))
                             for i, part in enumerate(message_obj.parts):
-                                print(f"DEBUG TeamExecutorWrapper: params.message.part[{i}] type={type(part).__name__}")
+                                tracer.debug("TeamExecutorWrapper: params.message.part[%s] type=%s", i, type(part).__name__)
                                 if hasattr(part, "root") and part.root:
-                                    print(f"DEBUG TeamExecutorWrapper: params.message.part[{i}].root type={type(part.root).__name__}")
+                                    tracer.debug("TeamExecutorWrapper: params.message.part[%s].root type=%s", i, type(part.root).__name__)
                                     if hasattr(part.root, "text"):
                                         message += part.root.text
-                                        print(f"DEBUG TeamExecutorWrapper: Extracted from params.message.part[{i}].root.text: '{part.root.text}'")
+                                        tracer.debug("TeamExecutorWrapper: Extracted from params.message.part[%s].root.text: '%s'", i, part.root.text)
                                 elif hasattr(part, "text"):
                                     message += part.text
-                                    print(f"DEBUG TeamExecutorWrapper: Extracted from params.message.part[{i}].text: '{part.text}'")
-                    # Extract session_id
-                    if hasattr(params, "session_id"):
-                        session_id = params.session_id
-                        print(f"DEBUG TeamExecutorWrapper: Extracted session_id from params: {session_id}")
+                                    tracer.debug("TeamExecutorWrapper: Extracted from params.message.part[%s].text: '%s'", i, part.text)
             # If no message extracted, use default
             if not message:
                 message = "Received empty message"
-                print(f"WARNING: Could not extract message content, using default: '{message}'")
+                tracer.warning("Could not extract message content, using default: '%s'", message)
             # If no session_id, generate a new one
             if not session_id:
                 session_id = str(uuid4())
-            print(f"DEBUG TeamExecutorWrapper: Extracted message='{message}', session_id={session_id}")
-            print(f"DEBUG TeamExecutorWrapper: Preparing to call Team.arun, Team type: {type(self.team).__name__}, message: {message[:50]}...")
+            tracer.debug("TeamExecutorWrapper: Extracted message='%s', session_id=%s", message, session_id)
+            tracer.debug("TeamExecutorWrapper: Preparing to call Team.arun, Team type: %s, message: %s...", type(self.team).__name__, message[:50])
             try:
-                # Patch: create a safe run environment for the team
-                # Save the original _update_team_media method before calling Team.arun
-                original_update_team_media = Team._update_team_media
-                # Create a safe _update_team_media method to handle None run_response
-                def safe_update_team_media(self, run_response):
-                    if run_response is None:
-                        print("WARNING: Skipping media update for None run_response")
-                        return
-                    return original_update_team_media(self, run_response)
-                # Temporarily replace the method
-                Team._update_team_media = safe_update_team_media
-                # Also save the original add_member_run method
-                original_add_member_run = TeamRunResponse.add_member_run
-                # Create a safe add_member_run method
-                def safe_add_member_run(self, run_response):
-                    if run_response is None:
-                        print("WARNING: Skipping add_member_run for None run_response")
-                        return
-                    return original_add_member_run(self, run_response)
-                # Temporarily replace the method
-                TeamRunResponse.add_member_run = safe_add_member_run
                 # Call Team.arun to get response
-                run_response = await self.team.arun(
-                    message=message,
-                    session_id=session_id,
-                    stream=False
+                # Honor the caller's deadline: stop once the budget propagated by the upstream hop runs out
+                deadline = deadline_from_metadata(getattr(getattr(context, "message", None), "metadata", None))
+                run_response = await run_with_deadline(
+                    lambda: team.arun(
+                        message=message,
+                        session_id=session_id,
+                        stream=False
+                    ),
+                    deadline
                 )
-                # Restore original methods
-                Team._update_team_media = original_update_team_media
-                TeamRunResponse.add_member_run = original_add_member_run
                 # Check if run_response is None
                 if run_response is None:
-                    print(f"WARNING: Team.arun returned None, creating an empty response")
+                    tracer.warning("Team.arun returned None, creating an empty response")
                     run_response = TeamRunResponse(
                         content="Received empty response",
                         content_type="str",
@@ -181,7 +177,7 @@ class TeamExecutorWrapper(AgentExecutor):
                 content = ""
                 if hasattr(run_response, "content"):
                     content = run_response.content
-                print(f"DEBUG TeamExecutorWrapper: Team.arun returned content: '{content}'")
+                tracer.debug("TeamExecutorWrapper: Team.arun returned content: '%s'", content)
                 # Create A2A response message
                 response_message = Message(
                     messageId=str(uuid4()),
@@ -191,66 +187,23 @@ class TeamExecutorWrapper(AgentExecutor):
                 # Put response into event queue
                 if hasattr(event_queue, "enqueue_event"):
                     await event_queue.enqueue_event(response_message)
-                    print(f"DEBUG TeamExecutorWrapper: Used enqueue_event to enqueue response message")
+                    tracer.debug("TeamExecutorWrapper: Used enqueue_event to enqueue response message")
                 elif hasattr(event_queue, "put"):
                     await event_queue.put(response_message)
-                    print(f"DEBUG TeamExecutorWrapper: Used put to enqueue response message")
+                    tracer.debug("TeamExecutorWrapper: Used put to enqueue response message")
                 else:
-                    print(f"WARNING: Unknown event queue type: {type(event_queue).__name__}")
-                print(f"DEBUG TeamExecutorWrapper: Response handling complete")
+                    tracer.warning("Unknown event queue type: %s", type(event_queue).__name__)
+                tracer.debug("TeamExecutorWrapper: Response handling complete")
             except Exception as e:
-                print(f"DEBUG TeamExecutorWrapper: Exception during Team.arun call: {str(e)}")
-                traceback.print_exc()
-                # Create error response message
-                error_message = Message(
-                    messageId=str(uuid4()),
-                    role=Role.agent,
-                    parts=[Part(text=f"Execution error: {str(e)}")]
-                )
-                # Put error response into event queue
-                if hasattr(event_queue, "enqueue_event"):
-                    await event_queue.enqueue_event(error_message)
-                elif hasattr(event_queue, "put"):
-                    await event_queue.put(error_message)
-                else:
-                    print(f"WARNING: Unknown event queue type: {type(event_queue).__name__}")
+                tracer.exception("TeamExecutorWrapper: Exception during Team.arun call: %s", e)
+                fail_run()
+                # Report the task as failed
+                await self.publish_failure(context, event_queue, f"Execution error: {str(e)}")
         except Exception as e:
-            print(f"DEBUG TeamExecutorWrapper: Exception during execution: {str(e)}")
-            traceback.print_exc()
-            # Create error response message
-            error_message = Message(
-                messageId=str(uuid4()),
-                role=Role.agent,
-                parts=[Part(text=f"Execution error: {str(e)}")]
-            )
-            # Put error response into event queue
-            if hasattr(event_queue, "enqueue_event"):
-                await event_queue.enqueue_event(error_message)
-            elif hasattr(event_queue, "put"):
-                await event_queue.put(error_message)
-            else:
-                print(f"WARNING: Unknown event queue type: {type(event_queue).__name__}")
-    async def cancel(self, context, event_queue):
-        """
-        Cancel Team execution
-        
-        Args:
-            context: Request context
-            event_queue: Event queue
-        """
-        # Create cancel message
-        cancel_message = Message(
-            messageId=str(uuid4()),
-            role=Role.agent,
-            parts=[Part(text="Team task has been cancelled by user")]
-        )
-        # Put cancel message into event queue
-        if hasattr(event_queue, "enqueue_event"):
-            await event_queue.enqueue_event(cancel_message)
-        elif hasattr(event_queue, "put"):
-            await event_queue.put(cancel_message)
-        else:
-            print(f"WARNING: Unknown event queue type: {type(event_queue).__name__}")
+            tracer.exception("TeamExecutorWrapper: Exception during execution: %s", e)
+            fail_run()
+            # Report the task as failed
+            await self.publish_failure(context, event_queue, f"Execution error: {str(e)}")
 
 
 class TeamServer(BaseServer):
@@ -260,7 +213,14 @@ class TeamServer(BaseServer):
         self,
         team: Team,
         host: str = "0.0.0.0",
-        port: int = 9000
+        port: int = 9000,
+        pool_size: Optional[int] = None,
+        pool_max_size: Optional[int] = None,
+        pool_autoscale: bool = False,
+        pool_idle_timeout: float = 60.0,
+        task_store: Optional[TaskStore] = None,
+        serving: Optional[ServingOptions] = None,
+        admission: Optional[AdmissionOptions] = None
     ):
         """
         Initialize TeamServer
@@ -269,14 +229,34 @@ class TeamServer(BaseServer):
             team: Team instance to serve
             host: Server host
             port: Server port
+            pool_size: Serve requests from a pool of this many pre-initialized copies of the team (reset and
+                reused after each request) instead of copying the team per request
+            pool_max_size: Upper bound of the pool when autoscaling (defaults to pool_size)
+            pool_autoscale: Grow the pool while requests are queueing for a copy, shrink it when idle
+            pool_idle_timeout: Seconds an extra (autoscaled) copy may stay idle before it is dropped
+            task_store: Where A2A tasks are kept; defaults to a bounded in-memory store,
+                use SqlTaskStore to keep tasks across restarts
+            serving: Worker processes, event loop / HTTP implementation, connection tuning and an extra
+                unix socket to listen on; defaults to a single in-process server
+            admission: Admission control: max concurrent runs, wait queue length and queue timeout; requests
+                beyond that get a fast 503 with Retry-After instead of starting a run (counted per worker
+                process); None admits every request
         """
         super().__init__(
             host=host,
             port=port,
             name=team.name or "Team Server",
-            description=team.description or "A2A Team Protocol Server"
+            description=team.description or "A2A Team Protocol Server",
+            task_store=task_store,
+            serving=serving,
+            admission=admission
         )
         self.team = team
+        self.pool_size = pool_size
+        self.pool_max_size = pool_max_size
+        self.pool_autoscale = pool_autoscale
+        self.pool_idle_timeout = pool_idle_timeout
+        self.pool: Optional[InstancePool] = None
     
     def create_agent_card(self) -> AgentCard:
         """
@@ -318,7 +298,7 @@ class TeamServer(BaseServer):
             defaultOutputModes=["text"],
             capabilities={
                 "streaming": True,
-                "pushNotifications": False
+                "pushNotifications": True
             },
             skills=member_skills
         )
@@ -330,7 +310,15 @@ class TeamServer(BaseServer):
         Returns:
             AgentExecutor: Executor wrapping the Team
         """
-        return TeamExecutorWrapper(self.team)
+        if self.pool_size:
+            self.pool = InstancePool(
+                self.team,
+                size=self.pool_size,
+                max_size=self.pool_max_size,
+                autoscale=self.pool_autoscale,
+                idle_timeout=self.pool_idle_timeout
+            )
+        return TeamExecutorWrapper(self.team, pool=self.pool)
 
 async def main():
     """Command line entry point"""
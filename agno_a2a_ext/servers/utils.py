@@ -6,6 +6,10 @@ from fastapi import UploadFile
 
 from agno.media import Audio, Image, Video, File as FileMedia
 
+from agno_a2a_ext.observability.tracing import get_tracer
+
+tracer = get_tracer(__name__)
+
 
 async def process_image(file: UploadFile) -> Image:
     """
@@ -82,7 +86,7 @@ async def process_document(file: UploadFile) -> Optional[FileMedia]:
             filename=file.filename or "document"
         )
     except Exception as e:
-        print(f"处理文档时出错: {e}")
+        tracer.warning("处理文档时出错: %s", e)
         return None
 
 
@@ -0,0 +1,306 @@
+# agent_server/servers/workers.py
+import asyncio
+import multiprocessing
+import os
+import shutil
+import socket
+import stat
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import uvicorn
+
+from agno_a2a_ext.observability.metrics import get_registry, retire_worker
+from agno_a2a_ext.observability.tracing import get_tracer
+
+tracer = get_tracer(__name__)
+
+# 工作进程异常退出后重启前的等待时间（秒），避免启动即崩溃时频繁重启
+_RESTART_DELAY = 1.0
+
+
+@dataclass
+class ServingOptions:
+    """
+    HTTP服务的运行参数
+
+    Attributes:
+        workers: 工作进程数。1表示在当前事件循环中运行（原有行为）；大于1时由当前进程监督
+            多个工作进程共享同一个监听端口，每个进程各占一个CPU核心
+        loop: 事件循环实现："auto"（安装了uvloop时使用uvloop）、"asyncio"、"uvloop"；
+            只对工作进程生效，单进程模式沿用调用方的事件循环
+        http: HTTP协议解析实现："auto"（安装了httptools时使用httptools）、"h11"、"httptools"
+        backlog: 监听队列长度（等待accept的连接数上限）
+        limit_concurrency: 每个进程同时处理的连接/请求数上限，超出时返回503，None表示不限制
+        timeout_keep_alive: 空闲保活连接的超时时间（秒）
+        graceful_timeout: 停止时等待进行中请求完成的时间（秒）
+        uds: 同时监听的unix domain socket路径（可选）。同一主机上的调用方（sidecar、同一Pod中的其他容器）
+            以unix://<路径>作为base_url访问，省去回环TCP的协议栈开销；TCP端口照常监听
+        compression: 是否按Accept-Encoding压缩响应（zstd/br/gzip，SSE逐事件flush），客户端不接受时返回原始内容
+        compression_min_size: 小于该大小（字节）的完整响应不压缩
+        metrics: 是否统计请求/运行指标并提供GET /metrics（Prometheus文本格式）；
+            多进程模式下任一工作进程返回所有工作进程合并后的指标
+    """
+    workers: int = 1
+    loop: str = "auto"
+    http: str = "auto"
+    backlog: int = 2048
+    limit_concurrency: Optional[int] = None
+    timeout_keep_alive: int = 5
+    graceful_timeout: float = 30.0
+    uds: Optional[str] = None
+    compression: bool = True
+    compression_min_size: int = 1024
+    metrics: bool = True
+
+    def __post_init__(self):
+        if self.workers < 1:
+            raise ValueError("workers必须大于0")
+        if self.loop not in ("auto", "asyncio", "uvloop"):
+            raise ValueError(f"不支持的事件循环: {self.loop}")
+        if self.http not in ("auto", "h11", "httptools"):
+            raise ValueError(f"不支持的HTTP实现: {self.http}")
+        if self.loop == "uvloop":
+            try:
+                import uvloop  # noqa: F401
+            except ImportError:
+                raise ImportError("`uvloop` not installed. Please install it using `pip install uvloop`")
+        if self.http == "httptools":
+            try:
+                import httptools  # noqa: F401
+            except ImportError:
+                raise ImportError("`httptools` not installed. Please install it using `pip install httptools`")
+        if self.uds and not hasattr(socket, "AF_UNIX"):
+            raise ValueError("当前平台不支持unix domain socket")
+
+    @property
+    def multiprocess(self) -> bool:
+        """是否以多个工作进程运行（需要fork，Windows上退回单进程）"""
+        if self.workers <= 1:
+            return False
+        if "fork" not in multiprocessing.get_all_start_methods():
+            tracer.warning("当前平台不支持fork，忽略workers=%s，以单进程运行", self.workers)
+            return False
+        return True
+
+    def uvicorn_config(self, app: Any, host: str, port: int, **kwargs: Any) -> uvicorn.Config:
+        """
+        生成uvicorn配置
+
+        Args:
+            app: ASGI应用
+            host: 监听地址
+            port: 监听端口
+            **kwargs: 其他uvicorn.Config参数
+
+        Returns:
+            uvicorn.Config: uvicorn配置
+        """
+        return uvicorn.Config(
+            app=app,
+            host=host,
+            port=port,
+            loop=self.loop,
+            http=self.http,
+            backlog=self.backlog,
+            limit_concurrency=self.limit_concurrency,
+            timeout_keep_alive=self.timeout_keep_alive,
+            timeout_graceful_shutdown=int(self.graceful_timeout) if self.graceful_timeout else None,
+            **kwargs
+        )
+
+
+class WorkerSupervisor:
+    """
+    多进程服务的监督进程
+
+    在当前进程中绑定监听端口，fork出多个工作进程共享该端口（由内核分配连接）。
+    应用在各工作进程中由app_factory创建：Agent/Team等对象随fork继承，无需序列化，
+    连接池、事件循环、实例池等在各进程中独立创建。工作进程异常退出时自动重启。
+    """
+
+    def __init__(self, app_factory: Callable[[], Any], host: str, port: int, options: ServingOptions):
+        """
+        初始化监督进程
+
+        Args:
+            app_factory: 在工作进程中创建ASGI应用的函数
+            host: 监听地址
+            port: 监听端口
+            options: 运行参数
+        """
+        self.app_factory = app_factory
+        self.host = host
+        self.port = port
+        self.options = options
+        self._sockets: List[socket.socket] = []
+        self._processes: List[multiprocessing.Process] = []
+        self._monitor: Optional[asyncio.Task] = None
+        self._stopping = False
+        # 工作进程写指标快照的共享目录
+        self._metrics_dir: Optional[str] = None
+
+    def start(self) -> None:
+        """绑定端口（以及unix socket）并启动所有工作进程"""
+        self._sockets = bind_sockets(self.host, self.port, self.options)
+        if self.options.metrics:
+            self._metrics_dir = tempfile.mkdtemp(prefix=f"agno_a2a_metrics_{self.port}_")
+        self._processes = [self._spawn(index) for index in range(self.options.workers)]
+        self._monitor = asyncio.ensure_future(self._watch())
+        tracer.info("已启动%s个工作进程: pids=%s", len(self._processes), self.pids())
+
+    async def stop(self) -> None:
+        """通知所有工作进程退出（等待进行中的请求完成），超时后强制结束"""
+        self._stopping = True
+        if self._monitor is not None:
+            self._monitor.cancel()
+        for process in self._processes:
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + self.options.graceful_timeout + 5
+        loop = asyncio.get_running_loop()
+        for process in self._processes:
+            await loop.run_in_executor(None, process.join, max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                tracer.warning("工作进程%s未按时退出，强制结束", process.pid)
+                process.kill()
+                await loop.run_in_executor(None, process.join)
+        self._processes = []
+        close_sockets(self._sockets, self.options)
+        self._sockets = []
+        if self._metrics_dir is not None:
+            shutil.rmtree(self._metrics_dir, ignore_errors=True)
+            self._metrics_dir = None
+
+    def pids(self) -> List[int]:
+        """当前工作进程的PID"""
+        return [process.pid for process in self._processes if process.pid is not None]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        工作进程状态
+
+        Returns:
+            Dict: 工作进程数、存活数与PID
+        """
+        return {
+            "workers": len(self._processes),
+            "alive": sum(1 for process in self._processes if process.is_alive()),
+            "pids": self.pids(),
+        }
+
+    def _spawn(self, index: int) -> multiprocessing.Process:
+        context = multiprocessing.get_context("fork")
+        process = context.Process(
+            target=_run_worker,
+            args=(self.app_factory, self.host, self.port, self.options, self._sockets, self._metrics_dir),
+            name=f"a2a-worker-{index}",
+        )
+        process.start()
+        return process
+
+    async def _watch(self) -> None:
+        while not self._stopping:
+            await asyncio.sleep(_RESTART_DELAY)
+            for index, process in enumerate(self._processes):
+                if self._stopping or process.is_alive():
+                    continue
+                tracer.warning("工作进程%s已退出（exitcode=%s），重新启动", process.pid, process.exitcode)
+                if self._metrics_dir is not None:
+                    retire_worker(self._metrics_dir, process.pid)
+                self._processes[index] = self._spawn(index)
+
+
+def bind_sockets(host: str, port: int, options: ServingOptions) -> List[socket.socket]:
+    """
+    绑定服务监听的socket
+
+    Args:
+        host: 监听地址
+        port: 监听端口
+        options: 运行参数
+
+    Returns:
+        List[socket.socket]: TCP socket，设置了uds时还有unix socket
+
+    Raises:
+        OSError: 端口或unix socket已被占用
+    """
+    sockets = [_bind_socket(host, port, options.backlog)]
+    if options.uds:
+        try:
+            sockets.append(_bind_unix_socket(options.uds, options.backlog))
+        except BaseException:
+            sockets[0].close()
+            raise
+    return sockets
+
+
+def close_sockets(sockets: List[socket.socket], options: ServingOptions) -> None:
+    """
+    关闭监听socket并删除unix socket文件
+
+    Args:
+        sockets: bind_sockets返回的socket
+        options: 运行参数
+    """
+    for sock in sockets:
+        sock.close()
+    if options.uds and sockets:
+        try:
+            os.unlink(options.uds)
+        except FileNotFoundError:
+            pass
+
+
+def _bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    # 显式指定IPPROTO_TCP：asyncio只对proto为TCP的连接设置TCP_NODELAY，否则小响应会被Nagle算法延迟约40ms
+    sock = socket.socket(family, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _bind_unix_socket(path: str, backlog: int) -> socket.socket:
+    if os.path.exists(path):
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            raise OSError(f"{path}已存在且不是socket文件")
+        # 上次运行异常退出留下的socket文件可以删除；仍有服务在监听时不能抢占
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+        except OSError:
+            os.unlink(path)
+        else:
+            raise OSError(f"unix socket {path}已被其他服务占用")
+        finally:
+            probe.close()
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    # 与uvicorn --uds一致：同一主机上的其他用户（例如其他容器中的进程）也可以连接
+    os.chmod(path, 0o666)
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app_factory: Callable[[], Any], host: str, port: int, options: ServingOptions,
+                sockets: List[socket.socket], metrics_dir: Optional[str] = None) -> None:
+    """工作进程入口：创建应用，在继承的监听socket上运行uvicorn"""
+    # fork时父进程的事件循环正在运行，子进程需要从干净的状态开始（Python 3.12起自动处理）
+    asyncio.events._set_running_loop(None)
+    asyncio.set_event_loop(None)
+    if metrics_dir is not None:
+        # 不计入监督进程fork前的指标，之后定期写快照供/metrics合并
+        get_registry().share(metrics_dir)
+    config = options.uvicorn_config(app_factory(), host, port)
+    server = uvicorn.Server(config)
+    tracer.info("工作进程已启动: pid=%s", os.getpid())
+    server.run(sockets=sockets)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+TeamServer concurrency load test
+
+Starts a TeamServer (or targets a running one with --url) and sends N concurrent A2A requests.
+Every request carries its own code and asks the team to repeat it; a run is correct when its reply
+contains its own code and none of the others. Before per-request team instances, concurrent runs on
+one TeamServer overwrote each other's run state, so replies could mix or fail.
+
+Usage:
+    python examples/team_load_test.py -n 20
+    python examples/team_load_test.py -n 50 --url http://localhost:8083
+    python examples/team_load_test.py -n 50 --pool-size 8
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from typing import List, Optional
+
+from agno.agent.agent import Agent
+from agno.models.openai import OpenAIChat
+from agno.team.team import Team
+from dotenv import load_dotenv
+
+from agno_a2a_ext.agent.a2a.a2a_agent import A2AAgent
+from agno_a2a_ext.servers.team import TeamServer
+
+load_dotenv(os.path.join(os.path.dirname(__file__), ".env"))
+api_key = os.environ.get("OPENAI_API_KEY")
+base_url = os.environ.get("OPENAI_API_PROXY")
+
+
+def create_team() -> Team:
+    model = OpenAIChat(id="gpt-4o-mini", api_key=api_key, base_url=base_url)
+    echo_agent = Agent(
+        name="EchoAgent",
+        role="Repeats verification codes",
+        agent_id="echo",
+        instructions="Reply with the verification code from the task, exactly as given.",
+        model=model
+    )
+    return Team(
+        name="Load Test Team",
+        members=[echo_agent],
+        mode="coordinate",
+        model=model,
+        instructions="Ask EchoAgent to repeat the verification code, then reply with exactly that code."
+    )
+
+
+async def run_load(url: str, concurrency: int) -> bool:
+    client = A2AAgent(base_url=url, name="LoadTestClient", timeout=300)
+    codes: List[str] = [f"CODE-{i:04d}-{os.urandom(3).hex()}" for i in range(concurrency)]
+    try:
+        started = time.perf_counter()
+
+        async def one(index: int, code: str):
+            t0 = time.perf_counter()
+            response = await client.arun(
+                f"Repeat this verification code exactly: {code}",
+                session_id=f"load-test-{index}"
+            )
+            return response.content or "", time.perf_counter() - t0
+
+        results = await asyncio.gather(*[one(i, code) for i, code in enumerate(codes)])
+        elapsed = time.perf_counter() - started
+    finally:
+        await client.close()
+
+    correct = 0
+    for code, (content, latency) in zip(codes, results):
+        leaked = [other for other in codes if other != code and other in content]
+        if code in content and not leaked:
+            correct += 1
+        else:
+            print(f"[FAIL] {code}: {content[:120]!r} leaked={leaked}")
+
+    latencies = sorted(latency for _, latency in results)
+    print(f"Concurrent team runs: {concurrency}")
+    print(f"Correct and isolated: {correct}/{concurrency}")
+    print(f"Wall time: {elapsed:.2f}s, latency p50={latencies[len(latencies) // 2]:.2f}s max={latencies[-1]:.2f}s")
+    return correct == concurrency
+
+
+async def main(concurrency: int, url: Optional[str], port: int, pool_size: Optional[int]):
+    team_server = None
+    try:
+        if url is None:
+            team_server = TeamServer(team=create_team(), host="127.0.0.1", port=port, pool_size=pool_size)
+            await team_server.start()
+            await asyncio.sleep(1)
+            url = f"http://127.0.0.1:{port}"
+        passed = await run_load(url, concurrency)
+        print("PASS" if passed else "FAIL")
+    finally:
+        if team_server:
+            await team_server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="TeamServer concurrency load test")
+    parser.add_argument("-n", "--concurrency", type=int, default=20, help="Number of concurrent team runs")
+    parser.add_argument("--url", default=None, help="Target a running TeamServer instead of starting one")
+    parser.add_argument("--port", type=int, default=8093, help="Port for the in-process TeamServer")
+    parser.add_argument("--pool-size", type=int, default=None,
+                        help="Serve from a pool of this many team copies instead of copying per request")
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.url, args.port, args.pool_size))
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Unix domain socket vs loopback TCP benchmark
+
+Starts an AgentServer in a separate process that listens on a TCP port and a unix socket, then calls it
+from this process over both transports with A2AAgent (shared connection pool, keep-alive connections).
+The served agent uses a model that answers immediately, so the numbers measure the transport and the
+A2A stack rather than an LLM.
+
+Two measurements per transport:
+    - agent card GET: a bare HTTP round trip on the pooled client
+    - message/send: a full A2AAgent.arun call
+
+Usage:
+    python examples/uds_benchmark.py
+    python examples/uds_benchmark.py -n 2000 -c 16 --rounds 20
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List
+
+from agno.agent.agent import Agent
+from agno.models.base import Model
+from agno.models.response import ModelResponse
+
+from agno_a2a_ext.agent.a2a.a2a_agent import A2AAgent
+from agno_a2a_ext.agent.a2a.client_pool import get_client_registry, request_base_url
+from agno_a2a_ext.servers.agent import AgentServer
+from agno_a2a_ext.servers.workers import ServingOptions
+
+
+@dataclass
+class EchoModel(Model):
+    """Replies with the prompt without any network call"""
+    id: str = "echo"
+    name: str = "Echo"
+    provider: str = "local"
+
+    def invoke(self, messages, *args, **kwargs):
+        return messages[-1].get_content_string()
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        return messages[-1].get_content_string()
+
+    def invoke_stream(self, *args, **kwargs):
+        raise NotImplementedError
+
+    async def ainvoke_stream(self, *args, **kwargs):
+        raise NotImplementedError
+
+    def parse_provider_response(self, response, *args, **kwargs):
+        return ModelResponse(role="assistant", content=response)
+
+    def parse_provider_response_delta(self, response):
+        raise NotImplementedError
+
+
+def serve(port: int, uds: str) -> None:
+    # Per-request access logs would dominate the timings
+    logging.getLogger("uvicorn.access").disabled = True
+
+    async def run():
+        agent = Agent(name="Echo Agent", model=EchoModel())
+        # Pooled instances are reset after every run, so run history does not grow during the benchmark
+        server = AgentServer(agent, host="127.0.0.1", port=port, pool_size=4, serving=ServingOptions(uds=uds))
+        await server.start()
+        await asyncio.Event().wait()
+
+    asyncio.run(run())
+
+
+class Stats:
+    """Latencies and busy time of one transport / call combination"""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.elapsed = 0.0
+
+    async def run(self, call: Callable[[], Awaitable], requests: int, concurrency: int) -> None:
+        remaining = iter(range(requests))
+
+        async def worker():
+            for _ in remaining:
+                t0 = time.perf_counter()
+                await call()
+                self.latencies.append(time.perf_counter() - t0)
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        self.elapsed += time.perf_counter() - started
+
+    def row(self) -> str:
+        latencies = sorted(self.latencies)
+        p50 = statistics.median(latencies) * 1000
+        p99 = latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1000
+        return f"{len(latencies) / self.elapsed:>10.0f}{p50:>10.2f}{p99:>10.2f}"
+
+
+async def benchmark(urls: Dict[str, str], requests: int, concurrency: int,
+                    rounds: int) -> Dict[str, Dict[str, Stats]]:
+    registry = get_client_registry()
+    calls = {}
+    agents = []
+    for label, url in urls.items():
+        client = await registry.acquire(url)
+        card_url = f"{request_base_url(url)}/.well-known/agent.json"
+        agent = A2AAgent(base_url=url, name="Benchmark Client", in_process=False)
+        agents.append(agent)
+        calls[label] = {
+            "agent card GET": lambda client=client, card_url=card_url: client.get(card_url),
+            "message/send": lambda agent=agent: agent.arun("ping"),
+        }
+    results = {label: {call: Stats() for call in calls[label]} for label in urls}
+    try:
+        # Warm up connections, then alternate transports round by round so that both see the same server state
+        for label in urls:
+            for call in calls[label].values():
+                await asyncio.gather(*[call() for _ in range(concurrency)])
+        per_round = max(1, requests // rounds)
+        for _ in range(rounds):
+            for label in urls:
+                for name, call in calls[label].items():
+                    await results[label][name].run(call, per_round, concurrency)
+    finally:
+        for agent in agents:
+            await agent.close()
+        for url in urls.values():
+            await registry.release(url)
+    return results
+
+
+async def wait_until_ready(base_url: str, timeout: float = 30.0) -> None:
+    registry = get_client_registry()
+    client = await registry.acquire(base_url)
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            try:
+                await client.get(f"{request_base_url(base_url)}/.well-known/agent.json")
+                return
+            except Exception:
+                if time.monotonic() > deadline:
+                    raise
+                await asyncio.sleep(0.1)
+    finally:
+        await registry.release(base_url)
+
+
+async def main(requests: int, concurrency: int, rounds: int, port: int):
+    uds = os.path.join(tempfile.gettempdir(), f"agno_a2a_benchmark_{port}.sock")
+    process = multiprocessing.Process(target=serve, args=(port, uds), daemon=True)
+    process.start()
+    try:
+        tcp_url, uds_url = f"http://127.0.0.1:{port}", f"unix://{uds}"
+        await wait_until_ready(tcp_url)
+        await wait_until_ready(uds_url)
+
+        results = await benchmark({"loopback TCP": tcp_url, "unix socket": uds_url}, requests, concurrency, rounds)
+
+        print(f"{requests} requests per transport and call, concurrency {concurrency}")
+        print(f"{'transport':<14}{'call':<16}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+        for label, calls in results.items():
+            for call, stats in calls.items():
+                print(f"{label:<14}{call:<16}{stats.row()}")
+    finally:
+        process.terminate()
+        process.join()
+        if os.path.exists(uds):
+            os.unlink(uds)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Unix domain socket vs loopback TCP benchmark")
+    parser.add_argument("-n", "--requests", type=int, default=500, help="Requests per transport and call")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="Concurrent requests")
+    parser.add_argument("--rounds", type=int, default=10, help="Alternate between the transports this many times")
+    parser.add_argument("--port", type=int, default=8094, help="TCP port of the benchmark server")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.rounds, args.port))
@@ -92,6 +92,16 @@ EXTRAS_REQUIRE = {
     "mongo": [
         "pymongo>=4.0.0",
     ],
+    "http2": [
+        "httpx[http2]>=0.24.0",
+    ],
+    "compression": [
+        "brotli>=1.0.9",
+        "zstandard>=0.18.0",
+    ],
+    "msgpack": [
+        "msgpack>=1.0.0",
+    ],
 }
 
 # 包配置
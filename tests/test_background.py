@@ -0,0 +1,73 @@
+# tests/test_background.py
+"""非阻塞提交的后台任务：执行失败以failed状态保存（tasks/get轮询和推送通知都能看到），不会被当作completed"""
+import asyncio
+import socket
+from dataclasses import dataclass
+
+import pytest
+from agno.agent.agent import Agent
+from agno.models.base import Model
+from agno.run.response import RunStatus
+
+from agno_a2a_ext.agent.a2a.a2a_agent import A2AAgent
+from agno_a2a_ext.agent.a2a.notifications import NotificationReceiver
+from agno_a2a_ext.servers.agent import AgentServer
+
+
+@dataclass
+class FailingModel(Model):
+    """每次调用都失败"""
+    id: str = "failing"
+    name: str = "Failing"
+    provider: str = "local"
+
+    def invoke(self, *args, **kwargs):
+        raise NotImplementedError
+
+    async def ainvoke(self, *args, **kwargs):
+        raise RuntimeError("provider timeout")
+
+    def invoke_stream(self, *args, **kwargs):
+        raise NotImplementedError
+
+    async def ainvoke_stream(self, *args, **kwargs):
+        raise NotImplementedError
+
+    def parse_provider_response(self, *args, **kwargs):
+        raise NotImplementedError
+
+    def parse_provider_response_delta(self, *args, **kwargs):
+        raise NotImplementedError
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.mark.parametrize("push", [False, True])
+def test_failed_background_task(push):
+    async def scenario():
+        port = _free_port()
+        server = AgentServer(Agent(name="Failing Agent", model=FailingModel()), host="127.0.0.1", port=port)
+        await server.start()
+        receiver = NotificationReceiver() if push else None
+        client = A2AAgent(
+            base_url=f"http://127.0.0.1:{port}", name="client",
+            notification_receiver=receiver, poll_interval=0.05,
+        )
+        try:
+            submitted = await client.asubmit("hello")
+            return await client.await_task(submitted, timeout=10), submitted.task
+        finally:
+            await client.close()
+            if receiver is not None:
+                await receiver.stop()
+            await server.stop()
+
+    response, task = asyncio.run(scenario())
+
+    assert response.status == RunStatus.error
+    assert "provider timeout" in response.content
+    assert task.status.state == "failed"
@@ -0,0 +1,76 @@
+# tests/test_response_cache.py
+"""响应缓存只保存成功的回复：远程执行失败以failed任务返回，客户端得到错误且不写入缓存"""
+import asyncio
+import socket
+from dataclasses import dataclass
+
+from agno.agent.agent import Agent
+from agno.models.base import Model
+from agno.models.response import ModelResponse
+from agno.run.response import RunStatus
+
+from agno_a2a_ext.agent.a2a.a2a_agent import A2AAgent
+from agno_a2a_ext.agent.a2a.response_cache import InMemoryResponseCache
+from agno_a2a_ext.servers.agent import AgentServer
+
+
+@dataclass
+class FlakyModel(Model):
+    """第一次调用失败，之后原样回复"""
+    id: str = "flaky"
+    name: str = "Flaky"
+    provider: str = "local"
+    calls: int = 0
+
+    def invoke(self, messages, *args, **kwargs):
+        raise NotImplementedError
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            raise RuntimeError("provider timeout")
+        return messages[-1].get_content_string()
+
+    def invoke_stream(self, *args, **kwargs):
+        raise NotImplementedError
+
+    async def ainvoke_stream(self, *args, **kwargs):
+        raise NotImplementedError
+
+    def parse_provider_response(self, response, *args, **kwargs):
+        return ModelResponse(role="assistant", content=response)
+
+    def parse_provider_response_delta(self, response):
+        raise NotImplementedError
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_failed_run_is_not_cached():
+    async def scenario():
+        model = FlakyModel()
+        port = _free_port()
+        server = AgentServer(Agent(name="Flaky Agent", model=model), host="127.0.0.1", port=port)
+        await server.start()
+        cache = InMemoryResponseCache()
+        client = A2AAgent(base_url=f"http://127.0.0.1:{port}", name="client", response_cache=cache)
+        try:
+            return [await client.arun("hello") for _ in range(3)], cache.stats(), model.calls
+        finally:
+            await client.close()
+            await server.stop()
+
+    responses, stats, calls = asyncio.run(scenario())
+
+    assert responses[0].status == RunStatus.error
+    assert "provider timeout" in responses[0].content
+    assert [r.status for r in responses[1:]] == [RunStatus.completed, RunStatus.completed]
+    assert [r.content for r in responses[1:]] == ["hello", "hello"]
+    # 失败的回复没有写入缓存：第二次调用重新执行并缓存，第三次命中
+    assert calls == 2
+    assert stats["sets"] == 1
+    assert stats["hits"] == 1
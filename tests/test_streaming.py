@@ -0,0 +1,99 @@
+# tests/test_streaming.py
+"""流式响应处理的开销测试：长流下每个数据块的开销应保持恒定（整体线性的时间与内存）"""
+import asyncio
+import time
+import tracemalloc
+
+import pytest
+from a2a.types import (
+    Artifact,
+    Part,
+    TaskArtifactUpdateEvent,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+
+from agno_a2a_ext.agent.a2a.a2a_agent import A2AAgent
+from agno_a2a_ext.agent.a2a.streaming import StreamState
+
+CHUNK_TEXT = "0123456789abcdef"
+
+
+def _events(count: int):
+    """合成的A2A流：count个追加式artifact片段，中间夹杂进度状态，最后是完成状态"""
+    for i in range(count):
+        if i % 100 == 0:
+            yield TaskStatusUpdateEvent(
+                task_id="task", context_id="ctx", final=False,
+                status=TaskStatus(state=TaskState.working),
+            )
+        yield TaskArtifactUpdateEvent(
+            task_id="task", context_id="ctx", append=i > 0, last_chunk=False,
+            artifact=Artifact(artifact_id="answer", parts=[Part(root=TextPart(text=CHUNK_TEXT))]),
+        )
+    yield TaskStatusUpdateEvent(
+        task_id="task", context_id="ctx", final=True,
+        status=TaskStatus(state=TaskState.completed),
+    )
+
+
+async def _deltas(events):
+    """与A2AAgent._stream_deltas相同：每个数据块经StreamState解析一次，产出新增文本"""
+    state = StreamState()
+    for event in events:
+        delta = state.consume(event)
+        if delta:
+            yield delta
+
+
+async def _consume(agent: A2AAgent, events) -> tuple:
+    chunks = 0
+    last = None
+    async for response in agent._handle_stream_response(_deltas(events)):
+        chunks += 1
+        last = response
+    return chunks, last
+
+
+def _run(mode: str, count: int, trace_memory: bool = False) -> tuple:
+    """处理count个数据块的流，返回(耗时, 内存峰值, 数据块数, 最终响应)"""
+    agent = A2AAgent(base_url="http://127.0.0.1:1", name="stream-test", stream_mode=mode)
+    # 先生成全部事件，只统计解析与响应处理的开销
+    events = list(_events(count))
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        started = time.perf_counter()
+        chunks, last = asyncio.run(_consume(agent, events))
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else 0
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    return elapsed, peak, chunks, last
+
+
+@pytest.mark.parametrize("mode", ["delta", "accumulated"])
+def test_long_stream_content(mode):
+    count = 2000
+    _, _, chunks, last = _run(mode, count)
+    assert chunks == count + 1
+    assert last.event == "RunCompleted"
+    assert last.content == CHUNK_TEXT * count
+
+
+@pytest.mark.parametrize("mode", ["delta", "accumulated"])
+def test_long_stream_is_linear(mode):
+    small, large = 5000, 60000
+    ratio = large / small
+    # 取多次中的最快值，减少调度抖动的影响
+    small_time = min(_run(mode, small)[0] for _ in range(3))
+    large_time = min(_run(mode, large)[0] for _ in range(3))
+    # 线性约为12倍，逐块复制全部已接收内容（二次方）约为144倍
+    assert large_time < small_time * ratio * 2, (small_time, large_time)
+
+    small_peak = _run(mode, small, trace_memory=True)[1]
+    large_peak = _run(mode, large, trace_memory=True)[1]
+    assert large_peak < small_peak * ratio * 2, (small_peak, large_peak)